@@ -0,0 +1,241 @@
+"""
+倒计时引擎基准：TimerManager.tick，列表调度与时间轮调度的对比，以及筛选索引
+"""
+from harness import benchmark, measure
+
+from models import Timer, TIMER_COLORS
+from services.clock_watch import ClockGap
+from services.run_policy import RunPolicy, POLICY_UNLIMITED
+from services.scheduler import create_scheduler, SCHEDULER_LIST
+from services.timer_manager import TimerManager
+
+
+def make_running_manager(count: int, total: int = None,
+                         scheduler: str = SCHEDULER_LIST) -> TimerManager:
+    """
+    创建包含 count 个运行中倒计时的管理器（时长足够长，测量期间不会结束）
+    
+    total 大于 count 时，其余的倒计时处于暂停状态。
+    """
+    total = count if total is None else total
+    timers = [
+        Timer(id=f"t{i:07d}", name=f"timer {i}", duration_seconds=10 ** 7,
+              remaining_seconds=10 ** 7, status="running" if i < count else "paused",
+              position=i)
+        for i in range(total)
+    ]
+    manager = TimerManager(run_policy=RunPolicy(POLICY_UNLIMITED),
+                           scheduler=create_scheduler(scheduler))
+    manager.load_timers(timers)
+    return manager
+
+
+def _bench_tick(count: int, number: int, total: int = None,
+                scheduler: str = SCHEDULER_LIST) -> dict:
+    manager = make_running_manager(count, total, scheduler)
+    updates = []
+    manager.events.subscribe(updates.append)
+    result = measure(manager.tick, number=number, setup=updates.clear)
+    result['timers'] = count
+    if total is not None:
+        result['total'] = total
+    return result
+
+
+@benchmark("tick_10", group="engine")
+def bench_tick_10():
+    return _bench_tick(10, number=2000)
+
+
+@benchmark("tick_1k", group="engine")
+def bench_tick_1k():
+    return _bench_tick(1000, number=50)
+
+
+@benchmark("tick_100k", group="engine")
+def bench_tick_100k():
+    return _bench_tick(100000, number=1)
+
+
+@benchmark("tick_1k_of_100k", group="engine")
+def bench_tick_1k_of_100k():
+    # 滴答只遍历运行中的倒计时，应与 tick_1k 接近
+    return _bench_tick(1000, number=50, total=100000)
+
+
+@benchmark("tick_100k_wheel", group="engine")
+def bench_tick_100k_wheel():
+    # 时间轮只处理到期的槽位，与运行中的倒计时数量无关
+    return _bench_tick(100000, number=1000, scheduler='wheel')
+
+
+def _bench_expire(scheduler: str, count: int = 10000, ticks: int = 600) -> dict:
+    """count 个时长在 1 到 ticks 秒之间的倒计时全部运行到结束"""
+    state = {}
+    
+    def setup():
+        timers = [
+            Timer(id=f"t{i:07d}", name=f"timer {i}", duration_seconds=i % ticks + 1,
+                  remaining_seconds=i % ticks + 1, status="running", position=i)
+            for i in range(count)
+        ]
+        manager = TimerManager(run_policy=RunPolicy(POLICY_UNLIMITED),
+                               scheduler=create_scheduler(scheduler))
+        manager.load_timers(timers)
+        state['manager'] = manager
+    
+    def run():
+        tick = state['manager'].tick
+        for _ in range(ticks):
+            tick()
+    
+    result = measure(run, setup=setup)
+    result.update({'timers': count, 'ticks': ticks})
+    return result
+
+
+@benchmark("expire_10k_list", group="engine")
+def bench_expire_10k_list():
+    return _bench_expire('list')
+
+
+@benchmark("expire_10k_wheel", group="engine")
+def bench_expire_10k_wheel():
+    return _bench_expire('wheel')
+
+
+def _bench_pause_resume(scheduler: str, count: int = 1000, total: int = 100000) -> dict:
+    """在 total 个运行中的倒计时里暂停再继续 count 个"""
+    manager = make_running_manager(total, scheduler=scheduler)
+    timer_ids = [timer.id for timer in manager.timers[:count]]
+    
+    def run():
+        for timer_id in timer_ids:
+            manager.pause_timer(timer_id)
+        for timer_id in timer_ids:
+            manager.resume_timer(timer_id)
+    
+    result = measure(run, number=5)
+    result.update({'timers': count, 'total': total})
+    return result
+
+
+@benchmark("pause_resume_1k_of_100k_list", group="engine")
+def bench_pause_resume_list():
+    return _bench_pause_resume('list')
+
+
+@benchmark("pause_resume_1k_of_100k_wheel", group="engine")
+def bench_pause_resume_wheel():
+    return _bench_pause_resume('wheel')
+
+
+def _bench_alarms(count: int, scheduler: str) -> dict:
+    """count 个已开启的定时倒计时（每天触发），测量一次滴答"""
+    manager = TimerManager(run_policy=RunPolicy(POLICY_UNLIMITED),
+                           scheduler=create_scheduler(scheduler))
+    with manager.batch():
+        for i in range(count):
+            manager.add_timer(f"alarm {i}", 0, "#4CAF50",
+                              schedule=f"daily {i // 60 % 24:02d}:{i % 60:02d}")
+    updates = []
+    manager.events.subscribe(updates.append)
+    # 固定墙上时钟，测量期间不会有定时倒计时触发
+    now = manager.wall_clock()
+    manager.wall_clock = lambda: now
+    result = measure(manager.tick, number=1000, setup=updates.clear)
+    result['alarms'] = count
+    return result
+
+
+@benchmark("alarm_tick_10k_wheel", group="engine")
+def bench_alarm_tick_10k_wheel():
+    # 每次滴答只查看到期队列的堆顶，与定时倒计时的数量无关
+    return _bench_alarms(10000, 'wheel')
+
+
+def _bench_wake(scheduler: str, count: int = 10000, slept: int = 8 * 3600) -> dict:
+    """count 个运行中的倒计时经历 slept 秒的系统休眠，醒来后一次性校正（约一半在休眠期间结束）"""
+    state = {}
+    
+    def setup():
+        timers = [
+            Timer(id=f"t{i:07d}", name=f"timer {i}", duration_seconds=2 * slept,
+                  remaining_seconds=i * 2 * slept // count + 1, status="running", position=i)
+            for i in range(count)
+        ]
+        manager = TimerManager(run_policy=RunPolicy(POLICY_UNLIMITED),
+                               scheduler=create_scheduler(scheduler))
+        manager.load_timers(timers)
+        state['manager'] = manager
+    
+    result = measure(lambda: state['manager'].reconcile(ClockGap(suspended=slept)), setup=setup)
+    result.update({'timers': count, 'slept': slept})
+    return result
+
+
+@benchmark("wake_10k_list", group="engine")
+def bench_wake_10k_list():
+    # 只遍历一次运行中的倒计时，不逐秒补滴答
+    return _bench_wake('list')
+
+
+@benchmark("wake_10k_wheel", group="engine")
+def bench_wake_10k_wheel():
+    # 跨度超过运行中的倒计时数量时直接重建时间轮
+    return _bench_wake('wheel')
+
+
+# 边输入边筛选：依次输入的关键字（最后一步同时按颜色和状态筛选）
+FILTER_KEYSTROKES = ("学", "学习", "学习 ", "学习 任", "学习 任务", "学习 任务 1", "学习 任务 12")
+
+
+def _make_named_manager(count: int) -> TimerManager:
+    """count 个名称、颜色、状态各不相同的倒计时"""
+    words = ("工作", "学习", "Reading", "阅读", "开会")
+    timers = [
+        Timer(id=f"t{i:07d}", name=f"{words[i % len(words)]} 任务 {i}",
+              color=TIMER_COLORS[i % len(TIMER_COLORS)],
+              status=("stopped", "running", "paused")[i % 3], position=i)
+        for i in range(count)
+    ]
+    manager = TimerManager(run_policy=RunPolicy(POLICY_UNLIMITED))
+    manager.load_timers(timers)
+    return manager
+
+
+@benchmark("filter_10k", group="engine")
+def bench_filter_10k():
+    # 每次按键一次查询（查索引，包括按 position 排序结果）
+    manager = _make_named_manager(10000)
+    
+    def type_query():
+        for text in FILTER_KEYSTROKES:
+            manager.find_timers(text)
+        manager.find_timers("任务 1", TIMER_COLORS[1], "running")
+    
+    result = measure(type_query, number=5)
+    keystrokes = len(FILTER_KEYSTROKES) + 1
+    result['per_op_us'] /= keystrokes
+    result['min_us'] /= keystrokes
+    result['timers'] = 10000
+    return result
+
+
+@benchmark("filter_rename_10k", group="engine")
+def bench_filter_rename_10k():
+    # 改名时增量更新名称片段索引，与倒计时总数无关
+    manager = _make_named_manager(10000)
+    ids = [timer.id for timer in manager.timers[:100]]
+    names = ["改名 A", "改名 B"]
+    
+    def rename():
+        names.reverse()
+        for timer_id in ids:
+            manager.update_timer(timer_id, name=names[0])
+    
+    result = measure(rename, number=5)
+    result['per_op_us'] /= len(ids)
+    result['min_us'] /= len(ids)
+    result['timers'] = 10000
+    return result
@@ -0,0 +1,236 @@
+"""
+持久化基准：DataStore.save_state / load_state 往返，CSV / JSONL 导入导出，
+Timer 序列化
+"""
+import tempfile
+import uuid
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+from harness import benchmark, measure
+
+from models import Timer
+from data import DataStore
+from data.transfer import import_timers, export_timers
+from services.run_policy import RunPolicy, POLICY_UNLIMITED
+from services.timer_manager import TimerManager
+
+
+def make_timers(count: int):
+    """生成 count 个倒计时"""
+    return [
+        Timer(id=f"t{i:07d}", name=f"倒计时 {i}", duration_seconds=1500,
+              remaining_seconds=1500 - i % 1500, status="paused", position=i)
+        for i in range(count)
+    ]
+
+
+def _bench_round_trip(count: int, number: int, state_format: str = 'json') -> dict:
+    timers = make_timers(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DataStore(data_dir=Path(tmp), state_format=state_format)
+        save = measure(lambda: store.save_state(timers, window_geometry=list(range(64))),
+                       number=number)
+        load = measure(store.load_state, number=number)
+        size = store.data_file.stat().st_size
+    return {
+        'per_op_us': save['per_op_us'] + load['per_op_us'],
+        'save_us': save['per_op_us'],
+        'load_us': load['per_op_us'],
+        'file_bytes': size,
+        'timers': count,
+    }
+
+
+@benchmark("store_round_trip_100", group="persistence")
+def bench_round_trip_100():
+    return _bench_round_trip(100, number=20)
+
+
+@benchmark("store_round_trip_10k", group="persistence")
+def bench_round_trip_10k():
+    return _bench_round_trip(10000, number=1)
+
+
+@benchmark("store_round_trip_100_binary", group="persistence")
+def bench_round_trip_100_binary():
+    return _bench_round_trip(100, number=20, state_format='binary')
+
+
+@benchmark("store_round_trip_10k_binary", group="persistence")
+def bench_round_trip_10k_binary():
+    return _bench_round_trip(10000, number=1, state_format='binary')
+
+
+def _bench_transfer(count: int, suffix: str) -> dict:
+    """导出 count 个倒计时再导入到新的管理器，分别计时（每个倒计时的耗时）"""
+    timers = make_timers(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / f"timers{suffix}"
+        export = measure(lambda: export_timers(timers, path), repeat=3)
+        state = {}
+        
+        def setup():
+            state['manager'] = TimerManager(run_policy=RunPolicy(POLICY_UNLIMITED))
+        
+        load = measure(lambda: import_timers(state['manager'], path), repeat=3, setup=setup)
+        size = path.stat().st_size
+    return {
+        'per_op_us': (export['per_op_us'] + load['per_op_us']) / count,
+        'export_us': export['per_op_us'] / count,
+        'import_us': load['per_op_us'] / count,
+        'file_bytes': size,
+        'timers': count,
+    }
+
+
+@benchmark("transfer_csv_10k", group="persistence")
+def bench_transfer_csv_10k():
+    return _bench_transfer(10000, '.csv')
+
+
+@benchmark("transfer_jsonl_10k", group="persistence")
+def bench_transfer_jsonl_10k():
+    return _bench_transfer(10000, '.jsonl')
+
+
+def _bench_per_timer(fn, count: int) -> dict:
+    """测量 fn()（处理 count 个倒计时）并换算为每个倒计时的耗时"""
+    result = measure(fn, repeat=3)
+    result['per_op_us'] /= count
+    result['min_us'] /= count
+    result['timers'] = count
+    return result
+
+
+def _legacy_from_dict(data: dict) -> Timer:
+    """生成式序列化之前的 from_dict，作为对照"""
+    return Timer(
+        id=data.get('id', str(uuid.uuid4())[:8]),
+        name=data.get('name', '新倒计时'),
+        duration_seconds=data.get('duration_seconds', 1500),
+        remaining_seconds=data.get('remaining_seconds', 1500),
+        color=data.get('color', '#4CAF50'),
+        status=data.get('status', 'stopped'),
+        created_at=data.get('created_at', datetime.now().isoformat()),
+        position=data.get('position', 0),
+        sound_path=data.get('sound_path', ''),
+        group=data.get('group', '')
+    )
+
+
+@benchmark("timer_to_dict_100k", group="persistence")
+def bench_timer_to_dict():
+    timers = make_timers(100000)
+    return _bench_per_timer(lambda: [t.to_dict() for t in timers], len(timers))
+
+
+@benchmark("timer_to_dict_100k_asdict", group="persistence")
+def bench_timer_asdict():
+    timers = make_timers(100000)
+    return _bench_per_timer(lambda: [asdict(t) for t in timers], len(timers))
+
+
+@benchmark("timer_from_dict_100k", group="persistence")
+def bench_timer_from_dict():
+    records = [t.to_dict() for t in make_timers(100000)]
+    return _bench_per_timer(lambda: [Timer.from_dict(r) for r in records], len(records))
+
+
+@benchmark("timer_from_dict_100k_legacy", group="persistence")
+def bench_timer_from_dict_legacy():
+    records = [t.to_dict() for t in make_timers(100000)]
+    return _bench_per_timer(lambda: [_legacy_from_dict(r) for r in records], len(records))
+
+
+@benchmark("timer_tuple_round_trip_100k", group="persistence")
+def bench_timer_tuple_round_trip():
+    timers = make_timers(100000)
+    from_tuple = Timer.from_tuple
+    return _bench_per_timer(lambda: [from_tuple(t.to_tuple()) for t in timers], len(timers))
+
+
+def _populate_history(history, days: int, timers: int):
+    """写入 days 天的历史：每天每个倒计时开始、暂停、继续、完成各一次"""
+    base = datetime(2020, 1, 1, 9, 0).timestamp()
+    timer_objs = [Timer(id=f"t{i:04d}", name=f"倒计时 {i}", color=f"#0000{i % 8:02d}")
+                  for i in range(timers)]
+    for day in range(days):
+        start = base + day * 86400
+        for i, timer in enumerate(timer_objs):
+            ts = start + i * 60
+            history.record('start', timer, ts)
+            history.record('pause', timer, ts + 600)
+            history.record('resume', timer, ts + 900)
+            history.record('finish', timer, ts + 1800)
+    history.flush()
+    return days * timers * 4
+
+
+@benchmark("history_record_10k", group="persistence")
+def bench_history_record():
+    from services.history import HistoryLog
+    with tempfile.TemporaryDirectory() as tmp:
+        state = {}
+        
+        def setup():
+            state['history'] = HistoryLog(path=Path(tmp) / f"h{len(state)}.sqlite3")
+        
+        result = measure(lambda: _populate_history(state['history'], 125, 20), repeat=3,
+                         setup=setup)
+        state['history'].close()
+    result['per_op_us'] /= 10000
+    result['min_us'] /= 10000
+    result['events'] = 10000
+    return result
+
+
+@benchmark("history_query_3y", group="persistence")
+def bench_history_query():
+    """三年、20 个倒计时的历史：汇总表查询 vs 直接扫描原始事件"""
+    from services.history import HistoryLog
+    with tempfile.TemporaryDirectory() as tmp:
+        history = HistoryLog(path=Path(tmp) / "history.sqlite3")
+        events = _populate_history(history, 3 * 365, 20)
+        by_day = measure(history.totals_by_day, repeat=5)
+        by_timer = measure(history.totals_by_timer, repeat=5)
+        by_color = measure(history.totals_by_color, repeat=5)
+        # 起止都不在月初月末，需要读首尾两段 daily
+        ranged = measure(lambda: history.totals_by_timer('2020-03-15', '2022-10-20'), repeat=5)
+        raw = measure(lambda: history._query(
+            "SELECT timer_id, SUM(elapsed) FROM events GROUP BY timer_id"), repeat=5)
+        history.close()
+    return {
+        'per_op_us': (by_day['per_op_us'] + by_timer['per_op_us'] + by_color['per_op_us']
+                      + ranged['per_op_us']),
+        'by_day_us': by_day['per_op_us'],
+        'by_timer_us': by_timer['per_op_us'],
+        'by_color_us': by_color['per_op_us'],
+        'by_timer_ranged_us': ranged['per_op_us'],
+        'raw_events_by_timer_us': raw['per_op_us'],
+        'events': events,
+    }
+
+
+@benchmark("stats_snapshot_3y", group="persistence")
+def bench_stats_snapshot():
+    """统计面板：启动时从三年的汇总读取一次，之后每次打开只取快照"""
+    from services.history import HistoryLog
+    from services.statistics import StatisticsAggregator
+    with tempfile.TemporaryDirectory() as tmp:
+        history = HistoryLog(path=Path(tmp) / "history.sqlite3")
+        _populate_history(history, 3 * 365, 20)
+        state = {}
+        
+        def seed():
+            state['statistics'] = StatisticsAggregator()
+            state['statistics'].seed(history)
+        
+        seeded = measure(seed, repeat=3)
+        snapshot = measure(state['statistics'].snapshot, number=100, repeat=5)
+        history.close()
+    return {
+        'per_op_us': snapshot['per_op_us'],
+        'seed_us': seeded['per_op_us'],
+    }
@@ -0,0 +1,195 @@
+"""
+界面基准：卡片重建、卡片刷新、大量倒计时同时运行时的滴答、边输入边筛选、拖拽命中测试、冷启动
+
+需要 PyQt6，建议以 QT_QPA_PLATFORM=offscreen 运行。
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from harness import benchmark, measure
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+_app = None
+_tmp = None
+
+
+def _get_app():
+    """创建（或复用）QApplication"""
+    global _app
+    from PyQt6.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication(["benchmark"])
+    return _app
+
+
+def make_running_timers(count: int):
+    """生成 count 个运行中的倒计时（测量期间不会结束）"""
+    from models import Timer
+    return [
+        Timer(id=f"r{i:07d}", name=f"任务 {i}", duration_seconds=10 ** 6,
+              remaining_seconds=10 ** 6, status="running", position=i)
+        for i in range(count)
+    ]
+
+
+def _make_window(count: int):
+    """创建包含 count 个倒计时的主窗口（使用临时数据目录，不启动控制接口）"""
+    global _tmp
+    from bench_persistence import make_timers
+    from data import DataStore
+    from widgets import MainWindow
+    
+    app = _get_app()
+    _tmp = tempfile.TemporaryDirectory()
+    window = MainWindow(data_store=DataStore(data_dir=Path(_tmp.name)), control=False)
+    window._timer_manager.load_timers(make_timers(count))
+    window.resize(520, 600)
+    window.show()
+    app.processEvents()
+    return app, window
+
+
+@benchmark("refresh_timer_cards_100", group="widgets")
+def bench_refresh_timer_cards():
+    app, window = _make_window(100)
+    # 处理上一轮 deleteLater 留下的待删除卡片，不计入耗时
+    result = measure(window._refresh_timer_cards, number=3, setup=app.processEvents)
+    window.close()
+    return result
+
+
+@benchmark("timer_card_refresh", group="widgets")
+def bench_timer_card_refresh():
+    app, window = _make_window(1)
+    card = next(iter(window._timer_cards.values()))
+    timer = card.timer
+    
+    def refresh():
+        timer.remaining_seconds -= 1
+        card.refresh(timer)
+    
+    result = measure(refresh, number=2000)
+    window.close()
+    return result
+
+
+@benchmark("ui_tick_1k_running", group="widgets")
+def bench_ui_tick_1k_running():
+    from services.run_policy import RunPolicy, POLICY_UNLIMITED
+    app, window = _make_window(0)
+    manager = window._timer_manager
+    manager.set_run_policy(RunPolicy(POLICY_UNLIMITED))
+    timers = make_running_timers(1000)
+    manager.load_timers(timers)
+    # 删除旧卡片、完成布局
+    for _ in range(3):
+        app.processEvents()
+    
+    # 一次滴答的完整耗时：管理器更新 + 主窗口处理 1000 个 tick 事件（只刷新可见卡片）
+    result = measure(manager.tick, number=20)
+    result['running'] = manager.get_running_count()
+    result['visible_cards'] = len(window._get_visible_card_ids())
+    window.close()
+    return result
+
+
+def _bench_add_timers(count: int, batched: bool) -> dict:
+    """向主窗口添加 count 个倒计时：逐个添加（每次重建卡片）或 add_many（只重建一次）"""
+    from models import TIMER_COLORS
+    app, window = _make_window(0)
+    manager = window._timer_manager
+    items = [{'name': f"任务 {i}", 'duration_seconds': 60 + i, 'color': TIMER_COLORS[0]}
+             for i in range(count)]
+    
+    def setup():
+        manager.load_timers([])
+        app.processEvents()
+    
+    def add():
+        if batched:
+            manager.add_many(items)
+        else:
+            for item in items:
+                manager.add_timer(**item)
+    
+    result = measure(add, repeat=3, setup=setup)
+    result['timers'] = count
+    window.close()
+    return result
+
+
+@benchmark("ui_add_50_each", group="widgets")
+def bench_ui_add_50_each():
+    return _bench_add_timers(50, batched=False)
+
+
+@benchmark("ui_add_50_batch", group="widgets")
+def bench_ui_add_50_batch():
+    return _bench_add_timers(50, batched=True)
+
+
+@benchmark("ui_filter_10k", group="widgets")
+def bench_ui_filter_10k():
+    from bench_engine import FILTER_KEYSTROKES, _make_named_manager
+    app, window = _make_window(0)
+    # 先设好筛选条件，只为匹配的倒计时创建卡片
+    window.search_edit.setText("开会")
+    window._timer_manager.load_timers(_make_named_manager(10000).timers)
+    app.processEvents()
+    
+    # 每次按键的同步耗时：查索引 + 移除、复用卡片 + 第一批新建的卡片（其余在之后几轮补上）
+    def setup():
+        window.search_edit.setText("开会")
+        for _ in range(20):
+            app.processEvents()
+    
+    def type_query():
+        for text in FILTER_KEYSTROKES:
+            window.search_edit.setText(text)
+    
+    result = measure(type_query, repeat=3, setup=setup)
+    result['per_op_us'] /= len(FILTER_KEYSTROKES)
+    result['min_us'] /= len(FILTER_KEYSTROKES)
+    result['timers'] = 10000
+    window.close()
+    return result
+
+
+@benchmark("drag_hit_test_100", group="widgets")
+def bench_drag_hit_test():
+    from PyQt6.QtCore import QPoint
+    app, window = _make_window(100)
+    container = window.timers_container
+    height = container.height()
+    points = [QPoint(container.width() // 2, y) for y in range(0, height, max(1, height // 100))]
+    # 模拟拖拽中的状态
+    window._is_dragging = True
+    window._drag_source_index = 0
+    
+    def sweep():
+        for point in points:
+            window._get_card_index_at_local_pos(point)
+            window._get_edge_drop_target_index(point.y())
+    
+    result = measure(sweep, number=5)
+    result['per_op_us'] /= len(points)
+    result['min_us'] /= len(points)
+    result['points'] = len(points)
+    window._is_dragging = False
+    window._drag_source_index = None
+    window.close()
+    return result
+
+
+@benchmark("cold_startup", group="startup")
+def bench_cold_startup():
+    from startup import run_once
+    runs = [run_once() for _ in range(3)]
+    first_paint = sorted(r['first_paint_ms'] for r in runs)[1]
+    return {
+        'per_op_us': first_paint * 1000,
+        'first_paint_ms': first_paint,
+        'process_wall_ms': sorted(r['process_wall_ms'] for r in runs)[1],
+        'total_import_ms': sorted(r['total_import_ms'] for r in runs)[1],
+    }
@@ -0,0 +1,343 @@
+"""
+随机操作序列的性质测试（fuzz）
+
+    model   对单个 Timer 随机执行 start / pause / resume / stop / reset / tick / finish /
+            set_duration / 序列化往返，与按状态机说明独立写出的参考实现逐步比较，
+            并检查不变式（状态合法、0 <= 剩余 <= 时长、运行中剩余 > 0）。
+    engine  对同一组随机操作（添加、开始、暂停、继续、重置、删除、改时长、运行策略、
+            序列、推进若干秒、保存后重启）分别驱动多个 TimerManager：
+                list        逐秒 tick 的列表调度（参考实现）
+                wheel       逐秒 tick 的时间轮
+                list-ff     一次推进多秒时使用 fast_forward 的列表调度
+                wheel-ff    同上，时间轮
+            每一步比较所有倒计时的状态、剩余时间、序列进度和结束事件，并检查
+            筛选索引中的状态与倒计时的实际状态一致。
+
+发现不一致时把操作序列逐个删减到仍能复现的最短序列，连同随机种子一起输出。
+
+使用方法:
+    python benchmarks/fuzz.py                        # 两种目标各运行 10 秒
+    python benchmarks/fuzz.py --target engine --seconds 60 --seed 42
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+import harness  # noqa: F401  把 src 加入 sys.path
+
+from models import Timer
+from models.timer import STATUSES
+from services.event_bus import EVENT_FINISH
+from services.run_policy import RunPolicy
+from services.scheduler import create_scheduler
+from services.timer_manager import TimerManager
+
+# 单个操作：(名称, 参数...)
+Op = tuple
+
+
+class Mismatch(AssertionError):
+    """实现与参考不一致"""
+
+
+# ---------------------------------------------------------------- model
+
+MODEL_OPS = ('start', 'pause', 'resume', 'stop', 'reset', 'tick', 'tick', 'tick',
+             'finish', 'set_duration', 'reload')
+
+
+def reference_step(state: tuple, op: Op) -> tuple:
+    """按状态机说明计算 (状态, 剩余, 时长) 的下一状态，与 Timer 的实现互相独立"""
+    status, remaining, duration = state
+    name = op[0]
+    if name == 'start' and remaining > 0:
+        status = "running"
+    elif name == 'pause' and status == "running":
+        status = "paused"
+    elif name == 'resume' and status == "paused" and remaining > 0:
+        status = "running"
+    elif name in ('stop', 'reset'):
+        status, remaining = "stopped", duration
+    elif name == 'tick' and status == "running":
+        remaining -= 1
+        if remaining == 0:
+            status = "stopped"
+    elif name == 'finish' and status == "running":
+        status, remaining = "stopped", 0
+    elif name == 'set_duration':
+        seconds = op[1]
+        if status == "stopped":
+            remaining = seconds
+        else:
+            remaining = max(1, seconds - (duration - remaining))
+        duration = seconds
+    return status, remaining, duration
+
+
+def random_model_ops(rng: random.Random, length: int) -> List[Op]:
+    """随机的单个倒计时操作序列"""
+    ops = [('init', rng.randint(1, 5), rng.choice(STATUSES), rng.randint(0, 5))]
+    for _ in range(length):
+        name = rng.choice(MODEL_OPS)
+        ops.append((name, rng.randint(1, 5)) if name == 'set_duration' else (name,))
+    return ops
+
+
+def run_model(ops: List[Op]):
+    """执行一条操作序列，不一致时抛出 Mismatch"""
+    _, duration, status, remaining = ops[0]
+    remaining = min(remaining, duration)
+    timer = Timer.from_dict({'duration_seconds': duration, 'remaining_seconds': remaining,
+                             'status': status})
+    # 加载的数据中运行中但剩余 0 秒的视为已结束
+    state = ("stopped" if status == "running" and remaining == 0 else status, remaining, duration)
+    for step, op in enumerate(ops[1:], 1):
+        name = op[0]
+        if name == 'tick':
+            finished = timer.tick()
+            expected_finish = state[0] == "running" and state[1] == 1
+            if finished != expected_finish:
+                raise Mismatch(f"第 {step} 步 tick 返回 {finished}")
+        elif name == 'set_duration':
+            timer.set_duration(op[1])
+        elif name == 'reload':
+            timer = Timer.from_dict(timer.to_dict())
+        else:
+            getattr(timer, name)()
+        state = reference_step(state, op)
+        actual = (timer.status, timer.remaining_seconds, timer.duration_seconds)
+        if actual != state:
+            raise Mismatch(f"第 {step} 步 {op}: 实际 {actual}，应为 {state}")
+        if timer.status not in STATUSES or not 0 <= timer.remaining_seconds <= timer.duration_seconds:
+            raise Mismatch(f"第 {step} 步 {op}: 不变式被破坏 {actual}")
+        if timer.status == "running" and timer.remaining_seconds == 0:
+            raise Mismatch(f"第 {step} 步 {op}: 运行中但剩余 0 秒")
+
+
+# ---------------------------------------------------------------- engine
+
+POLICIES = ('exclusive', 'unlimited', 'max:2', 'group')
+ENGINES = (('list', False), ('wheel', False), ('list', True), ('wheel', True))
+
+
+def random_engine_ops(rng: random.Random, length: int) -> List[Op]:
+    """随机的倒计时管理器操作序列（倒计时和序列按添加顺序的下标引用）"""
+    ops: List[Op] = []
+    for _ in range(length):
+        roll = rng.random()
+        if roll < 0.15:
+            ops.append(('add', rng.randint(1, 120), rng.choice(('', 'a', 'b'))))
+        elif roll < 0.45:
+            ops.append((rng.choice(('start', 'pause', 'resume', 'reset', 'start')),
+                        rng.randint(0, 7)))
+        elif roll < 0.5:
+            ops.append(('remove', rng.randint(0, 7)))
+        elif roll < 0.55:
+            ops.append(('duration', rng.randint(0, 7), rng.randint(1, 120)))
+        elif roll < 0.6:
+            ops.append(('policy', rng.choice(POLICIES)))
+        elif roll < 0.65:
+            ops.append(('sequence', [rng.randint(0, 7) for _ in range(rng.randint(1, 3))],
+                        rng.randint(0, 3)))
+        elif roll < 0.7:
+            ops.append(('start_sequence', rng.randint(0, 3)))
+        elif roll < 0.75:
+            ops.append(('restart', rng.randint(1, 200)))
+        else:
+            ops.append(('advance', rng.choice((1, 1, 1, 2, 5, 30, 61, 150, 400))))
+    return ops
+
+
+class EngineRun:
+    """用一种调度器执行操作序列"""
+    
+    def __init__(self, scheduler: str, fast_forward: bool):
+        self.scheduler = scheduler
+        self.use_fast_forward = fast_forward
+        self.clock = [1_800_000_000.0]
+        self.ids: List[str] = []
+        self.sequence_ids: List[str] = []
+        self.finished: List[str] = []
+        self.manager = self._new_manager()
+        self.manager.set_run_policy(RunPolicy.parse('unlimited'))
+    
+    def _new_manager(self) -> TimerManager:
+        manager = TimerManager(scheduler=create_scheduler(self.scheduler))
+        manager.wall_clock = lambda: self.clock[0]
+        manager.events.subscribe(lambda event: self.finished.append(event.timer.id),
+                                 events=(EVENT_FINISH,))
+        return manager
+    
+    def _id(self, index: int) -> Optional[str]:
+        return self.ids[index] if index < len(self.ids) else None
+    
+    def apply(self, op: Op):
+        """执行一个操作"""
+        manager = self.manager
+        name = op[0]
+        if name == 'add':
+            self.ids.append(manager.add_timer(f"t{len(self.ids)}", op[1], "#4CAF50",
+                                              group=op[2]).id)
+        elif name in ('start', 'pause', 'resume', 'reset', 'remove'):
+            timer_id = self._id(op[1])
+            if timer_id is not None:
+                getattr(manager, f"{name}_timer")(timer_id)
+        elif name == 'duration':
+            timer_id = self._id(op[1])
+            if timer_id is not None:
+                manager.update_timer(timer_id, duration_seconds=op[2])
+        elif name == 'policy':
+            manager.set_run_policy(RunPolicy.parse(op[1]))
+        elif name == 'sequence':
+            steps = [self._id(index) for index in op[1]]
+            if all(step is not None and manager.get_timer(step) for step in steps):
+                self.sequence_ids.append(manager.add_sequence("s", steps, op[2]).id)
+        elif name == 'start_sequence':
+            if op[1] < len(self.sequence_ids):
+                manager.start_sequence(self.sequence_ids[op[1]])
+        elif name == 'advance':
+            self._advance(op[1])
+        elif name == 'restart':
+            self._restart(op[1])
+    
+    def _advance(self, seconds: int):
+        self.clock[0] += seconds
+        if self.use_fast_forward and seconds > 1:
+            self.manager.fast_forward(seconds - 1)
+            self.manager.tick()
+        else:
+            for _ in range(seconds):
+                self.manager.tick()
+    
+    def _restart(self, downtime: int):
+        """参考实现逐秒推进；其余实现保存后在 downtime 秒后重新加载（只在不限制运行时）"""
+        is_reference = self.scheduler == 'list' and not self.use_fast_forward
+        if is_reference or str(self.manager.run_policy) != 'unlimited':
+            self._advance(downtime)
+            return
+        timers = [Timer.from_dict(timer.to_dict()) for timer in self.manager.timers_with_deadlines()]
+        sequences = [sequence.to_dict() for sequence in self.manager.sequences]
+        self.clock[0] += downtime
+        self.manager = self._new_manager()
+        self.manager.set_run_policy(RunPolicy.parse('unlimited'))
+        self.manager.load_timers(timers)
+        self.manager.load_sequences(sequences)
+        self.manager.catch_up()
+    
+    def snapshot(self) -> tuple:
+        """所有倒计时和序列的状态（按下标，与具体 ID 无关）"""
+        index = {timer_id: i for i, timer_id in enumerate(self.ids)}
+        timers = sorted(self.manager.timers, key=lambda t: index[t.id])
+        sequences = [self.manager.get_sequence(sequence_id) for sequence_id in self.sequence_ids]
+        finished = sorted(index[timer_id] for timer_id in self.finished)
+        self.finished.clear()
+        return (
+            [(index[t.id], t.status, t.remaining_seconds, t.duration_seconds) for t in timers],
+            [(s.active, s.step, s.cycle, [index[step] for step in s.steps]) if s else None
+             for s in sequences],
+            finished,
+        )
+    
+    def check_index(self):
+        """筛选索引与倒计时的实际状态一致"""
+        timers = self.manager.timers
+        for status in STATUSES:
+            indexed = {t.id for t in self.manager.find_timers(status=status)}
+            actual = {t.id for t in timers if t.status == status}
+            if indexed != actual:
+                raise Mismatch(f"{self.scheduler} 的状态索引 {status} 与实际不一致: "
+                               f"多出 {indexed - actual}，缺少 {actual - indexed}")
+
+
+def run_engines(ops: List[Op]):
+    """用所有调度器执行同一条操作序列，每一步与逐秒 tick 的列表调度比较"""
+    runs = [EngineRun(scheduler, fast) for scheduler, fast in ENGINES]
+    reference = runs[0]
+    for step, op in enumerate(ops):
+        for run in runs:
+            run.apply(op)
+            run.check_index()
+        expected = reference.snapshot()
+        for run in runs[1:]:
+            actual = run.snapshot()
+            if actual != expected:
+                label = run.scheduler + ("-ff" if run.use_fast_forward else "")
+                raise Mismatch(f"第 {step} 步 {op}: {label} 与 list 不一致\n"
+                               f"  实际 {actual}\n  应为 {expected}")
+
+
+# ---------------------------------------------------------------- 运行与删减
+
+def shrink(ops: List[Op], check: Callable[[List[Op]], None], keep: int) -> List[Op]:
+    """逐个删除操作（前 keep 个保留），直到再删任何一个都不再复现"""
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(ops) - 1, keep - 1, -1):
+            candidate = ops[:i] + ops[i + 1:]
+            try:
+                check(candidate)
+            except Mismatch:
+                ops = candidate
+                changed = True
+    return ops
+
+
+def fuzz(target: str, seconds: float, seed: int) -> Tuple[int, int, Optional[str]]:
+    """
+    运行 seconds 秒
+    
+    Returns:
+        (序列数, 操作数, 失败报告或 None)
+    """
+    if target == 'model':
+        generate, check, keep, length = random_model_ops, run_model, 1, 40
+    else:
+        generate, check, keep, length = random_engine_ops, run_engines, 0, 30
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + seconds
+    sequences = operations = 0
+    while time.perf_counter() < deadline:
+        case_seed = rng.randrange(2 ** 32)
+        ops = generate(random.Random(case_seed), length)
+        try:
+            check(ops)
+        except Mismatch as e:
+            minimal = shrink(ops, check, keep)
+            try:
+                check(minimal)
+            except Mismatch as error:
+                e = error
+            steps = "\n".join(f"    {op}" for op in minimal)
+            return sequences, operations, (f"{target}: 种子 {case_seed} 复现失败\n{e}\n"
+                                           f"  最短操作序列:\n{steps}")
+        sequences += 1
+        operations += len(ops)
+    return sequences, operations, None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="随机操作序列的性质测试")
+    parser.add_argument("--target", choices=("model", "engine", "all"), default="all")
+    parser.add_argument("--seconds", type=float, default=10.0, help="每个目标的运行秒数")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，默认随机")
+    args = parser.parse_args()
+    
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    targets = ('model', 'engine') if args.target == 'all' else (args.target,)
+    failed = False
+    for target in targets:
+        sequences, operations, report = fuzz(target, args.seconds, seed)
+        rate = sequences * 60 / args.seconds
+        print(f"{target:<8} 种子 {seed}  {sequences} 条序列 / {operations} 个操作"
+              f"（每分钟约 {rate:,.0f} 条）")
+        if report:
+            print(report, file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+基准测试框架 - 注册、计时与基线比较
+"""
+import gc
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# 名称 -> (分组, 函数)
+_REGISTRY: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, group: str):
+    """
+    注册基准测试
+    
+    被装饰的函数返回一个 dict，至少包含 'per_op_us'（每次操作耗时，微秒），
+    也可以附带其他指标（如文件大小），一并写入结果文件。
+    """
+    def decorator(fn: Callable[[], dict]):
+        _REGISTRY[name] = (group, fn)
+        return fn
+    return decorator
+
+
+def registered() -> Dict[str, tuple]:
+    """获取所有已注册的基准测试"""
+    return dict(_REGISTRY)
+
+
+def measure(fn: Callable[[], None], number: int = 1, repeat: int = 5,
+            setup: Optional[Callable[[], None]] = None) -> dict:
+    """
+    测量函数耗时
+    
+    Args:
+        fn: 被测函数
+        number: 每轮调用次数
+        repeat: 轮数，取中位数和最小值
+        setup: 每轮开始前调用，不计入耗时
+        
+    Returns:
+        {'per_op_us': 中位数, 'min_us': 最小值, 'number': ..., 'repeat': ...}
+    """
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if gc_was_enabled:
+                gc.enable()
+            samples.append(elapsed / number * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        'per_op_us': statistics.median(samples),
+        'min_us': min(samples),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            tolerance: float) -> List[str]:
+    """
+    与基线比较
+    
+    Args:
+        results: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的倍数，例如 1.5 表示慢 50% 以内不算回退
+        
+    Returns:
+        回退描述列表
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or 'per_op_us' not in base or 'per_op_us' not in result:
+            continue
+        ratio = result['per_op_us'] / base['per_op_us'] if base['per_op_us'] else 1.0
+        result['baseline_ratio'] = round(ratio, 3)
+        if ratio > tolerance:
+            regressions.append(
+                f"{name}: {result['per_op_us']:.1f}us vs 基线 {base['per_op_us']:.1f}us (x{ratio:.2f})"
+            )
+    return regressions
@@ -0,0 +1,90 @@
+"""
+基准测试入口
+
+使用方法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/run.py            # 运行全部并与基线比较
+    python benchmarks/run.py --group engine --group persistence   # 只运行部分分组
+    python benchmarks/run.py --update-baseline                    # 用本次结果更新基线
+
+结果写入 benchmarks/results.json；与 benchmarks/baseline.json 相比慢于
+--tolerance 倍的用例视为回退，此时以非零状态码退出。
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from harness import compare, registered
+
+import bench_engine  # noqa: F401  注册用例
+import bench_persistence  # noqa: F401
+
+try:
+    import PyQt6  # noqa: F401
+    import bench_widgets  # noqa: F401
+    HAS_QT = True
+except ImportError:
+    HAS_QT = False
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_FILE = BENCH_DIR / "results.json"
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="运行基准测试")
+    parser.add_argument("--group", action="append", help="只运行指定分组，可重复")
+    parser.add_argument("--filter", default=None, help="只运行名称包含该字符串的用例")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="允许相对基线变慢的倍数")
+    parser.add_argument("--output", default=str(RESULTS_FILE), help="结果文件路径")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果更新基线")
+    args = parser.parse_args()
+    
+    if not HAS_QT:
+        print("未安装 PyQt6，跳过界面相关用例")
+    
+    results = {}
+    for name, (group, fn) in registered().items():
+        if args.group and group not in args.group:
+            continue
+        if args.filter and args.filter not in name:
+            continue
+        started = time.perf_counter()
+        result = fn()
+        result['group'] = group
+        results[name] = result
+        print(f"{name:32s} {result['per_op_us']:14.2f} us/op   ({time.perf_counter() - started:.1f}s)")
+    
+    baseline = {}
+    if BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8")).get('results', {})
+    regressions = compare(results, baseline, args.tolerance)
+    
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+        'regressions': regressions,
+    }
+    Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    
+    if args.update_baseline:
+        merged = dict(baseline)
+        merged.update(results)
+        report['results'] = merged
+        report.pop('regressions')
+        BASELINE_FILE.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"已更新基线: {BASELINE_FILE}")
+        return 0
+    
+    for regression in regressions:
+        print(f"性能回退: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+启动时间基准测试
+
+在子进程中以 `python -X importtime` 启动主窗口，测量到首次绘制为止的耗时和
+模块导入耗时，并与 startup_budget.json 中记录的预算比较。
+
+使用方法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/startup.py [--runs 5] [--json]
+
+超出预算时以非零状态码退出，可用于本地的 CI 式检查。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+BUDGET_FILE = BENCH_DIR / "startup_budget.json"
+
+# 子进程中执行的探针：创建主窗口、处理一轮事件（首次绘制）后报告结果
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+from widgets import MainWindow
+window = MainWindow()
+window.show()
+app.processEvents()
+first_paint = time.perf_counter()
+loaded = sorted(sys.modules)
+window.finish_startup()
+app.processEvents()
+print(json.dumps({
+    "first_paint_ms": (first_paint - start) * 1000,
+    "startup_complete_ms": (time.perf_counter() - start) * 1000,
+    "modules_at_first_paint": loaded,
+}))
+'''
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    解析 -X importtime 的输出
+    
+    Returns:
+        {顶层模块名: 累计导入耗时(ms)}
+    """
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue
+        name = parts[2]
+        # 只统计顶层导入（没有缩进的条目），避免重复计算
+        if name.startswith("  ") or not name.strip():
+            continue
+        name = name.strip()
+        totals[name] = totals.get(name, 0) + cumulative_us / 1000
+    return totals
+
+
+def run_once() -> dict:
+    """运行一次启动探针"""
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ)
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        # 使用临时数据目录，避免读写用户的真实状态
+        env["HOME"] = home
+        env["LOCALAPPDATA"] = home
+        
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, str(SRC_DIR)],
+            capture_output=True, text=True, env=env, timeout=60
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+    
+    if result.returncode != 0:
+        raise RuntimeError(f"启动探针失败:\n{result.stderr[-2000:]}")
+    
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(result.stderr)
+    report["process_wall_ms"] = wall_ms
+    report["total_import_ms"] = sum(imports.values())
+    report["imports_ms"] = imports
+    return report
+
+
+def check_budget(summary: dict, budget: dict) -> list:
+    """与预算比较，返回违规描述列表"""
+    violations = []
+    for key in ("first_paint_ms", "process_wall_ms", "total_import_ms"):
+        limit = budget.get(key)
+        if limit is not None and summary[key] > limit:
+            violations.append(f"{key}: {summary[key]:.1f} > 预算 {limit}")
+    
+    loaded = set(summary["modules_at_first_paint"])
+    for module in budget.get("deferred_modules", []):
+        if module in loaded:
+            violations.append(f"模块 {module} 应在首次绘制之后才导入")
+    return violations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="启动时间基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="运行次数，取中位数")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+    
+    runs = [run_once() for _ in range(args.runs)]
+    summary = {
+        key: statistics.median(r[key] for r in runs)
+        for key in ("first_paint_ms", "startup_complete_ms", "process_wall_ms", "total_import_ms")
+    }
+    summary["modules_at_first_paint"] = runs[-1]["modules_at_first_paint"]
+    slowest = sorted(runs[-1]["imports_ms"].items(), key=lambda kv: kv[1], reverse=True)[:10]
+    
+    budget = json.loads(BUDGET_FILE.read_text(encoding="utf-8"))
+    violations = check_budget(summary, budget)
+    
+    if args.json:
+        output = {k: v for k, v in summary.items() if k != "modules_at_first_paint"}
+        output["slowest_imports_ms"] = dict(slowest)
+        output["violations"] = violations
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+    else:
+        print(f"首次绘制:     {summary['first_paint_ms']:.1f} ms")
+        print(f"启动完成:     {summary['startup_complete_ms']:.1f} ms")
+        print(f"进程总耗时:   {summary['process_wall_ms']:.1f} ms")
+        print(f"模块导入合计: {summary['total_import_ms']:.1f} ms")
+        print("最慢的顶层导入:")
+        for name, ms in slowest:
+            print(f"  {ms:8.1f} ms  {name}")
+        for violation in violations:
+            print(f"超出预算: {violation}")
+    
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,31 @@
-from .store import DataStore
+"""
+数据存储模块
 
-__all__ = ['DataStore']
+子模块按需导入：只需要数据目录时（如单实例检查）不会加载模型层。
+"""
+import importlib
+
+_LAZY_ATTRS = {
+    'DataStore': '.store',
+    'get_default_data_dir': '.paths',
+    'resolve_data_dir': '.paths',
+    'import_timers': '.transfer',
+    'ImportJob': '.transfer',
+    'export_timers': '.transfer',
+    'FileLock': '.locking',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
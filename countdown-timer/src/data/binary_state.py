@@ -0,0 +1,189 @@
+"""
+紧凑二进制状态格式
+
+文件布局（小端）:
+    魔数 b'CDTS' | 版本 uint16
+    段: 长度 uint32 + 内容，依次为
+        schema     JSON，记录整数字段和字符串字段的名称与顺序
+        settings   JSON，窗口位置以外的设置
+        geometry   窗口位置的原始字节
+        timers     数量 uint32，之后按 schema 的顺序每个字段一列
+
+倒计时按列存储：整数字段是 int64 数组；字符串字段是各值的字符数（uint32 数组）
+加上所有值拼接后的一段 UTF-8 文本（长度前缀）。加载时每列只需一次 frombytes 或
+一次解码，不必逐条解析记录。字段名写在 schema 中，新增字段后仍能读取旧文件
+（缺少的字段使用默认值），只有布局本身改变时才需要提升版本号。
+"""
+import json
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from operator import attrgetter
+from typing import BinaryIO, List, Optional, Tuple
+
+from models import Timer
+
+MAGIC = b'CDTS'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sH')
+_LENGTH = struct.Struct('<I')
+
+
+class StateFormatError(ValueError):
+    """文件不是有效的二进制状态"""
+
+
+def _timer_schema() -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Timer 的整数字段和字符串字段"""
+    sample = Timer()
+    int_fields = tuple(name for name in Timer.FIELDS if isinstance(getattr(sample, name), int))
+    str_fields = tuple(name for name in Timer.FIELDS if name not in int_fields)
+    return int_fields, str_fields
+
+
+def _section(data: bytes) -> bytes:
+    """长度前缀 + 内容"""
+    return _LENGTH.pack(len(data)) + data
+
+
+def encode_state(timers: List[Timer], settings: dict,
+                 window_geometry: Optional[bytes] = None) -> bytes:
+    """
+    编码状态
+    
+    Args:
+        timers: 倒计时列表
+        settings: 设置（可被 JSON 序列化，不含窗口位置）
+        window_geometry: 窗口位置的原始字节
+    """
+    int_fields, str_fields = _timer_schema()
+    schema = json.dumps({'int_fields': int_fields, 'str_fields': str_fields}).encode('utf-8')
+    
+    parts = [
+        _HEADER.pack(MAGIC, VERSION),
+        _section(schema),
+        _section(json.dumps(settings, ensure_ascii=False).encode('utf-8')),
+        _section(bytes(window_geometry or b'')),
+        _LENGTH.pack(len(timers)),
+    ]
+    for name in int_fields:
+        column = array('q', map(attrgetter(name), timers))
+        parts.append(_to_little_endian(column).tobytes())
+    for name in str_fields:
+        values = list(map(attrgetter(name), timers))
+        lengths = array('I', map(len, values))
+        parts.append(_to_little_endian(lengths).tobytes())
+        parts.append(_section(''.join(values).encode('utf-8')))
+    return b''.join(parts)
+
+
+def decode_state(data: bytes) -> Tuple[List[Timer], dict, Optional[bytes]]:
+    """
+    解码状态
+    
+    Returns:
+        (倒计时列表, 设置, 窗口位置字节或 None)
+        
+    Raises:
+        StateFormatError: 魔数、版本或长度不正确
+    """
+    try:
+        magic, version = _HEADER.unpack_from(data, 0)
+    except struct.error:
+        raise StateFormatError("文件过短") from None
+    if magic != MAGIC:
+        raise StateFormatError("不是二进制状态文件")
+    if version != VERSION:
+        raise StateFormatError(f"不支持的版本: {version}")
+    
+    offset = _HEADER.size
+    
+    def read(length: int) -> bytes:
+        nonlocal offset
+        end = offset + length
+        if end > len(data):
+            raise StateFormatError("文件被截断")
+        chunk = data[offset:end]
+        offset = end
+        return chunk
+    
+    def read_section() -> bytes:
+        (length,) = _LENGTH.unpack(read(_LENGTH.size))
+        return read(length)
+    
+    def read_array(typecode: str, count: int) -> list:
+        column = array(typecode)
+        column.frombytes(read(column.itemsize * count))
+        return _to_little_endian(column).tolist()
+    
+    try:
+        schema = json.loads(read_section())
+        settings = json.loads(read_section())
+        geometry = read_section() or None
+        int_fields = tuple(schema['int_fields'])
+        str_fields = tuple(schema['str_fields'])
+        
+        (count,) = _LENGTH.unpack(read(_LENGTH.size))
+        columns = {}
+        for name in int_fields:
+            columns[name] = read_array('q', count)
+        for name in str_fields:
+            lengths = read_array('I', count)
+            text = str(read_section(), 'utf-8')
+            ends = list(accumulate(lengths))
+            if ends and ends[-1] != len(text):
+                raise StateFormatError(f"字段 {name} 的长度不一致")
+            columns[name] = [text[end - length:end] for length, end in zip(lengths, ends)]
+    except StateFormatError:
+        raise
+    except (struct.error, KeyError, TypeError, ValueError) as e:
+        raise StateFormatError(f"文件已损坏: {e}") from None
+    
+    if set(columns) == set(Timer.FIELDS):
+        # 文件的字段与当前 Timer 一致时按位置构造
+        rows = zip(*(columns[name] for name in Timer.FIELDS))
+        timers = list(map(Timer.from_tuple, rows))
+    else:
+        names = tuple(columns)
+        rows = zip(*columns.values())
+        timers = [Timer.from_dict(dict(zip(names, row))) for row in rows]
+    return timers, settings, geometry
+
+
+def read_settings(stream: BinaryIO) -> dict:
+    """
+    只读取设置段，不解码倒计时（用于快速查看保存代数等元数据）
+    
+    Args:
+        stream: 以二进制方式打开、位于文件开头的状态文件
+        
+    Raises:
+        StateFormatError: 魔数、版本或长度不正确
+    """
+    def read(length: int) -> bytes:
+        chunk = stream.read(length)
+        if len(chunk) != length:
+            raise StateFormatError("文件被截断")
+        return chunk
+    
+    magic, version = _HEADER.unpack(read(_HEADER.size))
+    if magic != MAGIC:
+        raise StateFormatError("不是二进制状态文件")
+    if version != VERSION:
+        raise StateFormatError(f"不支持的版本: {version}")
+    (length,) = _LENGTH.unpack(read(_LENGTH.size))
+    stream.seek(length, 1)
+    (length,) = _LENGTH.unpack(read(_LENGTH.size))
+    try:
+        return json.loads(read(length))
+    except ValueError as e:
+        raise StateFormatError(f"文件已损坏: {e}") from None
+
+
+def _to_little_endian(column: array) -> array:
+    """文件中的数组为小端，大端平台上原地交换字节序"""
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
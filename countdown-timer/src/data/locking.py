@@ -0,0 +1,118 @@
+"""
+跨进程的咨询文件锁
+
+同一数据目录可能有多个写入者（界面、无界面引擎、同步工具），写入状态文件的
+“读取 - 合并 - 写入”在锁内进行，不会被其他写入者打断。Unix 上使用 fcntl.flock，
+Windows 上使用 msvcrt.locking。咨询锁只约束同样加锁的写入者；读取不需要加锁，
+状态文件总是整体替换，读到的要么是旧文件要么是新文件。
+
+lock_fd / unlock_fd 是两个平台加锁的公共部分，单实例锁（ipc.instance）也使用。
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    咨询文件锁（可重入，可在多个线程间共用）
+    
+        with FileLock(data_dir / 'state.lock'):
+            ...
+    """
+    
+    # 锁被占用时重试的间隔（秒）
+    RETRY_INTERVAL = 0.01
+    
+    def __init__(self, path: Path, timeout: float = 10.0):
+        """
+        Args:
+            path: 锁文件路径（不存在时创建，内容不使用）
+            timeout: 等待其他进程释放锁的最长秒数
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._fd = None
+        self._depth = 0
+    
+    @property
+    def held(self) -> bool:
+        """本进程是否持有锁"""
+        return self._depth > 0
+    
+    def acquire(self):
+        """
+        获取锁，已由当前线程持有时只增加计数
+        
+        Raises:
+            TimeoutError: 超时仍未获得锁
+        """
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise TimeoutError(f"等待文件锁超时: {self.path}")
+        if self._depth:
+            self._depth += 1
+            return
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            self._thread_lock.release()
+            raise
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                lock_fd(fd)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    self._thread_lock.release()
+                    raise TimeoutError(f"等待文件锁超时: {self.path}") from None
+                time.sleep(self.RETRY_INTERVAL)
+        self._fd = fd
+        self._depth = 1
+    
+    def release(self):
+        """释放锁（与 acquire 成对调用）"""
+        if not self._depth:
+            return
+        self._depth -= 1
+        if not self._depth:
+            fd, self._fd = self._fd, None
+            try:
+                unlock_fd(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+    
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def lock_fd(fd: int):
+    """非阻塞地加排他锁，被占用时抛出 OSError"""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+
+def unlock_fd(fd: int):
+    """解锁"""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
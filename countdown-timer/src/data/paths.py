@@ -0,0 +1,22 @@
+"""
+数据目录定位 - 不依赖模型层，启动早期（如单实例检查）也可以廉价导入
+"""
+import os
+from pathlib import Path
+
+
+def get_default_data_dir(app_name: str = "CountdownTimer") -> Path:
+    """获取应用数据目录"""
+    # Windows: C:/Users/<user>/AppData/Local/CountdownTimer
+    # 也可以使用当前目录下的 data 文件夹
+    if os.name == 'nt':
+        base_dir = Path(os.environ.get('LOCALAPPDATA', Path.home()))
+    else:
+        base_dir = Path.home() / '.local' / 'share'
+    
+    return base_dir / app_name
+
+
+def resolve_data_dir(data_dir=None, app_name: str = "CountdownTimer") -> Path:
+    """返回自定义数据目录，未指定时返回默认目录"""
+    return Path(data_dir) if data_dir is not None else get_default_data_dir(app_name)
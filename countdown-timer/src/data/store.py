@@ -1,66 +1,121 @@
 """
 数据存储层 - 负责状态的持久化
+
+状态文件有两种格式:
+    json    state.json，便于阅读和手工修改（默认）
+    binary  state.bin，紧凑的二进制格式（见 binary_state），体积更小、加载更快
+通过 DataStore 的 state_format 参数或环境变量 COUNTDOWN_STATE_FORMAT 选择。
+配置的格式文件不存在时会读取另一种格式，下次保存即完成迁移：保存成功后删除
+另一种格式的文件，两种文件都在时（旧版本切换格式后留下的）读取较新的一个。
+
+多个进程可以共用同一个数据目录：写入在文件锁（state.lock）内进行，每次保存把
+文件中的保存代数（generation）加一。has_external_changes 按文件的修改时间、大小
+和 inode 判断文件是否被其他进程改过，增量合并见 engine.sync。
 """
 import json
 import os
+import re
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 from models import Timer
+from utils.profiling import PROFILER
+from .binary_state import encode_state, decode_state, read_settings
+from .locking import FileLock
+from .paths import resolve_data_dir
+
+STATE_FORMAT_JSON = 'json'
+STATE_FORMAT_BINARY = 'binary'
+STATE_FORMATS = (STATE_FORMAT_JSON, STATE_FORMAT_BINARY)
+STATE_FORMAT_ENV = 'COUNTDOWN_STATE_FORMAT'
+
+_STATE_FILES = {STATE_FORMAT_JSON: 'state.json', STATE_FORMAT_BINARY: 'state.bin'}
+_LOCK_FILE = 'state.lock'
+
+# JSON 状态文件开头的保存代数（保存时写在 timers 之前，只需读取文件开头）
+_JSON_GENERATION = re.compile(rb'"generation"\s*:\s*(\d+)')
+_JSON_HEAD_BYTES = 512
 
 
 class DataStore:
     """数据存储管理类"""
     
-    def __init__(self, app_name: str = "CountdownTimer"):
-        """初始化数据存储"""
+    def __init__(self, app_name: str = "CountdownTimer", data_dir: Optional[Path] = None,
+                 state_format: str = None):
+        """
+        初始化数据存储
+        
+        Args:
+            app_name: 应用名称，用于确定默认数据目录
+            data_dir: 自定义数据目录，为 None 时使用系统默认位置
+            state_format: json / binary，为 None 时读取环境变量 COUNTDOWN_STATE_FORMAT，
+                          未设置时使用 json
+                          
+        Raises:
+            ValueError: 未知的格式
+        """
+        state_format = state_format or os.environ.get(STATE_FORMAT_ENV) or STATE_FORMAT_JSON
+        if state_format not in STATE_FORMATS:
+            raise ValueError(f"未知的状态格式: {state_format}")
         self.app_name = app_name
-        self.data_dir = self._get_data_dir()
-        self.data_file = self.data_dir / "state.json"
+        self.state_format = state_format
+        self.data_dir = resolve_data_dir(data_dir, app_name)
+        self.data_file = self.data_dir / _STATE_FILES[state_format]
         self._ensure_data_dir()
-    
-    def _get_data_dir(self) -> Path:
-        """获取应用数据目录"""
-        # Windows: C:/Users/<user>/AppData/Local/CountdownTimer
-        # 也可以使用当前目录下的 data 文件夹
-        if os.name == 'nt':
-            base_dir = Path(os.environ.get('LOCALAPPDATA', Path.home()))
-        else:
-            base_dir = Path.home() / '.local' / 'share'
-        
-        return base_dir / self.app_name
+        # 写入者之间的文件锁；需要在读取和写入之间合并时由调用者在外层持有
+        self.lock = FileLock(self.data_dir / _LOCK_FILE)
+        # 最近一次读取或写入的保存代数，以及当时状态文件的签名
+        self.generation = 0
+        self._signature = None
     
     def _ensure_data_dir(self):
         """确保数据目录存在"""
         self.data_dir.mkdir(parents=True, exist_ok=True)
     
-    def save_state(self, timers: List[Timer], window_geometry: dict = None, 
-                   volume: float = 0.7) -> bool:
+    def save_state(self, timers: List[Timer], window_geometry: bytes = None, 
+                   volume: float = 0.7, run_policy: str = "exclusive",
+                   sequences: List[dict] = None, sleep_policy: str = "count") -> bool:
         """
         保存应用状态
         
         Args:
             timers: 倒计时列表
-            window_geometry: 窗口位置和大小
+            window_geometry: 窗口位置和大小（QWidget.saveGeometry 的字节）
             volume: 音量设置
+            run_policy: 运行策略（见 services.run_policy）
+            sequences: 倒计时序列（Sequence.to_dict 的列表）
+            sleep_policy: 休眠策略（见 services.clock_watch）
             
         Returns:
             保存是否成功
         """
         try:
-            state = {
-                'version': '1.0',
-                'saved_at': datetime.now().isoformat(),
-                'timers': [timer.to_dict() for timer in timers],
-                'settings': {
+            with self.lock, PROFILER.span('store.save', timers=len(timers),
+                                          format=self.state_format):
+                generation = max(self.generation, self.read_generation()) + 1
+                geometry = _geometry_bytes(window_geometry)
+                settings = {
                     'volume': volume,
-                    'window_geometry': window_geometry or {}
+                    'run_policy': run_policy,
+                    'sleep_policy': sleep_policy
                 }
-            }
-            
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
+                if sequences:
+                    settings['sequences'] = sequences
+                if self.state_format == STATE_FORMAT_BINARY:
+                    settings['saved_at'] = datetime.now().isoformat()
+                    settings['generation'] = generation
+                    data = encode_state(timers, settings, geometry)
+                else:
+                    state = self._json_state(timers, settings, geometry, generation)
+                    data = json.dumps(state, ensure_ascii=False, indent=2).encode('utf-8')
+                # 先写临时文件再替换：写到一半的文件无法部分恢复，其他进程也不会读到
+                tmp_file = self.data_file.with_suffix('.tmp')
+                tmp_file.write_bytes(data)
+                os.replace(tmp_file, self.data_file)
+                self.generation = generation
+                self._signature = _signature(self.data_file)
+                self._remove_other_formats()
             
             return True
         except Exception as e:
@@ -72,65 +127,216 @@ class DataStore:
         加载应用状态
         
         Returns:
-            包含 timers 和 settings 的字典
+            包含 timers 和 settings 的字典，generation 为文件的保存代数
+            （没有状态文件或读取失败时返回默认状态，不含 generation）
         """
         default_state = {
             'timers': [],
             'settings': {
                 'volume': 0.7,
-                'window_geometry': None
+                'window_geometry': None,
+                'run_policy': 'exclusive',
+                'sleep_policy': 'count'
             }
         }
         
-        if not self.data_file.exists():
+        existing = self._existing_state_file()
+        # 先记下签名再读取：读取期间文件被替换时，下次检查仍会发现变化
+        self._signature = _signature(existing[0]) if existing else None
+        if existing is None:
             return default_state
+        path, state_format = existing
         
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                state = json.load(f)
-            
-            timers = [Timer.from_dict(t) for t in state.get('timers', [])]
-            settings = state.get('settings', default_state['settings'])
+            with PROFILER.span('store.load', format=state_format):
+                if state_format == STATE_FORMAT_BINARY:
+                    timers, settings, geometry = decode_state(path.read_bytes())
+                    settings.pop('saved_at', None)
+                    generation = settings.pop('generation', 0)
+                else:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                    
+                    timers = [Timer.from_dict(t) for t in state.get('timers', [])]
+                    settings = state.get('settings', default_state['settings'])
+                    geometry = _geometry_bytes(settings.get('window_geometry'))
+                    generation = state.get('generation', 0)
+                settings['window_geometry'] = geometry
             
+            self.generation = int(generation)
             return {
                 'timers': timers,
-                'settings': settings
+                'settings': settings,
+                'generation': self.generation
             }
         except Exception as e:
             print(f"加载状态失败: {e}")
             return default_state
     
-    def save_timers(self, timers: List[Timer]) -> bool:
-        """仅保存倒计时数据"""
+    def export_json(self, path: Path) -> bool:
+        """把当前状态（任一格式）导出为 JSON，便于查看和调试"""
         state = self.load_state()
-        return self.save_state(
-            timers=timers,
-            window_geometry=state['settings'].get('window_geometry'),
-            volume=state['settings'].get('volume', 0.7)
-        )
+        settings = dict(state['settings'])
+        geometry = settings.pop('window_geometry', None)
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self._json_state(state['timers'], settings, geometry,
+                                           state.get('generation', 0)),
+                          f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            print(f"导出状态失败: {e}")
+            return False
     
-    def save_settings(self, window_geometry: dict = None, volume: float = None) -> bool:
-        """仅保存设置"""
-        state = self.load_state()
-        settings = state['settings']
+    def _existing_state_file(self) -> Optional[Tuple[Path, str]]:
+        """
+        当前的状态文件，返回 (路径, 格式)
+        
+        两种格式的文件都在时使用修改时间较新的，相同时使用配置的格式。
+        """
+        found = None
+        for state_format, name in _STATE_FILES.items():
+            path = self.data_dir / name
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            key = (mtime, state_format == self.state_format)
+            if found is None or key > found[0]:
+                found = (key, path, state_format)
+        return found[1:] if found else None
+    
+    def _remove_other_formats(self):
+        """删除另一种格式的状态文件（保存成功后在锁内调用），以后切换回来不会读到过期的状态"""
+        for name in _STATE_FILES.values():
+            path = self.data_dir / name
+            if path == self.data_file:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"删除旧格式的状态文件失败: {e}")
+    
+    def read_generation(self) -> int:
+        """
+        状态文件当前的保存代数（只读取文件开头，不解析倒计时）
         
-        if window_geometry is not None:
-            settings['window_geometry'] = window_geometry
-        if volume is not None:
-            settings['volume'] = volume
+        Returns:
+            没有状态文件或旧版本保存的文件为 0
+        """
+        existing = self._existing_state_file()
+        if existing is None:
+            return 0
+        path, state_format = existing
+        try:
+            with open(path, 'rb') as f:
+                if state_format == STATE_FORMAT_BINARY:
+                    return int(read_settings(f).get('generation', 0))
+                match = _JSON_GENERATION.search(f.read(_JSON_HEAD_BYTES))
+                if match:
+                    return int(match.group(1))
+                # 手工编辑过的文件中代数可能不在开头
+                f.seek(0)
+                return int(json.load(f).get('generation', 0))
+        except (OSError, ValueError) as e:
+            print(f"读取保存代数失败: {e}")
+            return 0
+    
+    def has_external_changes(self) -> bool:
+        """
+        状态文件在本进程最近一次读取或写入之后是否被改过（其他进程、同步工具或手工修改）
         
-        return self.save_state(
-            timers=state['timers'],
-            window_geometry=settings.get('window_geometry'),
-            volume=settings.get('volume', 0.7)
-        )
+        只比较文件的修改时间、大小和 inode，可以频繁调用。
+        """
+        existing = self._existing_state_file()
+        signature = _signature(existing[0]) if existing else None
+        return signature != self._signature
+    
+    @staticmethod
+    def _json_state(timers: List[Timer], settings: dict, geometry: Optional[bytes],
+                    generation: int = 0) -> dict:
+        """JSON 格式的状态（窗口位置保存为字节值列表，与旧版本兼容）"""
+        return {
+            'version': '1.0',
+            'generation': generation,
+            'saved_at': datetime.now().isoformat(),
+            'timers': [timer.to_dict() for timer in timers],
+            'settings': dict(settings, window_geometry=list(geometry) if geometry else {})
+        }
+    
+    def save_timers(self, timers: List[Timer]) -> bool:
+        """仅保存倒计时数据"""
+        with self.lock:
+            state = self.load_state()
+            return self.save_state(
+                timers=timers,
+                window_geometry=state['settings'].get('window_geometry'),
+                volume=state['settings'].get('volume', 0.7),
+                run_policy=state['settings'].get('run_policy', 'exclusive'),
+                sequences=state['settings'].get('sequences'),
+                sleep_policy=state['settings'].get('sleep_policy', 'count')
+            )
+    
+    def save_settings(self, window_geometry: bytes = None, volume: float = None,
+                      run_policy: str = None, sleep_policy: str = None) -> bool:
+        """仅保存设置"""
+        with self.lock:
+            state = self.load_state()
+            settings = state['settings']
+            
+            if window_geometry is not None:
+                settings['window_geometry'] = window_geometry
+            if volume is not None:
+                settings['volume'] = volume
+            if run_policy is not None:
+                settings['run_policy'] = run_policy
+            if sleep_policy is not None:
+                settings['sleep_policy'] = sleep_policy
+            
+            return self.save_state(
+                timers=state['timers'],
+                window_geometry=settings.get('window_geometry'),
+                volume=settings.get('volume', 0.7),
+                run_policy=settings.get('run_policy', 'exclusive'),
+                sequences=settings.get('sequences'),
+                sleep_policy=settings.get('sleep_policy', 'count')
+            )
     
     def clear_all(self) -> bool:
         """清除所有数据"""
         try:
-            if self.data_file.exists():
-                self.data_file.unlink()
+            with self.lock:
+                for name in _STATE_FILES.values():
+                    path = self.data_dir / name
+                    if path.exists():
+                        path.unlink()
             return True
         except Exception as e:
             print(f"清除数据失败: {e}")
             return False
+
+
+def _signature(path: Path) -> Optional[tuple]:
+    """文件签名（修改时间、大小、inode），文件不存在时为 None"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (path.name, stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _geometry_bytes(geometry) -> Optional[bytes]:
+    """
+    把窗口位置统一为字节
+    
+    旧版本的 state.json 中保存为字节值列表，没有位置时为空字典。
+    """
+    if not geometry:
+        return None
+    if isinstance(geometry, (bytes, bytearray, memoryview)):
+        return bytes(geometry)
+    if isinstance(geometry, list):
+        return bytes(geometry)
+    return None
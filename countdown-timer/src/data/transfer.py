@@ -0,0 +1,362 @@
+"""
+倒计时导入导出 - CSV / JSON Lines
+
+读写都以生成器流水线逐行处理，内存占用与文件大小无关:
+    read_records  ->  parse_timers  ->  batched  ->  TimerManager.insert_timers
+导入时逐行校验，无效的行被跳过并记录在 ImportReport 中，不影响其余行。
+
+界面和控制接口使用 ImportJob：读取和校验在后台线程进行，每轮事件循环只插入一批，
+导入大文件期间界面和滴答不会停顿。
+"""
+import csv
+import json
+import queue
+import re
+import threading
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from models import Timer, parse_schedule
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+# 文件后缀 -> 格式
+_SUFFIX_FORMATS = {'.csv': FORMAT_CSV, '.jsonl': FORMAT_JSONL, '.ndjson': FORMAT_JSONL}
+
+# 导出的列，顺序与 Timer 字段一致
+FIELDS = Timer.FIELDS
+_INT_FIELDS = ('duration_seconds', 'remaining_seconds', 'position', 'due_at')
+_STATUSES = ('running', 'paused', 'stopped')
+_COLOR_PATTERN = re.compile(r'^#[0-9A-Fa-f]{6}$')
+
+# 每批交给 TimerManager 的倒计时数量
+DEFAULT_BATCH_SIZE = 1000
+# ImportReport 中最多保留的错误信息条数
+MAX_REPORTED_ERRORS = 50
+# ImportJob 的读取线程最多领先插入的批数
+READ_AHEAD_BATCHES = 2
+
+
+@dataclass
+class ImportReport:
+    """导入结果"""
+    imported: int = 0
+    skipped: int = 0
+    # (行号, 错误信息)，最多保留 MAX_REPORTED_ERRORS 条
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    
+    def add_error(self, line: int, message: str):
+        """记录一行无效数据"""
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+    
+    def to_dict(self) -> dict:
+        """转换为字典（控制接口返回）"""
+        return {
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'errors': [{'line': line, 'error': message} for line, message in self.errors],
+        }
+    
+    def summary(self) -> str:
+        """界面上显示的摘要"""
+        text = f"导入 {self.imported} 个倒计时"
+        if self.skipped:
+            text += f"，跳过 {self.skipped} 行无效数据"
+            for line, message in self.errors[:5]:
+                text += f"\n  第 {line} 行: {message}"
+        return text
+
+
+def detect_format(path: Path, fmt: str = None) -> str:
+    """
+    确定文件格式，未指定时按后缀判断
+    
+    Raises:
+        ValueError: 未知的格式
+    """
+    if fmt is None:
+        fmt = _SUFFIX_FORMATS.get(Path(path).suffix.lower())
+        if fmt is None:
+            raise ValueError(f"无法从后缀判断格式: {path}（支持 .csv / .jsonl）")
+    if fmt not in FORMATS:
+        raise ValueError(f"未知的格式: {fmt}")
+    return fmt
+
+
+def read_records(path: Path, fmt: str = None) -> Iterator[Tuple[int, object]]:
+    """
+    逐行读取文件
+    
+    Yields:
+        (行号, 原始记录)；CSV 的记录是 dict，JSONL 是解析后的 JSON 值，
+        无法解析的 JSON 行以 ValueError 实例表示
+    """
+    fmt = detect_format(path, fmt)
+    # utf-8-sig 兼容 Excel 导出的带 BOM 的 CSV
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == FORMAT_CSV:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError as e:
+                    yield line_no, ValueError(f"JSON 格式错误: {e}")
+
+
+def parse_record(record: object) -> Timer:
+    """
+    校验一条记录并创建倒计时
+    
+    只有 name 和 duration_seconds 是必需的（定时倒计时可以省略时长）；
+    CSV 中的空单元格视为未提供。
+    
+    Raises:
+        ValueError: 记录无效
+    """
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("记录必须是对象")
+    
+    data = {}
+    for key in FIELDS:
+        value = record.get(key)
+        if value is None or value == '':
+            continue
+        if key in _INT_FIELDS:
+            try:
+                value = int(value)
+            except (TypeError, ValueError, OverflowError):
+                # JSON 中的 1e999 解析为无穷大，int() 抛出 OverflowError
+                raise ValueError(f"{key} 必须是整数: {value!r}") from None
+        elif not isinstance(value, str):
+            raise ValueError(f"{key} 必须是字符串: {value!r}")
+        data[key] = value
+    
+    if not data.get('name'):
+        raise ValueError("缺少 name")
+    if 'schedule' in data:
+        parse_schedule(data['schedule'])
+    duration = data.get('duration_seconds')
+    if duration is None and 'schedule' not in data:
+        raise ValueError("缺少 duration_seconds")
+    if duration is not None:
+        if duration <= 0:
+            raise ValueError("duration_seconds 必须大于 0")
+        remaining = data.setdefault('remaining_seconds', duration)
+        if not 0 <= remaining <= duration:
+            raise ValueError("remaining_seconds 必须在 0 到 duration_seconds 之间")
+    if 'color' in data and not _COLOR_PATTERN.match(data['color']):
+        raise ValueError(f"颜色格式应为 #RRGGBB: {data['color']}")
+    if data.get('status', 'stopped') not in _STATUSES:
+        raise ValueError(f"未知的状态: {data['status']}")
+    return Timer.from_dict(data)
+
+
+def parse_timers(records: Iterable[Tuple[int, object]], report: ImportReport) -> Iterator[Timer]:
+    """校验记录，跳过无效的行并记入 report"""
+    for line, record in records:
+        try:
+            yield parse_record(record)
+        except ValueError as e:
+            report.add_error(line, str(e))
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """按 size 分批"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_timers(timer_manager, path: Path, fmt: str = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE,
+                  on_progress: Callable[[int], None] = None) -> ImportReport:
+    """
+    从文件导入倒计时，追加到现有倒计时之后
+    
+    整个导入在 TimerManager.batch() 中进行，订阅者只收到一次列表变化事件。
+    
+    Args:
+        timer_manager: 倒计时管理器
+        path: CSV / JSONL 文件
+        fmt: 文件格式，为 None 时按后缀判断
+        batch_size: 每批交给 TimerManager 的数量
+        on_progress: 每批导入后调用，参数为已导入的数量
+        
+    Raises:
+        ValueError: 未知的格式
+        OSError: 无法读取文件
+    """
+    report = ImportReport()
+    timers = parse_timers(read_records(path, fmt), report)
+    with timer_manager.batch():
+        for batch in batched(timers, batch_size):
+            report.imported += len(timer_manager.insert_timers(batch))
+            if on_progress is not None:
+                on_progress(report.imported)
+    return report
+
+
+class ImportJob:
+    """
+    分批导入：后台线程读取和校验文件，调用者在 TimerManager 所在线程每次插入一批
+    
+        job = ImportJob(path)
+        job.start()
+        try:
+            while (batch := job.next_batch()) is not None:
+                job.insert(timer_manager, batch)   # 两批之间回到事件循环
+        finally:
+            report = job.finish(timer_manager)
+    
+    插入时照常发布运行状态事件；列表变化事件在 finish 时只发布一次，
+    订阅者（界面重建卡片）与 import_timers 一样只处理一次。
+    """
+    
+    def __init__(self, path: Path, fmt: str = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 on_progress: Callable[[int], None] = None):
+        """
+        Args:
+            path: CSV / JSONL 文件
+            fmt: 文件格式，为 None 时按后缀判断
+            batch_size: 每批的数量
+            on_progress: 每批插入后调用（TimerManager 所在线程），参数为已导入的数量
+            
+        Raises:
+            ValueError: 未知的格式
+        """
+        self.path = Path(path)
+        self.fmt = detect_format(path, fmt)
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.report = ImportReport()
+        # 读取线程放入的批次；None 表示读完，异常实例表示读取失败
+        self._batches: queue.Queue = queue.Queue(maxsize=READ_AHEAD_BATCHES)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._read, name="timer-import", daemon=True)
+    
+    def start(self):
+        """开始在后台线程读取"""
+        self._thread.start()
+    
+    def cancel(self):
+        """停止读取，已插入的倒计时保留（之后仍需调用 finish）"""
+        self._stopped.set()
+    
+    def _read(self):
+        """读取线程：逐批校验后放入队列，无论如何结束都放入结束标记"""
+        try:
+            timers = parse_timers(read_records(self.path, self.fmt), self.report)
+            for batch in batched(timers, self.batch_size):
+                if not self._put(batch):
+                    return
+        except (OSError, ValueError, csv.Error) as e:
+            self._put(e)
+        except Exception as e:
+            # 意外的错误也交给调用者，不能让调用者一直等待已经退出的线程
+            print(f"读取导入文件失败: {e!r}")
+            self._put(e)
+        finally:
+            self._put(None)
+    
+    def _put(self, item) -> bool:
+        """放入队列，队列满时等待插入；已取消时返回 False"""
+        while not self._stopped.is_set():
+            try:
+                self._batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def next_batch(self, timeout: float = None) -> Optional[List[Timer]]:
+        """
+        取出下一批校验过的倒计时（可以在任意线程调用）
+        
+        Args:
+            timeout: 最多等待的秒数，为 None 时等到有下一批
+            
+        Returns:
+            下一批；超时时为空列表；已读完或已取消时为 None
+            
+        Raises:
+            OSError: 无法读取文件
+            ValueError: 文件编码错误等无法继续读取的错误
+            Exception: 读取线程中的其他意外错误
+        """
+        if self._stopped.is_set():
+            return None
+        try:
+            item = self._batches.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        if item is None or isinstance(item, Exception):
+            self._stopped.set()
+        if isinstance(item, Exception):
+            raise item
+        return item
+    
+    def insert(self, timer_manager, batch: List[Timer]) -> int:
+        """把一批追加到 TimerManager（在其所在线程调用），返回插入的数量"""
+        added = len(timer_manager.insert_timers(batch, notify_changed=False))
+        self.report.imported += added
+        if self.on_progress is not None:
+            self.on_progress(self.report.imported)
+        return added
+    
+    def finish(self, timer_manager) -> ImportReport:
+        """结束导入（在 TimerManager 所在线程调用）：停止读取，有插入时发布列表变化事件"""
+        self.cancel()
+        if self.report.imported:
+            timer_manager.notify_changed()
+        return self.report
+
+
+def export_timers(timers: Iterable[Timer], path: Path, fmt: str = None) -> int:
+    """
+    把倒计时逐个写入文件
+    
+    Args:
+        timers: 倒计时（可以是生成器）
+        path: 输出文件
+        fmt: 文件格式，为 None 时按后缀判断
+        
+    Returns:
+        写出的数量
+        
+    Raises:
+        ValueError: 未知的格式
+        OSError: 无法写入文件
+    """
+    fmt = detect_format(path, fmt)
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == FORMAT_CSV:
+            # 元组形式与 FIELDS 同序，省去 DictWriter 逐列查字典
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for timer in timers:
+                writer.writerow(timer.to_tuple())
+                count += 1
+        else:
+            for timer in timers:
+                f.write(json.dumps(timer.to_dict(), ensure_ascii=False))
+                f.write('\n')
+                count += 1
+    return count
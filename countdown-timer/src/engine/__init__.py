@@ -0,0 +1,5 @@
+from .headless import HeadlessEngine
+from .sync import StateSync
+from .workspaces import Workspaces
+
+__all__ = ['HeadlessEngine', 'StateSync', 'Workspaces']
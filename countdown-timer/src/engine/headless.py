@@ -0,0 +1,402 @@
+"""
+无界面倒计时引擎 - 使用 asyncio 驱动时钟，不依赖 PyQt
+
+与 MainWindow 使用同一个 TimerManager 和 DataStore，可以在服务进程中运行
+大量倒计时，也便于快速测试计时行为。
+"""
+import asyncio
+import signal
+import sys
+import time
+from typing import Optional, Tuple
+
+from models import TIMER_COLORS
+from services.timer_manager import TimerManager
+from services.event_bus import TimerEvent, EVENT_FINISH
+from services.clock_watch import ClockWatcher
+from services.instrumentation import Instrumentation
+from services.scheduler import create_scheduler, SCHEDULER_LIST
+from data import DataStore
+from utils.profiling import PROFILER
+from .sync import apply_state
+from .workspaces import Workspaces, workspace_command
+
+
+class HeadlessEngine:
+    """无界面倒计时引擎"""
+    
+    # 空闲时按墙上时钟重新检查定时倒计时的最长间隔（秒）
+    ALARM_RECHECK_INTERVAL = 60.0
+    
+    def __init__(self, timer_manager: TimerManager = None,
+                 data_store: DataStore = None,
+                 tick_interval: float = 1.0,
+                 autosave_interval: float = 30.0,
+                 watch_interval: float = 1.0):
+        """
+        初始化引擎
+        
+        Args:
+            timer_manager: 倒计时管理器，为 None 时新建
+            data_store: 数据存储，为 None 时不做持久化
+            tick_interval: 每次滴答之间的实际秒数，测试时可调小以加速
+            autosave_interval: 有未保存修改时的自动保存间隔（秒）
+            watch_interval: 检查其他进程是否修改了状态文件的间隔（秒）
+        
+        需要处理倒计时事件时订阅 timer_manager.events。
+        """
+        self._instrumentation = Instrumentation()
+        if timer_manager is None:
+            timer_manager = TimerManager(instrumentation=self._instrumentation)
+        elif timer_manager.instrumentation is None:
+            timer_manager.instrumentation = self._instrumentation
+        else:
+            self._instrumentation = timer_manager.instrumentation
+        self._timer_manager = timer_manager
+        self._data_store = data_store
+        # 当前工作区（workspaces.sync 负责与其他进程共用状态文件时的合并与加锁保存）
+        # 和仍有倒计时在运行的后台工作区
+        self._workspaces = (Workspaces(data_store, timer_manager)
+                            if data_store is not None else None)
+        self._tick_interval = tick_interval
+        self._autosave_interval = autosave_interval
+        self._watch_interval = watch_interval
+        
+        self._dirty = False
+        self._ticks = 0
+        # 本轮滴答中是否有倒计时结束，用于测量结束到提醒的延迟
+        self._finished_in_tick = False
+        self._stop_event: Optional[asyncio.Event] = None
+        # 空闲等待期间有倒计时事件（例如通过控制接口开始了倒计时）时被设置
+        self._wakeup: Optional[asyncio.Event] = None
+        # 检测系统休眠和墙上时钟调整
+        self._clock_watch = ClockWatcher()
+        
+        # 任何事件都意味着状态有变化，需要保存
+        self._timer_manager.events.subscribe(self._on_timer_event)
+    
+    @property
+    def timer_manager(self) -> TimerManager:
+        """倒计时管理器"""
+        return self._timer_manager
+    
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """运行时测量"""
+        return self._instrumentation
+    
+    @property
+    def ticks(self) -> int:
+        """已执行的滴答次数"""
+        return self._ticks
+    
+    @property
+    def workspaces(self) -> Optional[Workspaces]:
+        """工作区，没有数据存储时为 None"""
+        return self._workspaces
+    
+    def load(self, offline: list = None):
+        """
+        从数据存储加载当前工作区，并接着运行后台工作区
+        
+        Args:
+            offline: 收集停止运行期间结束的倒计时，供运行历史补记（见 apply_state）
+        """
+        if self._workspaces is None:
+            return
+        # 停止运行期间结束的倒计时在这里一次性结束，需要保存
+        finished = apply_state(self._timer_manager, self._workspaces.sync.load(), offline)
+        self._workspaces.load_background(offline)
+        self._dirty = bool(finished)
+    
+    def switch_workspace(self, name: str) -> bool:
+        """
+        切换工作区，当前工作区仍有运行中的倒计时时转到后台
+        
+        Returns:
+            是否切换（已是当前工作区时为 False）
+            
+        Raises:
+            ValueError: 工作区不存在，或当前工作区保存失败（不切换）
+        """
+        if self._workspaces is None:
+            return False
+        state = self._workspaces.switch(name)
+        if state is None:
+            return False
+        self._dirty = bool(apply_state(self._timer_manager, state))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return True
+    
+    def save(self) -> bool:
+        """保存当前状态"""
+        if self._workspaces is None:
+            return False
+        # 先合并其他进程的修改；保留 GUI 写入的窗口位置和音量，避免无界面运行时覆盖掉
+        started = time.perf_counter()
+        saved = self._workspaces.sync.save()
+        self._workspaces.save_background()
+        self._instrumentation.record('persistence.save', time.perf_counter() - started)
+        if saved:
+            self._dirty = False
+        return saved
+    
+    def advance(self, ticks: int = 1):
+        """
+        同步推进若干次滴答
+        
+        不等待真实时间，用于测试或补偿错过的滴答。错过多次滴答时先一次性快进，
+        只逐个处理最后一次滴答。
+        """
+        if ticks <= 0:
+            return
+        if ticks > 1:
+            self._timer_manager.fast_forward(ticks - 1)
+        self._timer_manager.tick()
+        if self._workspaces is not None:
+            self._workspaces.advance(ticks)
+        self._ticks += ticks
+        # 时间轮调度不发布 tick 事件，运行中的倒计时剩余时间变了也需要保存
+        if (not self._timer_manager.scheduler.publishes_ticks
+                and self._timer_manager.get_running_count()):
+            self._dirty = True
+    
+    async def run(self, duration: float = None):
+        """
+        运行时钟直到 stop() 被调用
+        
+        Args:
+            duration: 最长运行秒数，为 None 时一直运行
+        """
+        self._stop_event = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._clock_watch.reset()
+        tasks = [asyncio.ensure_future(self._clock_loop()),
+                 asyncio.ensure_future(self._autosave_loop())]
+        if self._workspaces is not None:
+            tasks.append(asyncio.ensure_future(self._watch_loop()))
+        try:
+            if duration is None:
+                await self._stop_event.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), duration)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._dirty:
+                self.save()
+    
+    def stop(self):
+        """请求停止运行"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+    
+    async def _clock_loop(self):
+        """
+        时钟循环
+        
+        按单调时钟计算每次滴答的目标时间，而不是简单 sleep 固定间隔，
+        避免误差累积；如果事件循环被阻塞错过了滴答，会一次性补上。
+        单调时钟在系统休眠期间不走，每次醒来先按 ClockWatcher 的检测结果校正。
+        没有运行中的倒计时时不滴答，见 _wait_idle。
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self._tick_interval
+        while True:
+            if not self._running_count():
+                await self._wait_idle()
+                next_tick = loop.time() + self._tick_interval
+                continue
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            self._check_clock()
+            now = loop.time()
+            self._instrumentation.record_wakeup(next_tick, now)
+            due = int((now - next_tick) // self._tick_interval) + 1
+            # 换算到 perf_counter 时钟，供结束到提醒的延迟测量使用
+            scheduled_at = time.perf_counter() - (now - next_tick)
+            self._finished_in_tick = False
+            self.advance(due)
+            if self._finished_in_tick:
+                # 此时所有同步订阅者都已处理完 finish 事件
+                self._instrumentation.record('finish_to_alert',
+                                             time.perf_counter() - scheduled_at)
+            PROFILER.poll()
+            next_tick += due * self._tick_interval
+    
+    async def _wait_idle(self):
+        """
+        空闲等待，直到下一个定时倒计时触发或有倒计时事件
+        
+        asyncio 的睡眠按单调时钟计时，不跟随墙上时钟的调整，系统休眠期间也不计时，
+        因此最多睡 ALARM_RECHECK_INTERVAL 秒就按墙上时钟重新检查一次。
+        正在运行的 cProfile 剖析到期时也醒来结束剖析。
+        """
+        self._wakeup.clear()
+        timeout = self.ALARM_RECHECK_INTERVAL
+        profile_due = PROFILER.poll()
+        if profile_due is not None:
+            timeout = min(timeout, profile_due)
+        due = self._timer_manager.next_alarm_due()
+        if self._workspaces is not None:
+            dues = [d for d in (due, self._workspaces.next_alarm_due()) if d is not None]
+            due = min(dues) if dues else None
+        if due is not None:
+            timeout = min(timeout, max(0.0, due - self._timer_manager.wall_clock()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        PROFILER.poll()
+        if not self._check_clock():
+            self._timer_manager.check_alarms()
+            if self._workspaces is not None:
+                self._workspaces.check_alarms()
+    
+    def _running_count(self) -> int:
+        """当前工作区和后台工作区中运行中的倒计时数量"""
+        count = self._timer_manager.get_running_count()
+        if self._workspaces is not None:
+            count += self._workspaces.running_count()
+        return count
+    
+    def _check_clock(self) -> bool:
+        """检测到系统休眠或墙上时钟调整时一次性校正所有倒计时，返回是否校正"""
+        gap = self._clock_watch.check()
+        if gap is None:
+            return False
+        self._timer_manager.reconcile(gap)
+        if self._workspaces is not None:
+            self._workspaces.reconcile(gap)
+        self._dirty = True
+        return True
+    
+    async def _autosave_loop(self):
+        """有修改时定期保存"""
+        while True:
+            await asyncio.sleep(self._autosave_interval)
+            if self._dirty:
+                self.save()
+    
+    async def _watch_loop(self):
+        """
+        定期检查状态文件是否被其他进程修改，有修改时增量合并
+        
+        只比较文件签名，开销是每次一个 stat；标准库没有跨平台的文件变化通知，
+        这里用轮询代替（界面使用 QFileSystemWatcher）。
+        """
+        while True:
+            await asyncio.sleep(self._watch_interval)
+            self.sync()
+    
+    def sync(self) -> bool:
+        """
+        合并其他进程对状态文件的修改
+        
+        合并进来的修改已在文件中，不因此标记为需要保存，避免两个进程来回写入。
+        
+        Returns:
+            是否合并了修改
+        """
+        if self._workspaces is None:
+            return False
+        dirty = self._dirty
+        try:
+            merged = self._workspaces.sync.poll()
+            merged = self._workspaces.poll() or merged
+        except TimeoutError as e:
+            print(f"合并状态失败: {e}")
+            return False
+        self._dirty = dirty
+        return merged
+    
+    def _on_timer_event(self, event: TimerEvent):
+        """倒计时事件"""
+        self._dirty = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if event.type == EVENT_FINISH:
+            self._finished_in_tick = True
+
+
+def run_headless(data_dir: str = None, control: bool = True,
+                 add: Tuple[str, int] = None, start: bool = False,
+                 scheduler: str = SCHEDULER_LIST, state_format: str = None) -> int:
+    """
+    以无界面模式运行，直到收到 SIGINT/SIGTERM
+    
+    Args:
+        data_dir: 自定义数据目录
+        control: 是否开启本地控制接口
+        add: 启动时添加的倒计时 (名称, 秒数)
+        start: 是否立即开始 add 指定的倒计时
+        scheduler: 调度器 list / wheel，运行大量倒计时时使用 wheel
+        state_format: 状态文件格式 json / binary，为 None 时按环境变量或默认值
+        
+    Returns:
+        进程退出码
+    """
+    from ipc import ControlServer, default_socket_path
+    from services.history import HistoryLog
+    
+    data_store = DataStore(data_dir=data_dir, state_format=state_format)
+    server = None
+    
+    def on_finished(event: TimerEvent):
+        print(f"[{time.strftime('%H:%M:%S')}] 倒计时结束: {event.timer.name}", flush=True)
+    
+    engine = HeadlessEngine(TimerManager(scheduler=create_scheduler(scheduler)),
+                            data_store=data_store)
+    engine.timer_manager.events.subscribe(on_finished, events=(EVENT_FINISH,))
+    offline = []
+    engine.load(offline)
+    try:
+        history = HistoryLog(data_store.data_dir)
+        history.attach(engine.timer_manager)
+        history.record_offline(offline)
+    except Exception as e:
+        print(f"打开运行历史失败: {e}")
+        history = None
+    if add:
+        timer = engine.timer_manager.add_timer(add[0], add[1], TIMER_COLORS[0])
+        if start:
+            engine.timer_manager.start_timer(timer.id)
+        engine.save()
+    
+    async def main():
+        nonlocal server
+        loop = asyncio.get_running_loop()
+        if sys.platform != 'win32':
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, engine.stop)
+        if control:
+            # 与引擎共用同一个事件循环，命令直接在本线程执行
+            candidate = ControlServer(engine.timer_manager,
+                                      default_socket_path(data_store.data_dir))
+            candidate.register_command('stats', lambda args: engine.instrumentation.snapshot())
+            if history is not None:
+                candidate.register_command('history', lambda args: history.query(**args))
+            candidate.register_command(
+                'workspace',
+                lambda args: workspace_command(engine.workspaces, engine.switch_workspace, args),
+                mutating=True)
+            if await candidate.start():
+                server = candidate
+        try:
+            await engine.run()
+        finally:
+            if server is not None:
+                await server.close()
+    
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        engine.save()
+    finally:
+        if history is not None:
+            history.close()
+    return 0
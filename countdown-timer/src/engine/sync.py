@@ -0,0 +1,238 @@
+"""
+多进程同步 - 把其他进程写入状态文件的修改增量合并到 TimerManager
+
+同一数据目录可能同时有多个写入者：界面、无界面引擎、文件同步工具。StateSync 记录
+上次与文件同步时每个倒计时的内容（基准），发现文件被改过后做三方合并:
+
+    文件中相对基准有变化的    采用文件中的内容（其他进程的修改）
+    文件中没有变化的          保留本进程的内容（包括本进程尚未保存的修改）
+    基准中有、文件中没有的    其他进程删除了，本进程也删除
+    文件中有、基准中没有的    其他进程新增的，插入到文件中的位置
+
+只有变化的倒计时经 TimerManager.merge_timers 原地更新，不重新加载整个列表。
+序列和运行策略、休眠策略在文件中有变化时整体采用文件中的。
+
+保存在文件锁内先合并尚未合并的修改再写入，两个进程交替保存不会丢失对方的修改。
+"""
+from typing import Dict, List, Optional
+
+from models import Timer
+from services.run_policy import RunPolicy
+from services.timer_manager import TimerManager
+from data import DataStore
+
+
+def _content(timer: Timer) -> tuple:
+    """
+    比较用的内容：(除剩余时间和到期时间外的字段, 结束时间)
+    
+    运行中的普通倒计时的剩余时间每次保存都不同，只比较保存时推算的结束时间。
+    """
+    values = timer.to_dict()
+    deadline = values.pop('due_at')
+    if timer.is_running() and not timer.is_scheduled():
+        values.pop('remaining_seconds')
+    return tuple(values.items()), deadline
+
+
+def apply_state(timer_manager: TimerManager, state: dict,
+                offline: list = None) -> List[Timer]:
+    """
+    把读取的状态加载到 TimerManager：运行策略、休眠策略、倒计时、序列，
+    最后补上程序未运行期间的时间（期间结束的倒计时发布 finish 事件）
+    
+    Args:
+        timer_manager: 倒计时管理器
+        state: DataStore.load_state 读取的状态
+        offline: 不为 None 时，为期间结束的每个倒计时追加 (倒计时, 保存时的时间戳,
+                 结束的时间戳)，供运行历史补记（HistoryLog.record_offline）；
+                 无法推算的（旧版本保存的状态、序列中接续的步骤）两个时间都为现在
+    
+    Returns:
+        程序未运行期间结束的倒计时
+    """
+    timers = state.get('timers', [])
+    # load_timers 会清掉保存的结束时间，先记下运行中倒计时保存时剩余的一段
+    spans = {}
+    if offline is not None:
+        spans = {timer.id: (timer.due_at - timer.remaining_seconds, timer.due_at)
+                 for timer in timers
+                 if timer.due_at and timer.is_running() and not timer.is_scheduled()}
+    settings = state.get('settings', {})
+    try:
+        timer_manager.set_run_policy(RunPolicy.parse(settings.get('run_policy')))
+    except ValueError as e:
+        print(f"加载运行策略失败: {e}")
+    try:
+        timer_manager.set_sleep_policy(settings.get('sleep_policy', 'count'))
+    except ValueError as e:
+        print(f"加载休眠策略失败: {e}")
+    timer_manager.load_timers(timers)
+    timer_manager.load_sequences(settings.get('sequences', []))
+    finished = timer_manager.catch_up()
+    if offline is not None:
+        now = timer_manager.wall_clock()
+        for timer in finished:
+            started, ended = spans.pop(timer.id, (now, now))
+            ended = min(ended, now)
+            offline.append((timer, min(started, ended), ended))
+    return finished
+
+
+def _changed(base: tuple, current: tuple) -> bool:
+    """内容是否变化；两次保存推算的结束时间相差不到一秒（取整误差）视为相同"""
+    if base[0] != current[0]:
+        return True
+    return abs(base[1] - current[1]) > 1
+
+
+class StateSync:
+    """状态文件与 TimerManager 之间的同步"""
+    
+    def __init__(self, data_store: DataStore, timer_manager: TimerManager):
+        """
+        Args:
+            data_store: 数据存储
+            timer_manager: 倒计时管理器
+        """
+        self._data_store = data_store
+        self._timer_manager = timer_manager
+        # 倒计时 ID -> 上次与文件同步时的内容
+        self._base: Dict[str, tuple] = {}
+        # 上次同步时文件中的序列和策略
+        self._base_settings: dict = {}
+        # 最近一次从文件读取的设置（窗口位置、音量由引擎自行取用）
+        self.settings: dict = {}
+    
+    @property
+    def data_store(self) -> DataStore:
+        """数据存储"""
+        return self._data_store
+    
+    @property
+    def timer_manager(self) -> TimerManager:
+        """倒计时管理器"""
+        return self._timer_manager
+    
+    def load(self) -> dict:
+        """
+        读取状态文件并记为同步基准（在 TimerManager.load_timers 之前调用，
+        加载会修改倒计时的剩余时间）
+        
+        Returns:
+            DataStore.load_state 的结果
+        """
+        state = self._data_store.load_state()
+        self._remember(state['timers'], state['settings'])
+        return state
+    
+    def poll(self) -> bool:
+        """
+        文件被其他进程改过时合并修改（只检查文件签名，可以频繁调用）
+        
+        Returns:
+            是否合并了修改
+        """
+        if not self._data_store.has_external_changes():
+            return False
+        with self._data_store.lock:
+            return self._merge_pending()
+    
+    def save(self, window_geometry: bytes = None, volume: float = None) -> bool:
+        """
+        在文件锁内先合并其他进程的修改，再保存 TimerManager 的当前状态
+        
+        Args:
+            window_geometry: 窗口位置，为 None 时保留文件中的（无界面运行时不覆盖界面的设置）
+            volume: 音量，为 None 时保留文件中的
+            
+        Returns:
+            保存是否成功
+        """
+        store = self._data_store
+        manager = self._timer_manager
+        try:
+            with store.lock:
+                self._merge_pending()
+                if window_geometry is None:
+                    window_geometry = self.settings.get('window_geometry')
+                if volume is None:
+                    volume = self.settings.get('volume', 0.7)
+                timers = manager.timers_with_deadlines()
+                settings = {
+                    'run_policy': str(manager.run_policy),
+                    'sequences': [sequence.to_dict() for sequence in manager.sequences],
+                    'sleep_policy': manager.sleep_policy,
+                }
+                saved = store.save_state(timers=timers, window_geometry=window_geometry,
+                                         volume=volume, **settings)
+                if saved:
+                    self._base = {timer.id: _content(timer) for timer in timers}
+                    self._base_settings = _synced_settings(settings)
+                return saved
+        except TimeoutError as e:
+            print(f"保存状态失败: {e}")
+            return False
+    
+    def _merge_pending(self) -> bool:
+        """文件在上次同步后有变化时合并（调用者持有文件锁）"""
+        store = self._data_store
+        if not store.has_external_changes() and store.read_generation() == store.generation:
+            return False
+        state = store.load_state()
+        if 'generation' not in state:
+            # 文件被删除或正被不加锁的工具写入（无法解析），等下一次变化
+            return False
+        self.merge(state['timers'], state['settings'])
+        return True
+    
+    def merge(self, timers, settings: dict):
+        """把文件中的状态与基准比较，增量合并到 TimerManager"""
+        manager = self._timer_manager
+        current = {timer.id: _content(timer) for timer in timers}
+        incoming = []
+        for timer in timers:
+            base = self._base.get(timer.id)
+            if base is None:
+                incoming.append(timer)
+            elif _changed(base, current[timer.id]):
+                # 其他进程修改过的倒计时即使本进程已删除也恢复（不丢弃那次修改）；
+                # 本进程已删除、其他进程没有修改的不恢复，下次保存时删除
+                incoming.append(timer)
+        removed = [timer_id for timer_id in self._base if timer_id not in current]
+        if incoming or removed:
+            manager.merge_timers(incoming, removed)
+        self._merge_settings(settings)
+        self._base = current
+        self.settings = settings
+    
+    def _merge_settings(self, settings: dict):
+        """序列和策略在文件中有变化时采用文件中的"""
+        manager = self._timer_manager
+        base = self._base_settings
+        try:
+            if settings.get('run_policy') != base.get('run_policy'):
+                manager.set_run_policy(RunPolicy.parse(settings.get('run_policy')))
+            if settings.get('sleep_policy') != base.get('sleep_policy'):
+                manager.set_sleep_policy(settings.get('sleep_policy', 'count'))
+        except ValueError as e:
+            print(f"合并设置失败: {e}")
+        if (settings.get('sequences') or []) != (base.get('sequences') or []):
+            manager.load_sequences(settings.get('sequences') or [])
+        self._base_settings = _synced_settings(settings)
+    
+    def _remember(self, timers, settings: dict):
+        """记为同步基准"""
+        self._base = {timer.id: _content(timer) for timer in timers}
+        self._base_settings = _synced_settings(settings)
+        self.settings = settings
+
+
+def _synced_settings(settings: Optional[dict]) -> dict:
+    """参与合并的设置"""
+    settings = settings or {}
+    return {
+        'run_policy': settings.get('run_policy'),
+        'sleep_policy': settings.get('sleep_policy'),
+        'sequences': settings.get('sequences') or [],
+    }
@@ -0,0 +1,333 @@
+"""
+工作区 - 按项目分开保存的多组倒计时
+
+每个工作区是一个独立的状态文件：默认工作区就是数据目录下原来的状态文件，其余的
+保存在 workspaces/<名称>/ 下（各有自己的文件锁和保存代数）。数据目录下的
+workspaces.json 记录当前工作区和仍有倒计时在运行的后台工作区。
+
+界面和引擎只持有一个 TimerManager，始终对应当前工作区；只有当前工作区的倒计时被
+创建为卡片。切换时先保存当前工作区，再把目标工作区的文件加载进同一个 TimerManager，
+订阅者（界面、历史记录、控制接口）不需要重新连接。
+
+切走的工作区还有运行中的倒计时或已开启的定时倒计时时，由一个后台 TimerManager
+从刚保存的文件接着运行（按保存的结束时间恢复，不丢秒）。后台工作区照常滴答、结束、
+接续序列，但没有界面；它们的运行状态事件转发到当前 TimerManager 的事件总线，提示音、
+通知和历史记录照常处理。后台的倒计时都停下后保存并释放。其余的工作区在切换到之前
+不会被读取。
+"""
+import json
+import os
+import shutil
+from typing import Callable, Dict, List, Optional
+
+from services.timer_manager import TimerManager
+from services.event_bus import TimerEvent, LIFECYCLE_EVENTS
+from services.clock_watch import ClockGap
+from services.scheduler import Scheduler
+from data import DataStore
+from .sync import StateSync, apply_state
+
+DEFAULT_WORKSPACE = "默认"
+
+_INDEX_FILE = 'workspaces.json'
+_WORKSPACE_DIR = 'workspaces'
+# 工作区名称用作目录名，不能包含的字符
+_INVALID_CHARS = set('/\\:*?"<>|')
+_MAX_NAME_LENGTH = 64
+
+
+def validate_name(name: str) -> str:
+    """
+    校验工作区名称，返回去掉首尾空白的名称
+    
+    Raises:
+        ValueError: 名称为空、过长或包含不能用于目录名的字符
+    """
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("工作区名称不能为空")
+    if len(name) > _MAX_NAME_LENGTH:
+        raise ValueError(f"工作区名称不能超过 {_MAX_NAME_LENGTH} 个字符")
+    if name in ('.', '..') or _INVALID_CHARS & set(name):
+        raise ValueError(f"工作区名称不能包含 {' '.join(sorted(_INVALID_CHARS))}: {name}")
+    return name
+
+
+def workspace_command(workspaces: 'Workspaces', switch: Callable[[str], bool], args: dict) -> dict:
+    """
+    控制接口的 workspace 命令
+    
+    Args:
+        workspaces: 工作区
+        switch: 切换工作区并加载到引擎或界面的函数
+        args: action 为 list / create / switch / remove，后三者需要 name
+        
+    Raises:
+        ValueError: 操作未知、缺少名称或操作失败
+    """
+    action = args.get('action', 'list')
+    name = args.get('name')
+    if action != 'list' and not name:
+        raise ValueError("需要工作区名称")
+    if action == 'create':
+        workspaces.create(name)
+    elif action == 'switch':
+        switch(name)
+    elif action == 'remove':
+        if not workspaces.remove(name):
+            raise ValueError(f"不能删除工作区: {name}（默认工作区和当前工作区不能删除）")
+    elif action != 'list':
+        raise ValueError(f"未知的工作区操作: {action}")
+    return {
+        'active': workspaces.active,
+        'workspaces': workspaces.names(),
+        'background': workspaces.background,
+    }
+
+
+class Workspaces:
+    """命名工作区"""
+    
+    def __init__(self, data_store: DataStore, timer_manager: TimerManager,
+                 scheduler_factory: Callable[[], Scheduler] = None):
+        """
+        Args:
+            data_store: 默认工作区（数据目录下）的数据存储，其余工作区使用相同的格式
+            timer_manager: 当前工作区的倒计时管理器
+            scheduler_factory: 后台工作区的调度器，为 None 时与 timer_manager 相同
+        """
+        self._root = data_store
+        self._timer_manager = timer_manager
+        self._scheduler_factory = scheduler_factory or type(timer_manager.scheduler)
+        self._stores: Dict[str, DataStore] = {DEFAULT_WORKSPACE: data_store}
+        index = self._read_index()
+        active = index.get('active', DEFAULT_WORKSPACE)
+        if active not in self.names():
+            active = DEFAULT_WORKSPACE
+        self._active = active
+        # 当前工作区的同步（随切换替换）
+        self.sync = StateSync(self.store(active), timer_manager)
+        # 名称 -> 后台工作区的同步（其 timer_manager 即后台的倒计时管理器）
+        self._background: Dict[str, StateSync] = {}
+        # 启动时尚未加载的后台工作区
+        self._pending = [name for name in index.get('background', [])
+                         if name != active and name in self.names()]
+    
+    @property
+    def active(self) -> str:
+        """当前工作区的名称"""
+        return self._active
+    
+    @property
+    def background(self) -> List[str]:
+        """有倒计时在后台运行的工作区"""
+        return sorted(self._background)
+    
+    def names(self) -> List[str]:
+        """所有工作区的名称（默认工作区在前）"""
+        directory = self._root.data_dir / _WORKSPACE_DIR
+        names = []
+        if directory.is_dir():
+            names = sorted(path.name for path in directory.iterdir() if path.is_dir())
+        return [DEFAULT_WORKSPACE] + [name for name in names if name != DEFAULT_WORKSPACE]
+    
+    def store(self, name: str) -> DataStore:
+        """工作区的数据存储（首次使用时创建）"""
+        store = self._stores.get(name)
+        if store is None:
+            store = DataStore(data_dir=self._root.data_dir / _WORKSPACE_DIR / name,
+                              state_format=self._root.state_format)
+            self._stores[name] = store
+        return store
+    
+    def create(self, name: str) -> str:
+        """
+        新建空的工作区
+        
+        Returns:
+            校验后的名称
+            
+        Raises:
+            ValueError: 名称无效或已存在
+        """
+        name = validate_name(name)
+        if name in self.names():
+            raise ValueError(f"工作区已存在: {name}")
+        self.store(name)
+        return name
+    
+    def remove(self, name: str) -> bool:
+        """
+        删除工作区及其中的倒计时（默认工作区和当前工作区不能删除）
+        
+        Returns:
+            是否删除
+        """
+        if name in (DEFAULT_WORKSPACE, self._active) or name not in self.names():
+            return False
+        if self._background.pop(name, None) is not None:
+            self._write_index()
+        store = self.store(name)
+        del self._stores[name]
+        try:
+            # 锁文件就在要删除的目录中：持锁删除其余内容，释放锁之后再删除锁文件和目录
+            with store.lock:
+                for path in store.data_dir.iterdir():
+                    if path == store.lock.path:
+                        continue
+                    if path.is_dir():
+                        shutil.rmtree(path)
+                    else:
+                        path.unlink()
+            store.lock.path.unlink()
+            store.data_dir.rmdir()
+            return True
+        except OSError as e:
+            print(f"删除工作区失败: {e}")
+            return False
+    
+    def switch(self, name: str, window_geometry: bytes = None,
+               volume: float = None) -> Optional[dict]:
+        """
+        切换工作区：保存当前工作区，读取目标工作区
+        
+        返回的状态由调用者加载（apply_state）并刷新界面；当前工作区仍有运行中的
+        倒计时时转到后台继续运行。
+        
+        Args:
+            name: 目标工作区
+            window_geometry / volume: 保存当前工作区时写入的设置
+            
+        Returns:
+            目标工作区的状态（DataStore.load_state 的结果）；已是当前工作区时为 None
+            
+        Raises:
+            ValueError: 工作区不存在，或当前工作区（目标工作区在后台运行时也包括它）
+                        保存失败；此时不做任何切换，未保存的修改仍在内存中
+        """
+        if name not in self.names():
+            raise ValueError(f"工作区不存在: {name}")
+        if name == self._active:
+            return None
+        # 先完成所有保存再改动任何状态：后台运行和加载都从刚保存的文件读取
+        if not self.sync.save(window_geometry=window_geometry, volume=volume):
+            raise ValueError(f"保存工作区失败，未切换: {self._active}")
+        background = self._background.get(name)
+        if background is not None and not background.save():
+            raise ValueError(f"保存工作区失败，未切换: {name}")
+        manager = self._timer_manager
+        if manager.get_running_count() or manager.next_alarm_due() is not None:
+            self._start_background(self._active)
+        self._background.pop(name, None)
+        self._active = name
+        self.sync = StateSync(self.store(name), manager)
+        self._write_index()
+        return self.sync.load()
+    
+    def load_background(self, offline: list = None):
+        """
+        启动时接着运行上次仍在后台运行的工作区（在加载当前工作区之后调用）
+        
+        Args:
+            offline: 收集程序未运行期间结束的倒计时，见 apply_state
+        """
+        pending, self._pending = self._pending, []
+        for name in pending:
+            self._start_background(name, offline)
+        self._release_idle()
+        self._write_index()
+    
+    def _start_background(self, name: str, offline: list = None):
+        """从保存的文件加载工作区，在后台运行"""
+        # 不共用测量，当前工作区的滴答耗时不混入后台工作区的
+        manager = TimerManager(scheduler=self._scheduler_factory())
+        manager.wall_clock = self._timer_manager.wall_clock
+        manager.events.subscribe(self._forward_event, events=LIFECYCLE_EVENTS)
+        sync = StateSync(self.store(name), manager)
+        apply_state(manager, sync.load(), offline)
+        self._background[name] = sync
+    
+    def _forward_event(self, event: TimerEvent):
+        """后台工作区的运行状态事件转发到当前的事件总线（提醒、历史记录）"""
+        self._timer_manager.events.publish(event.type, event.timer)
+    
+    def _release_idle(self) -> bool:
+        """保存并释放倒计时都已停下的后台工作区，返回是否有释放"""
+        idle = [name for name, sync in self._background.items()
+                if not sync.timer_manager.get_running_count()
+                and sync.timer_manager.next_alarm_due() is None]
+        for name in idle:
+            self._background.pop(name).save()
+        return bool(idle)
+    
+    def advance(self, ticks: int = 1):
+        """后台工作区推进若干次滴答（与当前工作区的滴答同步调用）"""
+        if not self._background:
+            return
+        for sync in self._background.values():
+            if ticks > 1:
+                sync.timer_manager.fast_forward(ticks - 1)
+            sync.timer_manager.tick()
+        if self._release_idle():
+            self._write_index()
+    
+    def running_count(self) -> int:
+        """后台工作区中运行中的倒计时数量"""
+        return sum(sync.timer_manager.get_running_count() for sync in self._background.values())
+    
+    def next_alarm_due(self) -> Optional[int]:
+        """后台工作区中最早的定时倒计时触发时间"""
+        dues = [sync.timer_manager.next_alarm_due() for sync in self._background.values()]
+        dues = [due for due in dues if due is not None]
+        return min(dues) if dues else None
+    
+    def check_alarms(self):
+        """触发后台工作区中已到期的定时倒计时"""
+        for sync in self._background.values():
+            sync.timer_manager.check_alarms()
+        if self._release_idle():
+            self._write_index()
+    
+    def reconcile(self, gap: ClockGap):
+        """系统休眠或时钟调整后校正后台工作区"""
+        for sync in self._background.values():
+            sync.timer_manager.reconcile(gap)
+        if self._release_idle():
+            self._write_index()
+    
+    def poll(self) -> bool:
+        """合并其他进程对后台工作区文件的修改，返回是否有合并"""
+        merged = False
+        for sync in self._background.values():
+            merged = sync.poll() or merged
+        return merged
+    
+    def save_background(self):
+        """保存所有后台工作区"""
+        for sync in self._background.values():
+            sync.save()
+    
+    def _read_index(self) -> dict:
+        """读取 workspaces.json，不存在或损坏时为空"""
+        path = self._root.data_dir / _INDEX_FILE
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError) as e:
+            print(f"读取工作区列表失败: {e}")
+            return {}
+    
+    def _write_index(self):
+        """写入当前工作区和后台工作区（先写临时文件再替换）"""
+        path = self._root.data_dir / _INDEX_FILE
+        index = {'active': self._active, 'background': self.background}
+        try:
+            tmp_file = path.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, path)
+        except OSError as e:
+            print(f"保存工作区列表失败: {e}")
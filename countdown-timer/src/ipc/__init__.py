@@ -0,0 +1,32 @@
+"""
+本地控制接口
+
+子模块按需导入：第二个实例转发参数时只需要客户端，不加载 asyncio 服务端。
+"""
+import importlib
+
+_LAZY_ATTRS = {
+    'CommandError': '.protocol',
+    'ProtocolError': '.protocol',
+    'default_socket_path': '.protocol',
+    'ControlServer': '.server',
+    'ControlServerThread': '.server',
+    'ControlClient': '.client',
+    'InstanceLock': '.instance',
+    'forward_to_running_instance': '.instance',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,123 @@
+"""
+本地控制客户端 - 同步阻塞实现，便于在脚本中使用
+"""
+import itertools
+import socket
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+from .protocol import CommandError, encode, decode
+
+
+class ControlClient:
+    """本地控制客户端"""
+    
+    def __init__(self, socket_path: Path, timeout: float = 5.0):
+        """
+        初始化客户端
+        
+        Args:
+            socket_path: 控制套接字路径
+            timeout: 连接与读取超时（秒），订阅事件时为 None 表示一直等待
+        """
+        self.socket_path = Path(socket_path)
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._ids = itertools.count(1)
+    
+    def connect(self) -> 'ControlClient':
+        """连接服务端"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(str(self.socket_path))
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        return self
+    
+    def close(self):
+        """关闭连接"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+    
+    def __enter__(self) -> 'ControlClient':
+        return self.connect()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _read_message(self) -> dict:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("服务端关闭了连接")
+        return decode(line)
+    
+    def _read_response(self) -> dict:
+        """读取下一条响应，跳过穿插的事件"""
+        while True:
+            message = self._read_message()
+            if 'event' not in message:
+                return message
+    
+    def call(self, cmd: str, **args):
+        """
+        发送一条命令并等待结果
+        
+        Raises:
+            CommandError: 服务端返回错误
+        """
+        return self.pipeline([(cmd, args)])[0]
+    
+    def pipeline(self, requests: Iterable[Tuple[str, dict]],
+                 raise_on_error: bool = True) -> List:
+        """
+        一次发送多条命令，再按顺序读取全部结果
+        
+        Args:
+            requests: (命令, 参数) 序列
+            raise_on_error: 任一命令失败时是否抛出 CommandError；
+                为 False 时失败项在结果列表中以 CommandError 实例表示
+        """
+        payload = []
+        for cmd, args in requests:
+            payload.append(encode({'id': next(self._ids), 'cmd': cmd, 'args': args}))
+        self._sock.sendall(b''.join(payload))
+        
+        results = []
+        for _ in payload:
+            response = self._read_response()
+            if response.get('ok'):
+                results.append(response.get('result'))
+            elif raise_on_error:
+                raise CommandError(response.get('error'))
+            else:
+                results.append(CommandError(response.get('error')))
+        return results
+    
+    def subscribe(self, events: List[str] = None, timer_ids: List[str] = None) -> Iterator[dict]:
+        """
+        订阅事件并逐条返回
+        
+        Args:
+            events: 事件类型列表，为 None 时订阅全部
+            timer_ids: 只接收这些倒计时的事件，为 None 时不过滤
+        """
+        args = {}
+        if events:
+            args['events'] = list(events)
+        if timer_ids:
+            args['timer_ids'] = list(timer_ids)
+        self._sock.sendall(encode({'id': next(self._ids), 'cmd': 'subscribe', 'args': args}))
+        response = self._read_response()
+        if not response.get('ok'):
+            raise CommandError(response.get('error'))
+        
+        self._sock.settimeout(None)
+        while True:
+            message = self._read_message()
+            if 'event' in message:
+                yield message
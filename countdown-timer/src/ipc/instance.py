@@ -0,0 +1,100 @@
+"""
+单实例控制 - 进程锁与向已运行实例转发命令
+
+同一数据目录只允许一个进程（GUI 或无界面引擎）读写 state.json。后启动的进程
+拿不到锁时，把命令行参数转换为控制命令发给已运行的实例后立即退出，
+不需要启动第二个 Qt 应用。
+"""
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from data.locking import lock_fd, unlock_fd
+from .client import ControlClient
+
+LOCK_NAME = "instance.lock"
+
+
+class InstanceLock:
+    """基于文件锁的单实例锁，进程退出时由操作系统自动释放"""
+    
+    def __init__(self, data_dir: Path):
+        """
+        初始化实例锁
+        
+        Args:
+            data_dir: 数据目录，锁文件位于其中
+        """
+        self.path = Path(data_dir) / LOCK_NAME
+        self._file = None
+    
+    @property
+    def acquired(self) -> bool:
+        """是否持有锁"""
+        return self._file is not None
+    
+    def acquire(self) -> bool:
+        """
+        尝试获取锁（不阻塞）
+        
+        Returns:
+            是否获取成功；已有其他进程持有时返回 False
+        """
+        if self._file is not None:
+            return True
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path, 'a+')
+        try:
+            lock_fd(lock_file.fileno())
+        except OSError:
+            lock_file.close()
+            return False
+        
+        # 写入进程号便于排查，内容本身不参与加锁
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+    
+    def release(self):
+        """释放锁"""
+        if self._file is None:
+            return
+        try:
+            unlock_fd(self._file.fileno())
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+
+
+def forward_to_running_instance(socket_path: Path,
+                                requests: List[Tuple[str, dict]],
+                                wait: float = 3.0) -> Optional[list]:
+    """
+    把命令转发给已运行的实例
+    
+    已运行的实例可能刚拿到锁、控制接口还没启动，因此在 wait 秒内重试连接。
+    
+    Args:
+        socket_path: 控制套接字路径
+        requests: (命令, 参数) 列表
+        wait: 等待控制接口就绪的最长时间（秒）
+        
+    Returns:
+        各命令的结果（失败项为 CommandError 实例）；无法连接时返回 None
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            with ControlClient(socket_path, timeout=wait) as client:
+                return client.pipeline(requests, raise_on_error=False)
+        except (OSError, AttributeError):
+            # AttributeError: 平台没有 AF_UNIX
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
@@ -0,0 +1,45 @@
+"""
+本地控制协议 - 基于 Unix 套接字的按行分隔 JSON
+
+请求:   {"id": 1, "cmd": "start", "args": {"id": "ab12cd34"}}
+响应:   {"id": 1, "ok": true, "result": ...}
+        {"id": 1, "ok": false, "error": "..."}
+事件:   {"event": "tick", "timer": {...}}     # 倒计时状态更新（每秒滴答或开始/暂停等操作）
+        {"event": "finish", "timer": {...}}   # 倒计时结束
+        {"event": "dropped", "count": 12}   # 订阅者消费过慢时被丢弃的事件数
+
+同一连接上的请求可以连续发送（流水线），响应按请求顺序返回。
+"""
+import json
+from pathlib import Path
+
+SOCKET_NAME = "control.sock"
+
+
+class ProtocolError(Exception):
+    """报文格式错误"""
+
+
+class CommandError(Exception):
+    """命令执行失败"""
+
+
+def default_socket_path(data_dir: Path) -> Path:
+    """获取数据目录下的控制套接字路径"""
+    return Path(data_dir) / SOCKET_NAME
+
+
+def encode(message: dict) -> bytes:
+    """编码一条消息（含结尾换行）"""
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def decode(line: bytes) -> dict:
+    """解码一条消息"""
+    try:
+        message = json.loads(line)
+    except ValueError as e:
+        raise ProtocolError(f"无效的 JSON: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("消息必须是 JSON 对象")
+    return message
@@ -0,0 +1,669 @@
+"""
+本地控制服务 - 通过 Unix 套接字对外提供 TimerManager 的增删改查和事件订阅
+
+服务端运行在 asyncio 事件循环中。命令在拥有 TimerManager 的线程上执行：
+无界面引擎与服务共用同一个事件循环，直接调用即可；GUI 中服务运行在后台线程，
+通过 executor 把命令投递到 Qt 主线程。一次读取到的多条请求会合并成一批投递，
+流水线请求只需要一次线程切换，不会拖慢时钟滴答。导入文件在后台线程读取和校验，
+每批单独投递插入，大文件导入期间滴答和其他命令照常执行。
+"""
+import asyncio
+import os
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from models import Timer, TIMER_COLORS, parse_schedule
+from data.transfer import ImportJob, export_timers
+from services.run_policy import RunPolicy
+from utils.profiling import handle_profile_command
+from .protocol import CommandError, ProtocolError, encode, decode
+
+# 在 TimerManager 所在线程执行函数并返回 Future 的执行器
+Executor = Callable[[Callable[[], object]], Future]
+
+EVENT_TYPES = ('tick', 'finish')
+
+
+class _Connection:
+    """
+    单个客户端连接
+    
+    响应和事件都经由同一个写协程发出：响应不会丢弃，事件队列有上限，
+    消费过慢时丢弃最旧的事件并通知客户端丢弃数量，避免拖慢服务端。
+    """
+    
+    def __init__(self, writer: asyncio.StreamWriter, max_pending_events: int):
+        self.writer = writer
+        self.max_pending_events = max_pending_events
+        self.responses: deque = deque()
+        self.events: deque = deque()
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+        self.event_types = None  # None 表示未订阅
+        self.timer_ids = None    # None 表示不过滤
+    
+    def send_response(self, message: dict):
+        """排队发送响应"""
+        self.responses.append(encode(message))
+        self.wakeup.set()
+    
+    def wants(self, event: str, timer_id: str) -> bool:
+        """是否订阅了该事件"""
+        if self.event_types is None or event not in self.event_types:
+            return False
+        return self.timer_ids is None or timer_id in self.timer_ids
+    
+    def send_event(self, data: bytes):
+        """排队发送事件，超出上限时丢弃最旧的事件"""
+        if len(self.events) >= self.max_pending_events:
+            self.events.popleft()
+            self.dropped += 1
+        self.events.append(data)
+        self.wakeup.set()
+    
+    async def write_loop(self):
+        """写协程：批量写出排队的响应和事件"""
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            chunks = []
+            while self.responses:
+                chunks.append(self.responses.popleft())
+            if self.dropped:
+                chunks.append(encode({'event': 'dropped', 'count': self.dropped}))
+                self.dropped = 0
+            while self.events:
+                chunks.append(self.events.popleft())
+            if chunks:
+                self.writer.write(b''.join(chunks))
+                await self.writer.drain()
+
+
+class ControlServer:
+    """本地控制服务"""
+    
+    # 每个订阅连接最多缓存的未发送事件数
+    MAX_PENDING_EVENTS = 10000
+    # 单次读取的最大字节数
+    READ_CHUNK = 64 * 1024
+    # 单个请求（一行）的最大字节数，超过时返回错误并断开连接
+    MAX_LINE = 16 * 1024 * 1024
+    # 会修改倒计时的命令，执行后触发 on_mutated
+    MUTATING_COMMANDS = frozenset({'add', 'start', 'pause', 'resume', 'reset', 'remove', 'update',
+                                   'policy', 'add_many', 'remove_many', 'start_many',
+                                   'reset_many', 'pause_all', 'sequence'})
+    
+    def __init__(self, timer_manager, socket_path: Path,
+                 executor: Executor = None,
+                 on_mutated: Callable[[], None] = None):
+        """
+        初始化控制服务
+        
+        Args:
+            timer_manager: 倒计时管理器
+            socket_path: Unix 套接字路径
+            executor: 在 TimerManager 所在线程执行命令的执行器，为 None 时直接调用
+            on_mutated: 一批命令修改了倒计时后调用（例如保存状态），在 TimerManager 所在线程执行
+        """
+        self._timer_manager = timer_manager
+        self.socket_path = Path(socket_path)
+        self._executor = executor
+        self._on_mutated = on_mutated
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connections: List[_Connection] = []
+        self._subscribers: List[_Connection] = []
+        
+        # 跨线程发布的事件先放入缓冲区，由事件循环统一分发
+        self._event_lock = threading.Lock()
+        self._pending_events: list = []
+        self._flush_scheduled = False
+        # 服务启动后订阅 TimerManager 的事件总线
+        self._bus_subscription = None
+        
+        self._mutating_commands = self.MUTATING_COMMANDS
+        self._commands = {
+            'ping': self._cmd_ping,
+            'list': self._cmd_list,
+            'get': self._cmd_get,
+            'add': self._cmd_add,
+            'update': self._cmd_update,
+            'start': self._cmd_start,
+            'pause': self._cmd_pause,
+            'resume': self._cmd_resume,
+            'reset': self._cmd_reset,
+            'remove': self._cmd_remove,
+            'add_many': self._cmd_add_many,
+            'remove_many': self._cmd_remove_many,
+            'start_many': self._cmd_start_many,
+            'reset_many': self._cmd_reset_many,
+            'pause_all': self._cmd_pause_all,
+            'export': self._cmd_export,
+            'profile': handle_profile_command,
+            'policy': self._cmd_policy,
+            'sequence': self._cmd_sequence,
+        }
+    
+    def register_command(self, name: str, handler: Callable[[dict], object],
+                         mutating: bool = False):
+        """
+        注册额外的命令（例如 GUI 的 show）
+        
+        Args:
+            name: 命令名
+            handler: 接收参数字典并返回可 JSON 序列化结果的函数，在 TimerManager 所在线程执行
+            mutating: 是否会修改倒计时（执行后触发 on_mutated）
+        """
+        self._commands[name] = handler
+        if mutating:
+            self._mutating_commands = self._mutating_commands | {name}
+    
+    @property
+    def has_subscribers(self) -> bool:
+        """是否有事件订阅者"""
+        return bool(self._subscribers)
+    
+    async def start(self) -> bool:
+        """
+        启动服务
+        
+        Returns:
+            是否启动成功；平台不支持 Unix 套接字或已有实例在监听时返回 False
+        """
+        if not hasattr(asyncio, 'start_unix_server'):
+            print("当前平台不支持 Unix 套接字，控制接口不可用")
+            return False
+        
+        if self.socket_path.exists():
+            if _socket_is_alive(self.socket_path):
+                print(f"控制套接字已被占用: {self.socket_path}")
+                return False
+            # 上次异常退出遗留的套接字文件
+            self.socket_path.unlink()
+        
+        self._loop = asyncio.get_running_loop()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=str(self.socket_path)
+        )
+        os.chmod(self.socket_path, 0o600)
+        self._bus_subscription = self._timer_manager.events.subscribe(
+            self._on_timer_event, events=EVENT_TYPES
+        )
+        return True
+    
+    async def close(self):
+        """关闭服务"""
+        if self._bus_subscription is not None:
+            self._bus_subscription.unsubscribe()
+            self._bus_subscription = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for conn in list(self._connections):
+            conn.writer.close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+    
+    def publish(self, event: str, timer: Timer):
+        """
+        发布倒计时事件，可以在任意线程调用
+        
+        Args:
+            event: 事件类型（tick / finish）
+            timer: 相关倒计时
+        """
+        subscribers = self._subscribers
+        if not subscribers or self._loop is None:
+            return
+        # 先按订阅过滤，没有连接需要的事件（如只订阅 finish 时的 tick）不做序列化
+        timer_id = timer.id
+        if not any(conn.wants(event, timer_id) for conn in subscribers):
+            return
+        data = encode({'event': event, 'timer': timer.to_dict()})
+        with self._event_lock:
+            self._pending_events.append((event, timer_id, data))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._loop.call_soon_threadsafe(self._flush_events)
+    
+    def _on_timer_event(self, event):
+        """事件总线的同步订阅者（在 TimerManager 所在线程执行）"""
+        self.publish(event.type, event.timer)
+    
+    def _flush_events(self):
+        """把缓冲的事件分发给订阅者（在事件循环线程执行）"""
+        with self._event_lock:
+            pending = self._pending_events
+            self._pending_events = []
+            self._flush_scheduled = False
+        for conn in self._subscribers:
+            for event, timer_id, data in pending:
+                if conn.wants(event, timer_id):
+                    conn.send_event(data)
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个客户端连接"""
+        conn = _Connection(writer, self.MAX_PENDING_EVENTS)
+        self._connections.append(conn)
+        write_task = asyncio.ensure_future(conn.write_loop())
+        buffer = bytearray()
+        try:
+            while True:
+                chunk = await reader.read(self.READ_CHUNK)
+                if not chunk:
+                    # 连接关闭前最后一个请求可能没有换行
+                    if buffer.strip():
+                        await self._process_lines(conn, [bytes(buffer)])
+                    break
+                buffer += chunk
+                # 之前的数据已确认没有换行，只需检查新读到的部分
+                if b'\n' in chunk:
+                    *lines, rest = buffer.split(b'\n')
+                    buffer = bytearray(rest)
+                    await self._process_lines(conn, [bytes(line) for line in lines if line.strip()])
+                if len(buffer) > self.MAX_LINE:
+                    conn.send_response({'id': None, 'ok': False,
+                                        'error': f'请求超过 {self.MAX_LINE} 字节'})
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            if conn in self._subscribers:
+                self._subscribers.remove(conn)
+            self._connections.remove(conn)
+            write_task.cancel()
+            await asyncio.gather(write_task, return_exceptions=True)
+            # 客户端半关闭时仍需把剩余响应写出
+            if conn.responses:
+                try:
+                    writer.write(b''.join(conn.responses))
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+            writer.close()
+    
+    async def _process_lines(self, conn: _Connection, lines: List[bytes]):
+        """
+        处理一次读取到的全部请求
+        
+        连续的倒计时命令合并为一批交给执行器；订阅类命令在事件循环中直接处理，
+        导入分多次投递（见 _handle_import），处理前都先把之前的批次执行完，
+        保证响应顺序与请求顺序一致。
+        """
+        batch = []
+        for line in lines:
+            try:
+                request = decode(line)
+            except ProtocolError as e:
+                await self._run_batch(conn, batch)
+                batch = []
+                conn.send_response({'id': None, 'ok': False, 'error': str(e)})
+                continue
+            
+            cmd = request.get('cmd')
+            if cmd in ('subscribe', 'unsubscribe'):
+                await self._run_batch(conn, batch)
+                batch = []
+                self._handle_subscription(conn, request)
+            elif cmd == 'import':
+                await self._run_batch(conn, batch)
+                batch = []
+                await self._handle_import(conn, request)
+            else:
+                batch.append(request)
+        await self._run_batch(conn, batch)
+    
+    async def _run_batch(self, conn: _Connection, batch: list):
+        """在 TimerManager 所在线程执行一批命令并发送响应"""
+        if not batch:
+            return
+        responses = await self._call(lambda: self._execute_batch(batch))
+        for response in responses:
+            conn.send_response(response)
+    
+    async def _call(self, func: Callable[[], object]):
+        """在 TimerManager 所在线程执行 func 并返回结果"""
+        if self._executor is None:
+            return func()
+        return await asyncio.wrap_future(self._executor(func))
+    
+    async def _handle_import(self, conn: _Connection, request: dict):
+        """
+        导入文件（在事件循环线程协调）
+        
+        文件由服务进程直接读取，客户端只传路径。读取和校验在后台线程进行，
+        每批单独投递到 TimerManager 所在线程插入，列表变化事件和 on_mutated
+        在导入结束后各触发一次。
+        """
+        request_id = request.get('id')
+        try:
+            args = _request_args(request)
+            job = ImportJob(Path(args['path']), args.get('format'))
+        except (CommandError, KeyError, TypeError, ValueError) as e:
+            conn.send_response({'id': request_id, 'ok': False, 'error': str(e)})
+            return
+        
+        loop = asyncio.get_running_loop()
+        error = None
+        job.start()
+        try:
+            while True:
+                batch = await loop.run_in_executor(None, job.next_batch)
+                if batch is None:
+                    break
+                await self._call(lambda: job.insert(self._timer_manager, batch))
+        except OSError as e:
+            error = f"读取失败: {e}"
+        except ValueError as e:
+            error = str(e)
+        except Exception as e:
+            print(f"执行控制命令 import 失败: {e!r}")
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            report = await self._call(lambda: self._finish_import(job))
+        if error is not None:
+            conn.send_response({'id': request_id, 'ok': False, 'error': error})
+        else:
+            conn.send_response({'id': request_id, 'ok': True, 'result': report.to_dict()})
+    
+    def _finish_import(self, job: ImportJob):
+        """结束导入，有导入时触发 on_mutated（在 TimerManager 所在线程执行）"""
+        report = job.finish(self._timer_manager)
+        if report.imported and self._on_mutated:
+            self._on_mutated()
+        return report
+    
+    def _execute_batch(self, batch: list) -> list:
+        """
+        执行一批命令（在 TimerManager 所在线程执行）
+        
+        整批命令在 TimerManager.batch() 中执行，列表变化事件只发布一次。
+        """
+        responses = []
+        with self._timer_manager.batch():
+            mutated = self._execute_requests(batch, responses)
+        
+        if mutated and self._on_mutated:
+            self._on_mutated()
+        return responses
+    
+    def _execute_requests(self, batch: list, responses: list) -> bool:
+        """依次执行请求并把响应追加到 responses，返回是否有修改"""
+        mutated = False
+        for request in batch:
+            request_id = request.get('id')
+            cmd = request.get('cmd')
+            handler = self._commands.get(cmd)
+            if handler is None:
+                responses.append({'id': request_id, 'ok': False, 'error': f"未知命令: {cmd}"})
+                continue
+            try:
+                result = handler(_request_args(request))
+                responses.append({'id': request_id, 'ok': True, 'result': result})
+                if cmd in self._mutating_commands:
+                    mutated = True
+            except (CommandError, KeyError, TypeError, ValueError) as e:
+                responses.append({'id': request_id, 'ok': False, 'error': str(e)})
+            except Exception as e:
+                # 命令的意外错误（如历史数据库、剖析输出文件）只让这一条请求失败，连接保持
+                print(f"执行控制命令 {cmd} 失败: {e!r}")
+                responses.append({'id': request_id, 'ok': False,
+                                  'error': f"{type(e).__name__}: {e}"})
+        return mutated
+    
+    def _handle_subscription(self, conn: _Connection, request: dict):
+        """处理订阅/取消订阅（在事件循环线程执行）"""
+        request_id = request.get('id')
+        if request.get('cmd') == 'unsubscribe':
+            conn.event_types = None
+            if conn in self._subscribers:
+                self._subscribers.remove(conn)
+            conn.send_response({'id': request_id, 'ok': True, 'result': None})
+            return
+        
+        try:
+            args = _request_args(request)
+            events = args.get('events') or list(EVENT_TYPES)
+            timer_ids = args.get('timer_ids')
+            if not isinstance(events, list) or not (timer_ids is None or isinstance(timer_ids, list)):
+                raise CommandError("events 和 timer_ids 必须是列表")
+            unknown = [e for e in events if e not in EVENT_TYPES]
+            if unknown:
+                raise CommandError(f"未知事件: {unknown}")
+            timer_ids = frozenset(timer_ids) if timer_ids else None
+        except (CommandError, TypeError) as e:
+            conn.send_response({'id': request_id, 'ok': False, 'error': str(e)})
+            return
+        
+        conn.event_types = frozenset(events)
+        conn.timer_ids = timer_ids
+        if conn not in self._subscribers:
+            self._subscribers.append(conn)
+        conn.send_response({'id': request_id, 'ok': True, 'result': sorted(conn.event_types)})
+    
+    # ========== 命令实现 ==========
+    
+    def _require_timer(self, args: dict) -> Timer:
+        timer = self._timer_manager.get_timer(args['id'])
+        if timer is None:
+            raise CommandError(f"倒计时不存在: {args['id']}")
+        return timer
+    
+    def _cmd_ping(self, args: dict):
+        return 'pong'
+    
+    def _cmd_list(self, args: dict):
+        timers = sorted(self._timer_manager.timers_with_deadlines(), key=lambda t: t.position)
+        return [t.to_dict() for t in timers]
+    
+    def _cmd_get(self, args: dict):
+        return self._require_timer(args).to_dict()
+    
+    def _timer_args(self, args: dict) -> dict:
+        """校验并转换 add 命令的参数"""
+        schedule = args.get('schedule', '')
+        if schedule:
+            # 定时倒计时的时长由计划决定
+            parse_schedule(schedule)
+            duration = int(args.get('duration_seconds', 0))
+        else:
+            duration = int(args['duration_seconds'])
+            if duration <= 0:
+                raise CommandError("时长必须大于 0")
+        return {
+            'name': args.get('name', '新倒计时'),
+            'duration_seconds': duration,
+            'color': args.get('color', TIMER_COLORS[0]),
+            'sound_path': args.get('sound_path', ''),
+            'group': args.get('group', ''),
+            'schedule': schedule,
+        }
+    
+    def _cmd_add(self, args: dict):
+        timer = self._timer_manager.add_timer(**self._timer_args(args))
+        if args.get('start'):
+            self._timer_manager.start_timer(timer.id)
+        return timer.to_dict()
+    
+    def _cmd_update(self, args: dict):
+        timer = self._require_timer(args)
+        duration = args.get('duration_seconds')
+        self._timer_manager.update_timer(
+            timer.id,
+            name=args.get('name'),
+            duration_seconds=int(duration) if duration is not None else None,
+            color=args.get('color'),
+            sound_path=args.get('sound_path'),
+            group=args.get('group'),
+            schedule=args.get('schedule')
+        )
+        return timer.to_dict()
+    
+    def _cmd_start(self, args: dict):
+        timer = self._require_timer(args)
+        self._timer_manager.start_timer(timer.id)
+        return timer.to_dict()
+    
+    def _cmd_pause(self, args: dict):
+        timer = self._require_timer(args)
+        self._timer_manager.pause_timer(timer.id)
+        return timer.to_dict()
+    
+    def _cmd_resume(self, args: dict):
+        timer = self._require_timer(args)
+        self._timer_manager.resume_timer(timer.id)
+        return timer.to_dict()
+    
+    def _cmd_reset(self, args: dict):
+        timer = self._require_timer(args)
+        self._timer_manager.reset_timer(timer.id)
+        return timer.to_dict()
+    
+    def _cmd_remove(self, args: dict):
+        self._require_timer(args)
+        return self._timer_manager.remove_timer(args['id'])
+    
+    def _cmd_add_many(self, args: dict):
+        # 先全部校验，任何一项无效时整批不添加
+        items = [self._timer_args(item) for item in args['timers']]
+        timers = self._timer_manager.add_many(items)
+        if args.get('start'):
+            self._timer_manager.start_many([timer.id for timer in timers])
+        return [timer.to_dict() for timer in timers]
+    
+    def _cmd_remove_many(self, args: dict):
+        return self._timer_manager.remove_many(args['ids'])
+    
+    def _cmd_start_many(self, args: dict):
+        return self._timer_manager.start_many(args['ids'])
+    
+    def _cmd_reset_many(self, args: dict):
+        return self._timer_manager.reset_many(args['ids'])
+    
+    def _cmd_pause_all(self, args: dict):
+        return self._timer_manager.pause_all()
+    
+    def _cmd_export(self, args: dict):
+        timers = sorted(self._timer_manager.timers_with_deadlines(), key=lambda t: t.position)
+        try:
+            count = export_timers(timers, Path(args['path']), args.get('format'))
+        except OSError as e:
+            raise CommandError(f"写入失败: {e}") from None
+        return {'path': args['path'], 'exported': count}
+    
+    def _cmd_policy(self, args: dict):
+        paused = []
+        if args.get('policy'):
+            paused = self._timer_manager.set_run_policy(RunPolicy.parse(args['policy']))
+        if args.get('sleep'):
+            self._timer_manager.set_sleep_policy(args['sleep'])
+        return {
+            'policy': str(self._timer_manager.run_policy),
+            'sleep': self._timer_manager.sleep_policy,
+            'running': self._timer_manager.get_running_count(),
+            'paused': [timer.id for timer in paused],
+        }
+    
+    def _cmd_sequence(self, args: dict):
+        manager = self._timer_manager
+        action = args.get('action', 'list')
+        if action == 'list':
+            return [sequence.to_dict() for sequence in manager.sequences]
+        if action == 'add':
+            sequence = manager.add_sequence(args.get('name', '新序列'), args['steps'],
+                                            int(args.get('loops', 1)))
+            if args.get('start'):
+                manager.start_sequence(sequence.id)
+            return sequence.to_dict()
+        handlers = {
+            'start': manager.start_sequence,
+            'stop': manager.stop_sequence,
+            'remove': manager.remove_sequence,
+        }
+        if action not in handlers:
+            raise CommandError(f"未知的序列操作: {action}")
+        if not handlers[action](args['id']):
+            raise CommandError(f"序列不存在: {args['id']}")
+        sequence = manager.get_sequence(args['id'])
+        return sequence.to_dict() if sequence is not None else True
+
+
+def _request_args(request: dict) -> dict:
+    """
+    请求的参数，没有时为空字典
+    
+    Raises:
+        CommandError: args 不是 JSON 对象
+    """
+    args = request.get('args')
+    if args is None:
+        return {}
+    if not isinstance(args, dict):
+        raise CommandError("args 必须是 JSON 对象")
+    return args
+
+
+class ControlServerThread:
+    """在后台线程的独立事件循环中运行 ControlServer（供 GUI 使用）"""
+    
+    def __init__(self, server: ControlServer):
+        self._server = server
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._start_ok = False
+    
+    @property
+    def server(self) -> ControlServer:
+        return self._server
+    
+    def start(self, timeout: float = 5.0) -> bool:
+        """启动后台线程，返回服务是否启动成功"""
+        self._thread = threading.Thread(target=self._run, name="control-server", daemon=True)
+        self._thread.start()
+        self._started.wait(timeout)
+        return self._start_ok
+    
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._start_ok = self._loop.run_until_complete(self._server.start())
+        except Exception as e:
+            print(f"控制服务启动失败: {e}")
+            self._start_ok = False
+        self._started.set()
+        if self._start_ok:
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._server.close())
+        self._loop.close()
+    
+    def stop(self, timeout: float = 2.0):
+        """停止服务并等待线程退出"""
+        if self._loop is None or self._thread is None:
+            return
+        if self._start_ok and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+
+def _socket_is_alive(path: Path) -> bool:
+    """检查套接字文件是否有进程在监听"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(0.5)
+    try:
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
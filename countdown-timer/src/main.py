@@ -1,35 +1,135 @@
 """
 多倒计时管理器 - 应用入口
 """
+import argparse
 import sys
 import os
 
 # 添加 src 目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
-from widgets import MainWindow
 
+def parse_args(argv=None):
+    """
+    解析命令行参数
+    
+    Returns:
+        (已识别的参数, 其余交给 Qt 的参数)
+    """
+    parser = argparse.ArgumentParser(description="多倒计时管理器")
+    parser.add_argument("--headless", action="store_true",
+                        help="以无界面模式运行倒计时引擎（不加载 PyQt）")
+    parser.add_argument("--scheduler", choices=("list", "wheel"), default="list",
+                        help="无界面模式的调度器；运行大量倒计时时使用 wheel（分层时间轮）")
+    parser.add_argument("--data-dir", default=None,
+                        help="自定义数据目录")
+    parser.add_argument("--state-format", choices=("json", "binary"), default=None,
+                        help="状态文件格式（默认读取环境变量 COUNTDOWN_STATE_FORMAT，未设置时为 json）")
+    parser.add_argument("--export-state", metavar="PATH", default=None,
+                        help="把保存的状态导出为 JSON 后退出（用于查看二进制状态）")
+    parser.add_argument("--no-control", action="store_true",
+                        help="不开启本地控制接口（Unix 套接字）")
+    parser.add_argument("--add", nargs=2, metavar=("NAME", "SECONDS"), default=None,
+                        help="添加倒计时；已有实例运行时转发给该实例")
+    parser.add_argument("--start", action="store_true",
+                        help="与 --add 一起使用，添加后立即开始")
+    # Qt 自身的参数（如 -platform）原样传给 QApplication
+    args, qt_args = parser.parse_known_args(argv)
+    if args.add:
+        try:
+            args.add = (args.add[0], int(args.add[1]))
+        except ValueError:
+            parser.error("--add 的时长必须是整数秒")
+        if args.add[1] <= 0:
+            parser.error("--add 的时长必须大于 0")
+    return args, qt_args
 
-def main():
-    """主函数"""
+
+def run_gui(qt_argv, args) -> int:
+    """运行图形界面"""
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import Qt
+    from widgets import MainWindow
+    from data import DataStore
+    
     # 启用高DPI支持
     QApplication.setHighDpiScaleFactorRoundingPolicy(
         Qt.HighDpiScaleFactorRoundingPolicy.PassThrough
     )
     
-    app = QApplication(sys.argv)
+    app = QApplication(qt_argv)
     app.setApplicationName("多倒计时管理器")
     app.setApplicationVersion("1.0.0")
     app.setQuitOnLastWindowClosed(False)  # 关闭窗口不退出，托盘运行
     
     # 创建并显示主窗口
-    window = MainWindow()
+    window = MainWindow(data_store=DataStore(data_dir=args.data_dir,
+                                             state_format=args.state_format),
+                        control=not args.no_control)
+    if args.add:
+        window.add_timer(args.add[0], args.add[1], start=args.start)
     window.show()
     
     # 运行应用
-    sys.exit(app.exec())
+    return app.exec()
+
+
+def hand_off(args, data_dir) -> int:
+    """
+    已有实例在运行：把参数转为控制命令转发给它后退出
+    
+    Returns:
+        进程退出码
+    """
+    from ipc import default_socket_path, forward_to_running_instance
+    
+    requests = []
+    if args.add:
+        requests.append(('add', {'name': args.add[0], 'duration_seconds': args.add[1],
+                                 'start': args.start}))
+    if not args.headless:
+        requests.append(('show', {}))
+    if not requests:
+        print("已有实例在运行", file=sys.stderr)
+        return 1
+    
+    results = forward_to_running_instance(default_socket_path(data_dir), requests)
+    if results is None:
+        print("已有实例在运行，但无法连接到其控制接口", file=sys.stderr)
+        return 1
+    
+    errors = [r for r in results if isinstance(r, Exception)]
+    for error in errors:
+        print(f"转发命令失败: {error}", file=sys.stderr)
+    return 1 if len(errors) == len(results) else 0
+
+
+def main():
+    """主函数"""
+    args, qt_args = parse_args(sys.argv[1:])
+    
+    if args.export_state:
+        # 只读取状态文件，不需要单实例锁
+        from data import DataStore
+        store = DataStore(data_dir=args.data_dir, state_format=args.state_format)
+        sys.exit(0 if store.export_json(args.export_state) else 1)
+    
+    # 同一数据目录只允许一个实例，后启动的实例把参数转发给已运行的实例
+    from data import resolve_data_dir
+    from ipc import InstanceLock
+    data_dir = resolve_data_dir(args.data_dir)
+    lock = InstanceLock(data_dir)
+    if not lock.acquire():
+        sys.exit(hand_off(args, data_dir))
+    
+    if args.headless:
+        from engine.headless import run_headless
+        sys.exit(run_headless(data_dir=args.data_dir, control=not args.no_control,
+                              add=args.add, start=args.start,
+                              scheduler=args.scheduler,
+                              state_format=args.state_format))
+    
+    sys.exit(run_gui(sys.argv[:1] + qt_args, args))
 
 
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
 from .timer import Timer, TIMER_COLORS
+from .schedule import Schedule, parse_schedule
+from .sequence import Sequence
 
-__all__ = ['Timer', 'TIMER_COLORS']
+__all__ = ['Timer', 'TIMER_COLORS', 'Schedule', 'parse_schedule', 'Sequence']
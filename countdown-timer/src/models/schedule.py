@@ -0,0 +1,220 @@
+"""
+定时计划 - 按墙上时钟（本地时间）触发的倒计时，例如“14:30 提醒”
+
+计划文本:
+    at 14:30                  下一个 14:30，只触发一次
+    at 2026-10-20 14:30       指定的日期和时间，只触发一次
+    daily 07:00               每天
+    weekdays 09:00            周一到周五
+    cron 0 9 * * 1-5          cron 表达式：分 时 日 月 周（周日为 0 或 7）
+时间可以写到秒（HH:MM:SS），cron 表达式精确到分钟。
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+# cron 表达式中星期的名称（周日为 0）
+_WEEKDAY_NAMES = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
+# 向后查找下一次触发的最大天数（2 月 29 日最长 8 年出现一次）
+_MAX_SEARCH_DAYS = 366 * 8 + 2
+
+
+def _parse_time(text: str) -> time:
+    """HH:MM 或 HH:MM:SS"""
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            pass
+    raise ValueError(f"时间格式应为 HH:MM 或 HH:MM:SS: {text}")
+
+
+def _parse_field(text: str, low: int, high: int, names: dict = None) -> FrozenSet[int]:
+    """
+    解析 cron 的一个字段：* / 数字 / a-b / 以上加 /步长 / 逗号分隔的列表
+    
+    Raises:
+        ValueError: 格式错误或超出范围
+    """
+    def value(token: str) -> int:
+        token = token.lower()
+        if names and token in names:
+            return names[token]
+        try:
+            number = int(token)
+        except ValueError:
+            raise ValueError(f"cron 字段无效: {text}") from None
+        if not low <= number <= high:
+            raise ValueError(f"cron 字段超出范围 {low}-{high}: {text}")
+        return number
+    
+    result = set()
+    for part in text.split(','):
+        base, _, step_text = part.partition('/')
+        step = value(step_text) if step_text else 1
+        if step <= 0:
+            raise ValueError(f"cron 步长必须大于 0: {text}")
+        if base == '*':
+            first, last = low, high
+        elif '-' in base:
+            first_text, _, last_text = base.partition('-')
+            first, last = value(first_text), value(last_text)
+            if first > last:
+                raise ValueError(f"cron 范围无效: {text}")
+        else:
+            first = value(base)
+            last = high if step_text else first
+        result.update(range(first, last + 1, step))
+    return frozenset(result)
+
+
+class Schedule:
+    """
+    定时计划
+    
+    由触发的时分秒、日、月、星期的集合描述（与 cron 相同），日和星期都被限制时
+    满足其一即可。one_shot_date 不为空时只在该日期触发一次。
+    """
+    
+    def __init__(self, text: str, hours: FrozenSet[int], minutes: FrozenSet[int],
+                 seconds: FrozenSet[int] = frozenset({0}),
+                 days: FrozenSet[int] = None, months: FrozenSet[int] = None,
+                 weekdays: FrozenSet[int] = None, recurring: bool = True,
+                 one_shot_date: Optional[date] = None):
+        """
+        Args:
+            text: 计划文本
+            hours / minutes / seconds: 触发的时、分、秒
+            days / months: 日（1-31）和月（1-12），为 None 时不限
+            weekdays: 星期（周日为 0），为 None 时不限
+            recurring: 是否重复触发
+            one_shot_date: 只在该日期触发
+        """
+        self.text = text
+        self.recurring = recurring
+        self._hours = sorted(hours)
+        self._minutes = sorted(minutes)
+        self._seconds = sorted(seconds)
+        self._days = days
+        self._months = months
+        self._weekdays = weekdays
+        self._one_shot_date = one_shot_date
+    
+    def next_after(self, moment: datetime) -> Optional[datetime]:
+        """
+        moment 之后（不含）的下一次触发时间
+        
+        Returns:
+            本地时间；不再触发时为 None
+        """
+        start = moment.replace(microsecond=0) + timedelta(seconds=1)
+        if self._one_shot_date is not None:
+            if start.date() > self._one_shot_date:
+                return None
+            if start.date() < self._one_shot_date:
+                start = datetime.combine(self._one_shot_date, time())
+            found = self._first_time(start.time())
+            return datetime.combine(start.date(), found) if found is not None else None
+        
+        day = start.date()
+        after = start.time()
+        for _ in range(_MAX_SEARCH_DAYS):
+            if self._matches_day(day):
+                found = self._first_time(after)
+                if found is not None:
+                    return datetime.combine(day, found)
+            day += timedelta(days=1)
+            after = None
+        return None
+    
+    def next_due(self, now: float) -> Optional[int]:
+        """now（时间戳）之后的下一次触发时间戳，不再触发时为 None"""
+        found = self.next_after(datetime.fromtimestamp(now))
+        return int(found.timestamp()) if found is not None else None
+    
+    def _matches_day(self, day: date) -> bool:
+        """该日期是否可能触发"""
+        if self._months is not None and day.month not in self._months:
+            return False
+        day_ok = self._days is None or day.day in self._days
+        weekday_ok = self._weekdays is None or (day.weekday() + 1) % 7 in self._weekdays
+        if self._days is not None and self._weekdays is not None:
+            # cron 的约定：日和星期都被限制时满足其一即可
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+    
+    def _first_time(self, after: Optional[time]) -> Optional[time]:
+        """一天中不早于 after 的第一个触发时刻"""
+        for hour in self._hours:
+            if after is not None and hour < after.hour:
+                continue
+            for minute in self._minutes:
+                if after is not None and hour == after.hour and minute < after.minute:
+                    continue
+                for second in self._seconds:
+                    candidate = time(hour, minute, second)
+                    if after is None or candidate >= after:
+                        return candidate
+        return None
+    
+    def describe(self) -> str:
+        """界面上显示的说明"""
+        kind, _, rest = self.text.partition(' ')
+        if kind == 'daily':
+            return f"每天 {rest}"
+        if kind == 'weekdays':
+            return f"工作日 {rest}"
+        if kind == 'at':
+            return rest
+        return self.text
+
+
+@lru_cache(maxsize=256)
+def parse_schedule(text: str) -> Schedule:
+    """
+    解析计划文本（结果被缓存，界面逐秒显示说明时不重复解析）
+    
+    Raises:
+        ValueError: 格式错误
+    """
+    text = ' '.join(text.split())
+    kind, _, rest = text.partition(' ')
+    kind = kind.lower()
+    if not rest:
+        raise ValueError(f"计划格式错误: {text}（例如 daily 07:00）")
+    text = f"{kind} {rest}"
+    
+    if kind == 'cron':
+        fields = rest.split(' ')
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式应有 5 个字段（分 时 日 月 周）: {rest}")
+        minute, hour, day, month, weekday = fields
+        weekdays = _parse_field(weekday, 0, 7, _WEEKDAY_NAMES)
+        weekdays = frozenset(0 if value == 7 else value for value in weekdays)
+        return Schedule(text,
+                        hours=_parse_field(hour, 0, 23),
+                        minutes=_parse_field(minute, 0, 59),
+                        days=None if day == '*' else _parse_field(day, 1, 31),
+                        months=None if month == '*' else _parse_field(month, 1, 12),
+                        weekdays=None if weekday == '*' else weekdays)
+    
+    if kind == 'at':
+        one_shot_date = None
+        if ' ' in rest:
+            date_text, _, rest_time = rest.partition(' ')
+            try:
+                one_shot_date = datetime.strptime(date_text, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f"日期格式应为 YYYY-MM-DD: {date_text}") from None
+            at = _parse_time(rest_time)
+        else:
+            at = _parse_time(rest)
+        return Schedule(text, frozenset({at.hour}), frozenset({at.minute}), frozenset({at.second}),
+                        recurring=False, one_shot_date=one_shot_date)
+    
+    if kind in ('daily', 'weekdays'):
+        at = _parse_time(rest)
+        return Schedule(text, frozenset({at.hour}), frozenset({at.minute}), frozenset({at.second}),
+                        weekdays=frozenset(range(1, 6)) if kind == 'weekdays' else None)
+    
+    raise ValueError(f"未知的计划类型: {kind}（支持 at / daily / weekdays / cron）")
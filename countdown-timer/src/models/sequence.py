@@ -0,0 +1,100 @@
+"""
+倒计时序列 - 依次运行的一组倒计时，例如番茄钟：工作 → 短休息，循环 4 次
+
+序列只记录步骤（倒计时 ID，可以重复）和进度，倒计时本身仍是普通的 Timer。
+一步结束时由 TimerManager 在同一次滴答中开始下一步，步骤之间没有间隔。
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+import uuid
+
+
+@dataclass
+class Sequence:
+    """倒计时序列"""
+    id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    name: str = "新序列"
+    steps: List[str] = field(default_factory=list)  # 依次运行的倒计时 ID
+    loops: int = 1  # 循环次数，0 表示无限循环
+    # 运行进度
+    active: bool = False
+    step: int = 0  # 当前步骤的下标
+    cycle: int = 0  # 已完成的循环次数
+    
+    def __post_init__(self):
+        """校验参数"""
+        if self.loops < 0:
+            raise ValueError("循环次数不能小于 0")
+    
+    def current_id(self) -> Optional[str]:
+        """当前步骤的倒计时 ID，未运行时为 None"""
+        if not self.active or not 0 <= self.step < len(self.steps):
+            return None
+        return self.steps[self.step]
+    
+    def begin(self) -> Optional[str]:
+        """从第一步开始，返回第一步的倒计时 ID（没有步骤时为 None）"""
+        self.step = 0
+        self.cycle = 0
+        self.active = bool(self.steps)
+        return self.current_id()
+    
+    def advance(self) -> Optional[str]:
+        """
+        当前步骤结束，移到下一步
+        
+        Returns:
+            下一步的倒计时 ID；全部循环完成时为 None，序列停止
+        """
+        self.step += 1
+        if self.step >= len(self.steps):
+            self.step = 0
+            self.cycle += 1
+            if self.loops and self.cycle >= self.loops:
+                self.active = False
+                return None
+        return self.current_id()
+    
+    def remove_step(self, timer_id: str):
+        """删除倒计时时从步骤中移除；当前步骤被删除时序列停止"""
+        if timer_id not in self.steps:
+            return
+        if self.current_id() == timer_id:
+            self.active = False
+        before = self.steps[:self.step].count(timer_id)
+        self.steps = [step for step in self.steps if step != timer_id]
+        self.step = max(0, self.step - before)
+        if not self.steps:
+            self.active = False
+    
+    def describe(self) -> str:
+        """界面上显示的进度"""
+        loops = f"{self.loops}" if self.loops else "∞"
+        if not self.active:
+            return f"{self.name}（{len(self.steps)} 步 × {loops}）"
+        return f"{self.name} 第 {self.cycle + 1}/{loops} 轮 第 {self.step + 1}/{len(self.steps)} 步"
+    
+    def to_dict(self) -> dict:
+        """转换为字典（保存在设置中）"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'steps': list(self.steps),
+            'loops': self.loops,
+            'active': self.active,
+            'step': self.step,
+            'cycle': self.cycle,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Sequence':
+        """从字典创建"""
+        return cls(
+            id=str(data.get('id') or Sequence().id),
+            name=str(data.get('name', "新序列")),
+            steps=[str(step) for step in data.get('steps', [])],
+            loops=int(data.get('loops', 1)),
+            active=bool(data.get('active', False)),
+            step=int(data.get('step', 0)),
+            cycle=int(data.get('cycle', 0)),
+        )
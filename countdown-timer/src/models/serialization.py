@@ -0,0 +1,101 @@
+"""
+数据类的快速序列化 - 按字段生成专用的 to_dict / from_dict / to_tuple / from_tuple
+
+dataclasses.asdict 会递归深拷贝每个字段，逐个 dict.get 并提前计算 uuid、datetime
+默认值也有不小的开销；保存和加载大量倒计时时这两步占了大部分时间。这里在类定义后
+按字段列表生成直接读写属性的函数（与 dataclass 自己生成 __init__ 的方式相同），
+只在字段缺失时才调用 default_factory。
+
+只适用于字段都是不可变标量（str / int / float / bool）的数据类。
+"""
+from dataclasses import MISSING, fields
+from typing import Dict
+
+
+def _compile(name: str, lines: list, namespace: Dict[str, object]):
+    """编译生成的函数"""
+    source = "\n".join(lines)
+    exec(source, namespace)
+    return namespace[name]
+
+
+def install_serializers(cls):
+    """
+    为数据类生成并安装序列化方法
+    
+        to_dict()          字段名 -> 值
+        from_dict(data)    缺少的键使用字段默认值（default_factory 只在缺少时调用）
+        to_tuple()         按字段顺序排列的值，比字典更紧凑
+        from_tuple(values) to_tuple 的逆操作
+        
+    from_dict / from_tuple 跳过 __init__ 直接填充实例，之后调用 __post_init__（如果有）。
+    同时设置 cls.FIELDS 为字段名元组。
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace: Dict[str, object] = {'_new': object.__new__, '_MISSING': MISSING}
+    post_init = hasattr(cls, '__post_init__')
+    
+    # to_dict
+    items = ", ".join(f"{name!r}: self.{name}" for name in names)
+    to_dict = _compile('to_dict', [
+        "def to_dict(self):",
+        f"    return {{{items}}}",
+    ], namespace)
+    
+    # from_dict：常量默认值直接作为 get 的第二个参数，工厂默认值只在缺少时调用
+    lines = [
+        "def from_dict(cls, data):",
+        "    get = data.get",
+        "    self = _new(cls)",
+    ]
+    values = []
+    for f in fields(cls):
+        var = f"v_{f.name}"
+        if f.default is not MISSING:
+            namespace[f"_default_{f.name}"] = f.default
+            lines.append(f"    {var} = get({f.name!r}, _default_{f.name})")
+        elif f.default_factory is not MISSING:
+            namespace[f"_factory_{f.name}"] = f.default_factory
+            lines.append(f"    {var} = get({f.name!r}, _MISSING)")
+            lines.append(f"    if {var} is _MISSING:")
+            lines.append(f"        {var} = _factory_{f.name}()")
+        else:
+            lines.append(f"    {var} = data[{f.name!r}]")
+        values.append(f"{f.name!r}: {var}")
+    lines.append(f"    self.__dict__.update({{{', '.join(values)}}})")
+    if post_init:
+        lines.append("    self.__post_init__()")
+    lines.append("    return self")
+    from_dict = _compile('from_dict', lines, namespace)
+    
+    # to_tuple / from_tuple
+    to_tuple = _compile('to_tuple', [
+        "def to_tuple(self):",
+        f"    return ({', '.join(f'self.{name}' for name in names)},)",
+    ], namespace)
+    targets = ", ".join(f"v_{name}" for name in names)
+    lines = [
+        "def from_tuple(cls, values):",
+        f"    {targets}, = values",
+        "    self = _new(cls)",
+        f"    self.__dict__.update({{{', '.join(f'{name!r}: v_{name}' for name in names)}}})",
+    ]
+    if post_init:
+        lines.append("    self.__post_init__()")
+    lines.append("    return self")
+    from_tuple = _compile('from_tuple', lines, namespace)
+    
+    to_dict.__doc__ = "转换为字典"
+    from_dict.__doc__ = "从字典创建实例，缺少的键使用默认值"
+    to_tuple.__doc__ = "转换为按字段顺序排列的元组（紧凑格式）"
+    from_tuple.__doc__ = "从 to_tuple 的结果创建实例"
+    for func in (to_dict, from_dict, to_tuple, from_tuple):
+        func.__qualname__ = f"{cls.__qualname__}.{func.__name__}"
+        func.__module__ = cls.__module__
+    
+    cls.FIELDS = names
+    cls.to_dict = to_dict
+    cls.from_dict = classmethod(from_dict)
+    cls.to_tuple = to_tuple
+    cls.from_tuple = classmethod(from_tuple)
+    return cls
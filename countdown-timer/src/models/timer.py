@@ -1,71 +1,103 @@
 """
 倒计时数据模型
+
+状态机（TRANSITIONS）:
+    stopped --start--> running --pause--> paused --resume--> running
+    running --tick--> running（剩余时间减一秒）--finish--> stopped（剩余 0 秒，已结束）
+    任意状态 --stop / reset--> stopped（剩余时间恢复为时长）
+开始和继续要求剩余时间大于 0：已结束的倒计时需要先重置。运行中的倒计时剩余时间
+总是大于 0。
 """
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 import uuid
 
+from .serialization import install_serializers
+
+STATUSES = ("stopped", "running", "paused")
+
+# (状态, 操作) -> 新状态；表中没有的组合是无效操作，状态不变
+TRANSITIONS = {
+    **{(status, 'start'): "running" for status in STATUSES},
+    ("running", 'pause'): "paused",
+    ("paused", 'resume'): "running",
+    ("running", 'tick'): "running",
+    ("running", 'finish'): "stopped",
+    **{(status, 'stop'): "stopped" for status in STATUSES},
+    **{(status, 'reset'): "stopped" for status in STATUSES},
+}
 
+
+@install_serializers
 @dataclass
 class Timer:
-    """倒计时实体类"""
+    """
+    倒计时实体类
+    
+    to_dict / from_dict / to_tuple / from_tuple 由 install_serializers 按字段生成，
+    新增字段时无需修改。
+    """
     id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
     name: str = "新倒计时"
     duration_seconds: int = 1500  # 默认25分钟
-    remaining_seconds: int = 1500
+    remaining_seconds: int = -1  # 小于 0 表示未指定，取 duration_seconds；0 表示已结束
     color: str = "#4CAF50"
     status: str = "stopped"  # running, paused, stopped
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     position: int = 0
+    sound_path: str = ""  # 自定义提示音，空字符串表示使用默认提示音
+    group: str = ""  # 分组，用于“同组互斥”运行策略，空字符串表示未分组
+    schedule: str = ""  # 定时计划（见 models.schedule），空字符串表示普通倒计时
+    # 到期的时间戳：定时倒计时为下一次触发的时间，运行中的普通倒计时为保存时推算的
+    # 结束时间（重启后据此补上程序未运行的时间）；0 表示没有
+    due_at: int = 0
     
     def __post_init__(self):
-        """初始化后处理"""
-        if self.remaining_seconds == 0:
+        """初始化后处理：补全剩余时间，修正加载的数据中不满足不变式的状态"""
+        if self.remaining_seconds < 0:
             self.remaining_seconds = self.duration_seconds
+        if self.status not in STATUSES:
+            self.status = "stopped"
+        elif self.status == "running" and self.remaining_seconds == 0:
+            self.status = "stopped"
     
-    def to_dict(self) -> dict:
-        """转换为字典"""
-        return asdict(self)
-    
-    @classmethod
-    def from_dict(cls, data: dict) -> 'Timer':
-        """从字典创建实例"""
-        return cls(
-            id=data.get('id', str(uuid.uuid4())[:8]),
-            name=data.get('name', '新倒计时'),
-            duration_seconds=data.get('duration_seconds', 1500),
-            remaining_seconds=data.get('remaining_seconds', 1500),
-            color=data.get('color', '#4CAF50'),
-            status=data.get('status', 'stopped'),
-            created_at=data.get('created_at', datetime.now().isoformat()),
-            position=data.get('position', 0)
-        )
+    def _transition(self, operation: str) -> bool:
+        """按状态转换表改变状态，返回操作是否有效"""
+        status = TRANSITIONS.get((self.status, operation))
+        if status is None:
+            return False
+        self.status = status
+        return True
     
     def start(self):
-        """开始倒计时"""
+        """开始倒计时（已结束的需要先重置）"""
         if self.remaining_seconds > 0:
-            self.status = "running"
+            self._transition('start')
     
     def pause(self):
         """暂停倒计时"""
-        if self.status == "running":
-            self.status = "paused"
+        self._transition('pause')
     
     def resume(self):
         """继续倒计时"""
-        if self.status == "paused" and self.remaining_seconds > 0:
-            self.status = "running"
+        if self.remaining_seconds > 0:
+            self._transition('resume')
     
     def stop(self):
         """停止并重置倒计时"""
-        self.status = "stopped"
+        self._transition('stop')
         self.remaining_seconds = self.duration_seconds
     
     def reset(self):
         """重置倒计时"""
+        self._transition('reset')
         self.remaining_seconds = self.duration_seconds
-        self.status = "stopped"
+    
+    def finish(self):
+        """倒计时结束（调度器一次推进多秒时直接调用）"""
+        if self._transition('finish'):
+            self.remaining_seconds = 0
     
     def tick(self) -> bool:
         """
@@ -74,12 +106,25 @@ class Timer:
         """
         if self.status == "running" and self.remaining_seconds > 0:
             self.remaining_seconds -= 1
-            if self.remaining_seconds <= 0:
-                self.remaining_seconds = 0
-                self.status = "stopped"
+            if self.remaining_seconds == 0:
+                self._transition('finish')
                 return True
         return False
     
+    def set_duration(self, seconds: int):
+        """
+        修改时长
+        
+        已开始的（运行中或暂停）保留已经过的时间，剩余时间不少于 1 秒；
+        停止的（包括已结束的）从新的时长开始。
+        """
+        if self.status == "stopped":
+            self.remaining_seconds = seconds
+        else:
+            elapsed = self.duration_seconds - self.remaining_seconds
+            self.remaining_seconds = max(1, seconds - elapsed)
+        self.duration_seconds = seconds
+    
     def is_running(self) -> bool:
         """是否正在运行"""
         return self.status == "running"
@@ -88,6 +133,10 @@ class Timer:
         """是否已暂停"""
         return self.status == "paused"
     
+    def is_scheduled(self) -> bool:
+        """是否按墙上时钟定时触发"""
+        return bool(self.schedule)
+    
     def is_finished(self) -> bool:
         """是否已完成"""
         return self.remaining_seconds == 0
@@ -1,5 +1,38 @@
-from .timer_manager import TimerManager
-from .notification import NotificationService
-from .sound_player import SoundPlayer
+"""
+服务模块
 
-__all__ = ['TimerManager', 'NotificationService', 'SoundPlayer']
+子模块按需导入：只使用 TimerManager 时不会加载声音与通知相关的代码，
+以缩短应用启动时间。
+"""
+import importlib
+
+_LAZY_ATTRS = {
+    'TimerManager': '.timer_manager',
+    'NotificationService': '.notification',
+    'SoundPlayer': '.sound_player',
+    'Instrumentation': '.instrumentation',
+    'EventBus': '.event_bus',
+    'TimerEvent': '.event_bus',
+    'ListScheduler': '.scheduler',
+    'TimingWheelScheduler': '.scheduler',
+    'HistoryLog': '.history',
+    'ClockWatcher': '.clock_watch',
+    'TimerIndex': '.timer_index',
+}
+
+__all__ = ['TimerManager', 'NotificationService', 'SoundPlayer', 'Instrumentation',
+           'EventBus', 'TimerEvent', 'ListScheduler', 'TimingWheelScheduler', 'HistoryLog',
+           'ClockWatcher', 'TimerIndex']
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
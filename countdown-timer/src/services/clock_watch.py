@@ -0,0 +1,94 @@
+"""
+休眠与时钟跳变检测
+
+滴答按单调时钟计时：倒计时不受墙上时钟调整的影响，但 Linux / macOS 上系统休眠
+期间单调时钟不走，倒计时会悄悄停在休眠前的位置。ClockWatcher 在每次唤醒时比较
+三个时钟自上次检查以来的增量：
+
+    单调时钟 time.monotonic          不跟随时钟调整，休眠期间不走
+    启动时钟 CLOCK_BOOTTIME（Linux） 不跟随时钟调整，包含休眠时间
+    墙上时钟 time.time               可能被用户或 NTP 调整
+
+启动时钟比单调时钟多走的是休眠时间，墙上时钟比启动时钟多走的是时钟调整。
+没有启动时钟的平台把墙上时钟多走的部分都视为休眠，向后的调整仍能区分。
+
+休眠策略决定休眠时间是否计入运行中的倒计时：
+
+    count   计入（默认）：醒来时一次性补上，休眠期间到期的倒计时立即结束
+    pause   不计入：倒计时从休眠前的位置继续
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+SLEEP_COUNT = 'count'
+SLEEP_PAUSE = 'pause'
+SLEEP_POLICIES = (SLEEP_COUNT, SLEEP_PAUSE)
+
+# (单调时钟, 启动时钟或 None, 墙上时钟)
+ClockReading = Tuple[float, Optional[float], float]
+
+
+def read_clocks() -> ClockReading:
+    """读取三个时钟"""
+    boot = None
+    if hasattr(time, 'CLOCK_BOOTTIME'):
+        boot = time.clock_gettime(time.CLOCK_BOOTTIME)
+    return time.monotonic(), boot, time.time()
+
+
+@dataclass(frozen=True)
+class ClockGap:
+    """两次检查之间检测到的休眠和时钟调整"""
+    suspended: float = 0.0  # 系统休眠的秒数
+    wall_jump: float = 0.0  # 墙上时钟被调整的秒数，向前为正
+
+
+class ClockWatcher:
+    """检测系统休眠和墙上时钟跳变"""
+    
+    # 小于该秒数的差异视为读取误差
+    THRESHOLD = 2.0
+    
+    def __init__(self, clocks: Callable[[], ClockReading] = read_clocks,
+                 threshold: float = THRESHOLD):
+        """
+        Args:
+            clocks: 读取时钟的函数，测试时可替换
+            threshold: 休眠或时钟调整达到该秒数才报告
+        """
+        self._clocks = clocks
+        self._threshold = threshold
+        self._last = clocks()
+    
+    def reset(self):
+        """以现在为基准重新开始检测（例如引擎重新开始运行）"""
+        self._last = self._clocks()
+    
+    def check(self) -> Optional[ClockGap]:
+        """
+        与上次检查比较
+        
+        Returns:
+            检测到休眠或时钟调整时返回 ClockGap，否则为 None
+        """
+        mono, boot, wall = reading = self._clocks()
+        last_mono, last_boot, last_wall = self._last
+        self._last = reading
+        
+        elapsed = mono - last_mono
+        if boot is not None and last_boot is not None:
+            suspended = (boot - last_boot) - elapsed
+            wall_jump = (wall - last_wall) - (boot - last_boot)
+        else:
+            drift = (wall - last_wall) - elapsed
+            suspended = max(0.0, drift)
+            wall_jump = min(0.0, drift)
+        
+        if suspended < self._threshold:
+            suspended = 0.0
+        if abs(wall_jump) < self._threshold:
+            wall_jump = 0.0
+        if not suspended and not wall_jump:
+            return None
+        return ClockGap(suspended, wall_jump)
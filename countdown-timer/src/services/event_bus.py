@@ -0,0 +1,384 @@
+"""
+事件总线 - 把 TimerManager 的倒计时事件分发给多个订阅者
+
+每个订阅者可以按事件类型和倒计时 ID 过滤，并选择投递方式:
+    sync     在发布线程中直接调用（默认，适合刷新界面等轻量处理）
+    thread   由订阅者专属的后台线程调用
+    async    投递到指定的 asyncio 事件循环中调用
+
+后两种方式先把事件放入有界队列再唤醒消费者，慢速订阅者不会拖慢滴答：
+同一倒计时尚未投递的 tick 事件会被新的覆盖（coalesce），队列满时按 overflow
+策略丢弃最旧（drop_oldest）或最新（drop_newest）的事件，并计入 dropped。
+"""
+import asyncio
+import copy
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from models import Timer
+
+EVENT_TICK = 'tick'
+EVENT_FINISH = 'finish'
+EVENT_CHANGED = 'changed'
+# 运行状态的变化（开始、暂停、继续、重置），只在状态真正改变时发布
+EVENT_START = 'start'
+EVENT_PAUSE = 'pause'
+EVENT_RESUME = 'resume'
+EVENT_RESET = 'reset'
+EVENT_TYPES = (EVENT_TICK, EVENT_FINISH, EVENT_CHANGED,
+               EVENT_START, EVENT_PAUSE, EVENT_RESUME, EVENT_RESET)
+# 一次运行从开始到结束经历的事件，历史记录使用
+LIFECYCLE_EVENTS = (EVENT_START, EVENT_PAUSE, EVENT_RESUME, EVENT_FINISH, EVENT_RESET)
+
+DELIVERY_SYNC = 'sync'
+DELIVERY_THREAD = 'thread'
+DELIVERY_ASYNC = 'async'
+
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_DROP_NEWEST = 'drop_newest'
+
+
+class TimerEvent(NamedTuple):
+    """倒计时事件"""
+    
+    # 事件类型，见 EVENT_TYPES
+    type: str
+    # 相关倒计时；changed 等与单个倒计时无关的事件为 None
+    timer: Optional[Timer]
+    # 发布时间（time.time）
+    timestamp: float
+
+
+EventHandler = Callable[[TimerEvent], None]
+
+# 比 TimerEvent(...) 少一层参数解析，滴答时每个倒计时都要创建一次
+_new_event = tuple.__new__
+
+
+class Subscription:
+    """
+    一个订阅
+    
+    同步订阅直接把 handler 作为 deliver，发布时没有额外的调用层。
+    """
+    
+    def __init__(self, bus: 'EventBus', handler: EventHandler,
+                 events: Optional[Iterable[str]] = None,
+                 timer_ids: Optional[Iterable[str]] = None):
+        self._bus = bus
+        self.handler = handler
+        self.events = tuple(events) if events is not None else EVENT_TYPES
+        self.timer_ids = frozenset(timer_ids) if timer_ids is not None else None
+        self.deliver = handler
+    
+    def unsubscribe(self, drain: bool = False):
+        """取消订阅，drain 为 True 时先处理完队列中的事件"""
+        self._bus.unsubscribe(self, drain)
+    
+    def close(self, drain: bool = False):
+        """释放订阅占用的资源"""
+    
+    def stats(self) -> dict:
+        """订阅状态"""
+        return {
+            'delivery': DELIVERY_SYNC,
+            'events': list(self.events),
+            'timer_ids': sorted(self.timer_ids) if self.timer_ids is not None else None,
+        }
+
+
+class _QueuedSubscription(Subscription):
+    """先入队再由消费者处理的订阅（thread / async 投递的公共部分）"""
+    
+    delivery = ''
+    
+    def __init__(self, bus, handler, events=None, timer_ids=None,
+                 max_pending: int = 1024, overflow: str = OVERFLOW_DROP_OLDEST,
+                 coalesce: bool = True, snapshot: bool = False):
+        super().__init__(bus, handler, events, timer_ids)
+        if overflow not in (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST):
+            raise ValueError(f"未知的溢出策略: {overflow}")
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.coalesce = coalesce
+        self.snapshot = snapshot
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        # 队列元素是单元素列表，合并 tick 时直接替换其中的事件，不改变顺序
+        self._pending: deque = deque()
+        self._pending_ticks: Dict[str, list] = {}
+        self._scheduled = False
+        self._closed = False
+        # 关闭时是否先处理完队列中的事件
+        self._drain_on_close = False
+        self.deliver = self._enqueue
+    
+    def _enqueue(self, event: TimerEvent):
+        """放入队列（在发布线程执行）"""
+        coalesce = self.coalesce and event.type == EVENT_TICK
+        if self.snapshot and event.timer is not None:
+            # 消费者看到的是发布时的倒计时，不受之后的改名、改色等修改影响
+            event = _new_event(TimerEvent, (event.type, copy.copy(event.timer), event.timestamp))
+        with self._lock:
+            if self._closed:
+                return
+            if coalesce:
+                slot = self._pending_ticks.get(event.timer.id)
+                if slot is not None:
+                    slot[0] = event
+                    self.coalesced += 1
+                    return
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                if self.overflow == OVERFLOW_DROP_NEWEST:
+                    return
+                oldest = self._pending.popleft()
+                if oldest[0].type == EVENT_TICK:
+                    timer_id = oldest[0].timer.id
+                    if self._pending_ticks.get(timer_id) is oldest:
+                        del self._pending_ticks[timer_id]
+            slot = [event]
+            self._pending.append(slot)
+            if coalesce:
+                self._pending_ticks[event.timer.id] = slot
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake()
+    
+    def _wake(self):
+        """通知消费者有新事件"""
+        raise NotImplementedError
+    
+    def _drain(self):
+        """取出并处理队列中的全部事件（在消费者线程执行）"""
+        with self._lock:
+            pending = self._pending
+            self._pending = deque()
+            self._pending_ticks = {}
+            self._scheduled = False
+        for slot in pending:
+            try:
+                self.handler(slot[0])
+            except Exception as e:
+                print(f"事件处理失败: {e}")
+        self.delivered += len(pending)
+    
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            'delivery': self.delivery,
+            'pending': len(self._pending),
+            'max_pending': self.max_pending,
+            'delivered': self.delivered,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+        })
+        return stats
+
+
+class _ThreadSubscription(_QueuedSubscription):
+    """由专属后台线程处理事件的订阅"""
+    
+    delivery = DELIVERY_THREAD
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-subscriber", daemon=True)
+        self._thread.start()
+    
+    def _wake(self):
+        self._wakeup.set()
+    
+    def _run(self):
+        """消费者线程"""
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                if self._drain_on_close:
+                    self._drain()
+                return
+            self._drain()
+    
+    def close(self, drain: bool = False):
+        """停止消费者线程，drain 为 False 时未处理的事件被丢弃"""
+        with self._lock:
+            self._closed = True
+            self._drain_on_close = drain
+        self._wakeup.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout=1.0)
+
+
+class _AsyncSubscription(_QueuedSubscription):
+    """在 asyncio 事件循环中处理事件的订阅"""
+    
+    delivery = DELIVERY_ASYNC
+    
+    def __init__(self, bus, handler, loop: asyncio.AbstractEventLoop, *args, **kwargs):
+        super().__init__(bus, handler, *args, **kwargs)
+        self._loop = loop
+    
+    def _wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            # 事件循环已关闭
+            with self._lock:
+                self._closed = True
+    
+    def _drain(self):
+        if not self._closed:
+            super()._drain()
+    
+    def close(self, drain: bool = False):
+        # 事件循环中的回调无法在这里等待完成，未处理的事件总是被丢弃
+        with self._lock:
+            self._closed = True
+
+
+class EventBus:
+    """
+    倒计时事件总线
+    
+    订阅表采用写时复制：发布时无需加锁，可以在任意线程订阅或取消订阅。
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        # 事件类型 -> 订阅该类型的订阅者
+        self._routes: Dict[str, Tuple[Subscription, ...]] = {}
+    
+    def subscribe(self, handler: EventHandler,
+                  events: Optional[Iterable[str]] = None,
+                  timer_ids: Optional[Iterable[str]] = None,
+                  delivery: str = DELIVERY_SYNC,
+                  loop: asyncio.AbstractEventLoop = None,
+                  max_pending: int = 1024,
+                  overflow: str = OVERFLOW_DROP_OLDEST,
+                  coalesce: bool = True,
+                  snapshot: bool = False) -> Subscription:
+        """
+        订阅事件
+        
+        Args:
+            handler: 事件处理函数，接收 TimerEvent
+            events: 关注的事件类型，为 None 时接收全部类型
+            timer_ids: 只接收这些倒计时的事件，为 None 时不过滤；
+                       过滤时不会收到 changed 等与单个倒计时无关的事件
+            delivery: 投递方式 sync / thread / async
+            loop: async 投递使用的事件循环，为 None 时使用当前运行中的循环
+            max_pending: thread / async 投递时队列的最大长度
+            overflow: 队列满时丢弃最旧（drop_oldest）还是最新（drop_newest）的事件
+            coalesce: 是否合并同一倒计时尚未投递的 tick 事件
+            snapshot: thread / async 投递时是否在发布时复制事件中的倒计时，
+                      处理函数在消费者线程读到的名称、颜色等是发布时的值
+            
+        Returns:
+            订阅对象，可用于取消订阅和查看投递统计
+        """
+        if events is not None:
+            events = tuple(events)
+            unknown = [e for e in events if e not in EVENT_TYPES]
+            if unknown:
+                raise ValueError(f"未知的事件类型: {', '.join(unknown)}")
+        
+        if delivery == DELIVERY_SYNC:
+            subscription = Subscription(self, handler, events, timer_ids)
+        elif delivery == DELIVERY_THREAD:
+            subscription = _ThreadSubscription(self, handler, events, timer_ids,
+                                               max_pending, overflow, coalesce, snapshot)
+        elif delivery == DELIVERY_ASYNC:
+            if loop is None:
+                loop = asyncio.get_running_loop()
+            subscription = _AsyncSubscription(self, handler, loop, events, timer_ids,
+                                              max_pending, overflow, coalesce, snapshot)
+        else:
+            raise ValueError(f"未知的投递方式: {delivery}")
+        
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+            self._rebuild_routes()
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription, drain: bool = False):
+        """
+        取消订阅（重复取消是安全的）
+        
+        Args:
+            subscription: 订阅对象
+            drain: thread 投递时是否先处理完队列中的事件（最多等待 1 秒）
+        """
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+            self._rebuild_routes()
+        subscription.close(drain)
+    
+    def close(self):
+        """取消全部订阅"""
+        for subscription in self._subscriptions:
+            self.unsubscribe(subscription)
+    
+    def has_subscribers(self, event_type: str) -> bool:
+        """是否有订阅者关注该类型的事件"""
+        return bool(self._routes.get(event_type))
+    
+    def publish(self, event_type: str, timer: Timer = None):
+        """
+        发布事件
+        
+        同步订阅者在当前线程依次调用，其中一个出错不影响其他订阅者。
+        """
+        routes = self._routes.get(event_type)
+        if not routes:
+            return
+        event = _new_event(TimerEvent, (event_type, timer, time.time()))
+        timer_id = timer.id if timer is not None else None
+        for subscription in routes:
+            timer_ids = subscription.timer_ids
+            if timer_ids is None or timer_id in timer_ids:
+                try:
+                    subscription.deliver(event)
+                except Exception as e:
+                    print(f"事件处理失败: {e}")
+    
+    def publish_many(self, event_type: str, timers: List[Timer]):
+        """
+        批量发布同一类型的事件
+        
+        滴答时使用：所有事件共用一个时间戳，每个订阅者按顺序依次收到全部事件。
+        """
+        routes = self._routes.get(event_type)
+        if not routes or not timers:
+            return
+        timestamp = time.time()
+        events = [_new_event(TimerEvent, (event_type, timer, timestamp)) for timer in timers]
+        for subscription in routes:
+            deliver = subscription.deliver
+            timer_ids = subscription.timer_ids
+            for event in events:
+                if timer_ids is None or event.timer.id in timer_ids:
+                    try:
+                        deliver(event)
+                    except Exception as e:
+                        print(f"事件处理失败: {e}")
+    
+    def stats(self) -> list:
+        """各订阅的状态"""
+        return [subscription.stats() for subscription in self._subscriptions]
+    
+    def _rebuild_routes(self):
+        """重建事件类型到订阅者的路由表（持有锁时调用）"""
+        self._routes = {
+            event_type: tuple(s for s in self._subscriptions if event_type in s.events)
+            for event_type in EVENT_TYPES
+        }
@@ -0,0 +1,546 @@
+"""
+运行历史 - 记录每个倒计时的开始、暂停、继续、结束、重置，并按天汇总专注时长
+
+事件只追加写入本地 SQLite 数据库（数据目录下的 history.sqlite3）:
+    events       原始事件：时间、倒计时、事件类型、本段运行的秒数
+    daily        每天、每个倒计时、每种颜色的专注秒数、开始次数、完成次数
+    monthly      同上，按月汇总
+    day_totals   每天全部倒计时的合计
+    timers       每个倒计时最近的名称和颜色
+
+一段运行（开始 / 继续 到 暂停 / 结束 / 重置）结束时，在写入事件的同一事务中
+更新各汇总表，跨越零点的运行按天拆分。按倒计时或颜色查询时，整月的部分读
+monthly，首尾不足一个月的部分读 daily，读取的行数与月数成正比而与事件数量无关，
+多年的历史也能在毫秒级返回。
+
+事件由 EventBus 的后台线程投递，写入不会拖慢滴答；提交按时间和数量合并，
+之后没有新事件时由定时器在 COMMIT_INTERVAL 内提交。
+"""
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from models import Timer
+from .event_bus import (
+    TimerEvent, LIFECYCLE_EVENTS, DELIVERY_THREAD,
+    EVENT_START, EVENT_RESUME, EVENT_FINISH,
+)
+
+HISTORY_FILE = "history.sqlite3"
+
+# 未提交的事件达到该数量或距上次提交超过该秒数时提交
+COMMIT_EVENTS = 256
+COMMIT_INTERVAL = 1.0
+
+DayLike = Union[date, str, None]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    timer_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    elapsed REAL NOT NULL DEFAULT 0,
+    name TEXT NOT NULL DEFAULT '',
+    color TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS events_timer_ts ON events (timer_id, ts);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT NOT NULL,
+    timer_id TEXT NOT NULL,
+    color TEXT NOT NULL,
+    focused_seconds REAL NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    finished INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, timer_id, color)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS monthly (
+    month TEXT NOT NULL,
+    timer_id TEXT NOT NULL,
+    color TEXT NOT NULL,
+    focused_seconds REAL NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    finished INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, timer_id, color)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS day_totals (
+    day TEXT PRIMARY KEY,
+    focused_seconds REAL NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    finished INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS timers (
+    timer_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    color TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# 汇总表的累加语句（不使用 UPSERT，兼容较旧的 SQLite）
+_ADD_DAILY = (
+    "INSERT OR IGNORE INTO daily (day, timer_id, color) VALUES (?, ?, ?)",
+    "UPDATE daily SET focused_seconds = focused_seconds + ?, sessions = sessions + ?, "
+    "finished = finished + ? WHERE day = ? AND timer_id = ? AND color = ?",
+)
+_ADD_MONTHLY = (
+    "INSERT OR IGNORE INTO monthly (month, timer_id, color) VALUES (?, ?, ?)",
+    "UPDATE monthly SET focused_seconds = focused_seconds + ?, sessions = sessions + ?, "
+    "finished = finished + ? WHERE month = ? AND timer_id = ? AND color = ?",
+)
+_ADD_DAY_TOTAL = (
+    "INSERT OR IGNORE INTO day_totals (day) VALUES (?)",
+    "UPDATE day_totals SET focused_seconds = focused_seconds + ?, sessions = sessions + ?, "
+    "finished = finished + ? WHERE day = ?",
+)
+
+
+def day_of(timestamp: float) -> str:
+    """时间戳所在的本地日期 YYYY-MM-DD"""
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+
+def split_by_day(started: float, ended: float) -> List[tuple]:
+    """
+    把一段运行按本地零点拆分
+    
+    Returns:
+        [(日期, 秒数), ...]
+    """
+    parts = []
+    while started < ended:
+        midnight = datetime.combine(datetime.fromtimestamp(started).date() + timedelta(days=1),
+                                    datetime.min.time()).timestamp()
+        end = min(ended, midnight)
+        parts.append((day_of(started), end - started))
+        started = end
+    return parts
+
+
+def _day_key(value: DayLike) -> Optional[date]:
+    """查询参数中的日期统一为 date"""
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f"日期格式应为 YYYY-MM-DD: {value}") from None
+
+
+def _month_end(day: date) -> date:
+    """所在月的最后一天"""
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def plan_ranges(start: DayLike, end: DayLike) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    把日期范围拆分为读取 daily 的首尾部分和读取 monthly 的整月部分
+    
+    Returns:
+        [(表名, 下界, 上界), ...]，边界包含在内，None 表示不限
+    """
+    start, end = _day_key(start), _day_key(end)
+    if start is not None and end is not None:
+        if start > end:
+            return []
+        if (start.year, start.month) == (end.year, end.month):
+            if start.day == 1 and end == _month_end(end):
+                month = start.strftime('%Y-%m')
+                return [('monthly', month, month)]
+            return [('daily', str(start), str(end))]
+    
+    ranges = []
+    month_lo = month_hi = None
+    if start is not None:
+        if start.day == 1:
+            month_lo = start.strftime('%Y-%m')
+        else:
+            ranges.append(('daily', str(start), str(_month_end(start))))
+            month_lo = (_month_end(start) + timedelta(days=1)).strftime('%Y-%m')
+    if end is not None:
+        if end == _month_end(end):
+            month_hi = end.strftime('%Y-%m')
+        else:
+            ranges.append(('daily', str(end.replace(day=1)), str(end)))
+            month_hi = (end.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+    if month_lo is None or month_hi is None or month_lo <= month_hi:
+        ranges.append(('monthly', month_lo, month_hi))
+    return ranges
+
+
+def _day_clauses(start: DayLike, end: DayLike) -> tuple:
+    """按天查询的条件和参数（两端都包含）"""
+    clauses = []
+    params = []
+    start, end = _day_key(start), _day_key(end)
+    if start is not None:
+        clauses.append("day >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("day <= ?")
+        params.append(str(end))
+    return clauses, params
+
+
+class SegmentTracker:
+    """
+    跟踪进行中的运行，把生命周期事件转换为汇总增量
+    
+    增量为 (日期, 倒计时 ID, 颜色, 专注秒数, 开始次数, 完成次数)。HistoryLog 把增量
+    写入汇总表，统计面板（services.statistics）把同样的增量累加到内存中。
+    """
+    
+    def __init__(self):
+        # 倒计时 ID -> (本段运行开始的时间戳, 颜色)
+        self._open: Dict[str, Tuple[float, str]] = {}
+    
+    def open_running(self, timers: List[Timer], now: float):
+        """已在运行中的倒计时从 now 开始计时"""
+        for timer in timers:
+            self._open.setdefault(timer.id, (now, timer.color))
+    
+    def open_segments(self) -> List[Tuple[str, float, str]]:
+        """进行中的运行 [(倒计时 ID, 开始时间戳, 颜色), ...]"""
+        return [(timer_id, started, color) for timer_id, (started, color) in self._open.items()]
+    
+    def apply(self, event_type: str, timer_id: str, color: str, ts: float) -> Tuple[float, list]:
+        """
+        处理一个事件
+        
+        Returns:
+            (本段运行的秒数, 增量列表)
+        """
+        elapsed = 0.0
+        increments = []
+        if event_type in (EVENT_START, EVENT_RESUME):
+            self._open.setdefault(timer_id, (ts, color))
+        else:
+            segment = self._open.pop(timer_id, None)
+            if segment is not None and ts > segment[0]:
+                elapsed = ts - segment[0]
+                increments = self._focus(timer_id, color, segment[0], ts)
+        if event_type == EVENT_START:
+            increments.append((day_of(ts), timer_id, color, 0.0, 1, 0))
+        elif event_type == EVENT_FINISH:
+            increments.append((day_of(ts), timer_id, color, 0.0, 0, 1))
+        return elapsed, increments
+    
+    def close_all(self, now: float) -> list:
+        """结束全部进行中的运行，返回增量"""
+        increments = []
+        for timer_id, (started, color) in self._open.items():
+            increments.extend(self._focus(timer_id, color, started, now))
+        self._open.clear()
+        return increments
+    
+    @staticmethod
+    def _focus(timer_id: str, color: str, started: float, ended: float) -> list:
+        """一段运行按天拆分后的专注时长增量"""
+        return [(day, timer_id, color, seconds, 0, 0)
+                for day, seconds in split_by_day(started, ended)]
+
+
+class HistoryLog:
+    """运行历史"""
+    
+    def __init__(self, data_dir: Path = None, path: Path = None):
+        """
+        打开（不存在时创建）历史数据库
+        
+        Args:
+            data_dir: 数据目录，数据库为其中的 history.sqlite3
+            path: 数据库路径，优先于 data_dir；":memory:" 表示只保存在内存中
+        """
+        if path is None:
+            if data_dir is None:
+                raise ValueError("需要 data_dir 或 path")
+            path = Path(data_dir) / HISTORY_FILE
+        self.path = path
+        # 事件在总线的后台线程写入，查询在调用者线程执行，共用一个连接并由锁保护
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        if str(path) != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._tracker = SegmentTracker()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        # 有未提交的事件时等待提交的定时器
+        self._commit_timer: Optional[threading.Timer] = None
+        self._subscription = None
+    
+    # ========== 记录 ==========
+    
+    def attach(self, timer_manager):
+        """
+        订阅倒计时管理器的事件开始记录
+        
+        已在运行中的倒计时（例如从上次的状态恢复）从现在开始计时。程序未运行期间
+        结束的倒计时在加载状态时已经结束，由 record_offline 补记。
+        """
+        self.detach()
+        now = time.time()
+        with self._lock:
+            self._tracker.open_running(timer_manager.get_running_timers(), now)
+        # 生命周期事件不能丢：队列放宽到足以容纳一次批量操作。名称和颜色在后台线程
+        # 写入，按发布时的快照记录
+        self._subscription = timer_manager.events.subscribe(
+            self._on_event, events=LIFECYCLE_EVENTS, delivery=DELIVERY_THREAD,
+            max_pending=1 << 20, snapshot=True
+        )
+    
+    def record_offline(self, runs: Iterable[Tuple[Timer, float, float]]):
+        """
+        补记程序未运行期间结束的倒计时：一段运行和一次结束
+        
+        Args:
+            runs: [(倒计时, 本段运行开始的时间戳, 结束的时间戳), ...]，
+                  见 engine.sync.apply_state 的 offline 参数
+        """
+        with self._lock:
+            for timer, started, ended in runs:
+                self._tracker.apply(EVENT_RESUME, timer.id, timer.color, started)
+                self._record(EVENT_FINISH, timer.id, timer.name, timer.color, ended)
+                self._uncommitted += 1
+            self._commit()
+    
+    def detach(self):
+        """取消订阅，先写完队列中的事件"""
+        if self._subscription is not None:
+            self._subscription.unsubscribe(drain=True)
+            self._subscription = None
+    
+    def close(self):
+        """
+        停止记录并关闭数据库
+        
+        仍在运行的倒计时把到现在为止的时长计入汇总；下次 attach 时重新开始计时。
+        """
+        self.detach()
+        now = time.time()
+        with self._lock:
+            increments = self._tracker.close_all(now)
+            self._apply(increments)
+            self._uncommitted += len(increments)
+            self._commit()
+            self._conn.close()
+    
+    def record(self, event_type: str, timer: Timer, timestamp: float = None):
+        """
+        记录一个事件
+        
+        Args:
+            event_type: 见 event_bus.LIFECYCLE_EVENTS
+            timer: 相关倒计时
+            timestamp: 事件时间，为 None 时使用当前时间
+        """
+        ts = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._record(event_type, timer.id, timer.name, timer.color, ts)
+            self._uncommitted += 1
+            if (self._uncommitted >= COMMIT_EVENTS
+                    or time.monotonic() - self._last_commit >= COMMIT_INTERVAL):
+                self._commit()
+            elif self._commit_timer is None:
+                # 之后没有新事件时也在 COMMIT_INTERVAL 内提交
+                self._commit_timer = threading.Timer(COMMIT_INTERVAL, self.flush)
+                self._commit_timer.daemon = True
+                self._commit_timer.start()
+    
+    def flush(self):
+        """提交尚未写入磁盘的事件"""
+        with self._lock:
+            self._commit()
+    
+    def _on_event(self, event: TimerEvent):
+        """事件总线回调（后台线程）"""
+        self.record(event.type, event.timer, event.timestamp)
+    
+    def _record(self, event_type: str, timer_id: str, name: str, color: str, ts: float):
+        """写入事件并更新汇总（持有锁时调用）"""
+        elapsed, increments = self._tracker.apply(event_type, timer_id, color, ts)
+        conn = self._conn
+        conn.execute(
+            "INSERT INTO events (ts, timer_id, event, elapsed, name, color) VALUES (?, ?, ?, ?, ?, ?)",
+            (ts, timer_id, event_type, elapsed, name, color)
+        )
+        conn.execute("INSERT OR REPLACE INTO timers (timer_id, name, color) VALUES (?, ?, ?)",
+                     (timer_id, name, color))
+        self._apply(increments)
+    
+    def _apply(self, increments: list):
+        """把增量累加到 daily、monthly、day_totals（持有锁时调用）"""
+        conn = self._conn
+        for day, timer_id, color, focused, sessions, finished in increments:
+            values = (focused, sessions, finished)
+            for (insert, update), key in ((_ADD_DAILY, day), (_ADD_MONTHLY, day[:7])):
+                conn.execute(insert, (key, timer_id, color))
+                conn.execute(update, values + (key, timer_id, color))
+            insert, update = _ADD_DAY_TOTAL
+            conn.execute(insert, (day,))
+            conn.execute(update, values + (day,))
+    
+    def _commit(self):
+        """提交事务（持有锁时调用）"""
+        if self._commit_timer is not None:
+            self._commit_timer.cancel()
+            self._commit_timer = None
+        if self._uncommitted:
+            self._conn.commit()
+            self._uncommitted = 0
+        self._last_commit = time.monotonic()
+    
+    # ========== 查询 ==========
+    
+    def _query(self, sql: str, params=()) -> list:
+        """执行查询，先提交未写入的事件"""
+        with self._lock:
+            self._commit()
+            return self._conn.execute(sql, params).fetchall()
+    
+    @staticmethod
+    def _rollup_rows(start: DayLike, end: DayLike,
+                     timer_id: str = None, color: str = None) -> Tuple[str, list]:
+        """日期范围内的汇总行子查询，列为 timer_id, color, focused_seconds, sessions, finished"""
+        selects = []
+        params = []
+        for table, low, high in plan_ranges(start, end):
+            key = 'day' if table == 'daily' else 'month'
+            clauses = []
+            for op, value in ((">=", low), ("<=", high)):
+                if value is not None:
+                    clauses.append(f"{key} {op} ?")
+                    params.append(value)
+            for column, value in (("timer_id", timer_id), ("color", color)):
+                if value is not None:
+                    clauses.append(f"{column} = ?")
+                    params.append(value)
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            selects.append(f"SELECT timer_id, color, focused_seconds, sessions, finished "
+                           f"FROM {table}{where}")
+        if not selects:
+            selects.append("SELECT timer_id, color, focused_seconds, sessions, finished "
+                           "FROM daily WHERE 0")
+        return " UNION ALL ".join(selects), params
+    
+    def total_focused(self, timer_id: str = None, color: str = None,
+                      start: DayLike = None, end: DayLike = None) -> float:
+        """
+        专注总秒数
+        
+        Args:
+            timer_id: 只统计该倒计时
+            color: 只统计该颜色的运行
+            start: 起始日期（包含），date 或 YYYY-MM-DD
+            end: 结束日期（包含）
+        """
+        if timer_id is None and color is None:
+            clauses, params = _day_clauses(start, end)
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            sql = f"SELECT COALESCE(SUM(focused_seconds), 0) FROM day_totals{where}"
+        else:
+            rows, params = self._rollup_rows(start, end, timer_id, color)
+            sql = f"SELECT COALESCE(SUM(focused_seconds), 0) FROM ({rows})"
+        return self._query(sql, params)[0][0]
+    
+    def totals_by_day(self, start: DayLike = None, end: DayLike = None) -> List[dict]:
+        """每天的专注秒数、开始次数、完成次数，按日期排列"""
+        clauses, params = _day_clauses(start, end)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(
+            f"SELECT day, focused_seconds, sessions, finished FROM day_totals{where} ORDER BY day",
+            params
+        )
+        return [
+            {'day': day, 'focused_seconds': seconds, 'sessions': sessions, 'finished': finished}
+            for day, seconds, sessions, finished in rows
+        ]
+    
+    def totals_by_timer(self, start: DayLike = None, end: DayLike = None) -> List[dict]:
+        """每个倒计时的合计，按专注时长降序；名称和颜色为最近一次记录的"""
+        rows, params = self._rollup_rows(start, end)
+        rows = self._query(
+            f"SELECT g.timer_id, t.name, t.color, g.seconds, g.sessions, g.finished FROM ("
+            f"SELECT timer_id, SUM(focused_seconds) AS seconds, SUM(sessions) AS sessions, "
+            f"SUM(finished) AS finished FROM ({rows}) GROUP BY timer_id"
+            f") AS g LEFT JOIN timers AS t ON t.timer_id = g.timer_id ORDER BY g.seconds DESC",
+            params
+        )
+        return [
+            {'timer_id': timer_id, 'name': name or '', 'color': color or '',
+             'focused_seconds': seconds, 'sessions': sessions, 'finished': finished}
+            for timer_id, name, color, seconds, sessions, finished in rows
+        ]
+    
+    def totals_by_color(self, start: DayLike = None, end: DayLike = None) -> List[dict]:
+        """每种颜色的合计（按运行时倒计时的颜色），按专注时长降序"""
+        rows, params = self._rollup_rows(start, end)
+        rows = self._query(
+            f"SELECT color, SUM(focused_seconds), SUM(sessions), SUM(finished) "
+            f"FROM ({rows}) GROUP BY color ORDER BY 2 DESC",
+            params
+        )
+        return [
+            {'color': color, 'focused_seconds': seconds, 'sessions': sessions, 'finished': finished}
+            for color, seconds, sessions, finished in rows
+        ]
+    
+    def query(self, by: str = 'day', start: DayLike = None, end: DayLike = None,
+              timer_id: str = None, limit: int = 100) -> List[dict]:
+        """
+        按名称分派的查询（控制接口的 history 命令使用）
+        
+        Args:
+            by: day / timer / color 为对应的汇总，events 为原始事件
+            start: 起始日期（包含）
+            end: 结束日期（包含）
+            timer_id: events 查询只返回该倒计时的事件
+            limit: events 查询最多返回的条数
+            
+        Raises:
+            ValueError: 未知的查询或日期格式不正确
+        """
+        if by == 'day':
+            return self.totals_by_day(start, end)
+        if by == 'timer':
+            return self.totals_by_timer(start, end)
+        if by == 'color':
+            return self.totals_by_color(start, end)
+        if by == 'events':
+            return self.events(timer_id, limit=limit)
+        raise ValueError(f"未知的历史查询: {by}")
+    
+    def events(self, timer_id: str = None, since: float = None, limit: int = 100) -> List[dict]:
+        """
+        最近的原始事件，按时间倒序
+        
+        Args:
+            timer_id: 只返回该倒计时的事件
+            since: 只返回该时间戳之后的事件
+            limit: 最多返回的条数
+        """
+        clauses = []
+        params = []
+        if timer_id is not None:
+            clauses.append("timer_id = ?")
+            params.append(timer_id)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        rows = self._query(
+            f"SELECT ts, timer_id, event, elapsed, name, color FROM events{where} "
+            f"ORDER BY ts DESC, id DESC LIMIT ?",
+            params
+        )
+        return [
+            {'timestamp': ts, 'timer_id': timer_id, 'event': event, 'elapsed': elapsed,
+             'name': name, 'color': color}
+            for ts, timer_id, event, elapsed, name, color in rows
+        ]
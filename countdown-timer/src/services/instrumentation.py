@@ -0,0 +1,176 @@
+"""
+运行时测量 - 时钟唤醒延迟、滴答处理耗时、结束到提醒的延迟
+
+所有指标都记录在固定大小的直方图中：桶按 2 的幂划分（微秒），记录一次只需
+一次整数运算和数组自增，内存占用与记录次数无关，可以常驻开启。
+"""
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class Histogram:
+    """以 2 的幂为桶边界的固定大小直方图（单位：微秒）"""
+    
+    # 第 i 个桶记录 [2^(i-1), 2^i) 微秒，第 0 个桶记录不足 1 微秒，最后一个桶不设上限
+    BUCKETS = 36
+    
+    __slots__ = ('counts', 'count', 'total_us', 'min_us', 'max_us')
+    
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+    
+    def record(self, seconds: float):
+        """记录一个耗时（秒）"""
+        us = int(seconds * 1000000)
+        if us < 0:
+            us = 0
+        bucket = us.bit_length()
+        if bucket >= self.BUCKETS:
+            bucket = self.BUCKETS - 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_us += us
+        if self.min_us is None or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+    
+    def percentile(self, p: float) -> float:
+        """
+        估算百分位数（毫秒）
+        
+        返回所在桶的上界，因此是一个不低于真实值的估计。
+        """
+        if self.count == 0:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min((1 << bucket) / 1000.0, self.max_us / 1000.0)
+        return self.max_us / 1000.0
+    
+    def to_dict(self) -> dict:
+        """导出为字典"""
+        buckets = {}
+        for bucket, n in enumerate(self.counts):
+            if n:
+                label = f"<{(1 << bucket) / 1000.0:g}ms" if bucket < self.BUCKETS - 1 else "overflow"
+                buckets[label] = n
+        return {
+            'count': self.count,
+            'mean_ms': self.total_us / self.count / 1000.0 if self.count else 0.0,
+            'min_ms': (self.min_us or 0) / 1000.0,
+            'max_ms': self.max_us / 1000.0,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'buckets': buckets,
+        }
+
+
+class Instrumentation:
+    """
+    运行时测量集合
+    
+    指标名称约定:
+        wakeup_lag                时钟实际唤醒时间相对计划时间的延迟
+        tick                      一次滴答的总耗时（含事件处理）
+        tick.publish.<事件>       一次滴答中批量发布某类事件的耗时（含同步订阅者）
+        publish.<事件>            滴答之外（用户操作）发布单个事件的耗时
+        persistence.save          保存状态耗时
+        finish_to_alert           倒计时到期到提示音/通知发出的延迟
+    """
+    
+    def __init__(self, enabled: bool = True):
+        """初始化"""
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._histograms: Dict[str, Histogram] = {}
+    
+    def histogram(self, name: str) -> Histogram:
+        """获取（必要时创建）直方图"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram()
+        return histogram
+    
+    def record(self, name: str, seconds: float):
+        """记录耗时（秒）"""
+        if self.enabled:
+            self.histogram(name).record(seconds)
+    
+    def record_wakeup(self, scheduled: float, actual: float):
+        """
+        记录时钟唤醒延迟
+        
+        Args:
+            scheduled: 计划唤醒时间（time.perf_counter 时钟）
+            actual: 实际唤醒时间
+        """
+        if self.enabled:
+            self.histogram('wakeup_lag').record(actual - scheduled)
+    
+    def reset(self):
+        """清空所有指标"""
+        self._histograms.clear()
+        self.started_at = time.time()
+    
+    def snapshot(self) -> dict:
+        """导出当前所有指标"""
+        return {
+            'enabled': self.enabled,
+            'since': self.started_at,
+            'exported_at': time.time(),
+            'metrics': {name: h.to_dict() for name, h in sorted(self._histograms.items())},
+        }
+    
+    def export_json(self, path: Path) -> bool:
+        """导出为 JSON 文件"""
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            print(f"导出性能统计失败: {e}")
+            return False
+
+
+class TickClock:
+    """
+    计算固定周期时钟的计划唤醒时间
+    
+    QTimer 和 asyncio.sleep 都只保证“不早于”，本类按周期推算每次滴答的计划时间，
+    用于测量唤醒延迟；延迟超过一个周期时重新对齐，不会一直累计。
+    """
+    
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.next_due: Optional[float] = None
+    
+    def start(self, now: float = None):
+        """从当前时间开始计时"""
+        now = time.perf_counter() if now is None else now
+        self.next_due = now + self.interval
+    
+    def tick(self, now: float) -> float:
+        """
+        记录一次唤醒
+        
+        Returns:
+            本次滴答的计划时间
+        """
+        if self.next_due is None:
+            self.next_due = now
+        scheduled = self.next_due
+        self.next_due += self.interval
+        if now - self.next_due > self.interval:
+            self.next_due = now + self.interval
+        return scheduled
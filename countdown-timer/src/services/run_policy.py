@@ -0,0 +1,105 @@
+"""
+运行策略 - 决定同时可以有多少个倒计时在运行
+
+    exclusive   同一时间只运行一个（默认，与旧版本行为一致）
+    unlimited   不限制
+    max:N       最多同时运行 N 个
+    group       同一分组内互斥，未分组的倒计时不受限制
+
+开始一个倒计时后超出限制时，暂停最早开始的倒计时。
+"""
+from dataclasses import dataclass
+from typing import List
+
+from models import Timer
+
+POLICY_EXCLUSIVE = 'exclusive'
+POLICY_UNLIMITED = 'unlimited'
+POLICY_MAX = 'max'
+POLICY_GROUP = 'group'
+POLICY_MODES = (POLICY_EXCLUSIVE, POLICY_UNLIMITED, POLICY_MAX, POLICY_GROUP)
+
+
+@dataclass(frozen=True)
+class RunPolicy:
+    """运行策略"""
+    mode: str = POLICY_EXCLUSIVE
+    max_running: int = 1  # 仅 max 模式使用
+    
+    def __post_init__(self):
+        """校验参数"""
+        if self.mode not in POLICY_MODES:
+            raise ValueError(f"未知的运行策略: {self.mode}")
+        if self.mode == POLICY_MAX and self.max_running < 1:
+            raise ValueError("最多运行数量必须大于 0")
+    
+    @classmethod
+    def parse(cls, text: str) -> 'RunPolicy':
+        """
+        从字符串解析，例如 exclusive、unlimited、group、max:4
+        
+        Raises:
+            ValueError: 格式不正确
+        """
+        mode, _, count = (text or POLICY_EXCLUSIVE).strip().partition(':')
+        if mode == POLICY_MAX:
+            try:
+                return cls(POLICY_MAX, int(count))
+            except ValueError:
+                raise ValueError(f"无效的运行策略: {text}（应为 max:N）") from None
+        if count:
+            raise ValueError(f"无效的运行策略: {text}")
+        return cls(mode)
+    
+    def __str__(self) -> str:
+        if self.mode == POLICY_MAX:
+            return f"{POLICY_MAX}:{self.max_running}"
+        return self.mode
+    
+    def describe(self) -> str:
+        """界面上显示的说明"""
+        if self.mode == POLICY_EXCLUSIVE:
+            return "单个运行"
+        if self.mode == POLICY_UNLIMITED:
+            return "不限制"
+        if self.mode == POLICY_GROUP:
+            return "同组互斥"
+        return f"最多 {self.max_running} 个"
+    
+    def allows(self, count: int) -> bool:
+        """只看数量时，count 个倒计时同时运行是否一定满足策略"""
+        if self.mode == POLICY_UNLIMITED:
+            return True
+        if self.mode == POLICY_MAX:
+            return count <= self.max_running
+        return count <= 1
+    
+    def excess(self, running: List[Timer]) -> List[Timer]:
+        """
+        找出为满足策略需要暂停的倒计时
+        
+        Args:
+            running: 运行中的倒计时，按开始时间从早到晚排列
+            
+        Returns:
+            需要暂停的倒计时，总是保留最近开始的
+        """
+        if self.mode == POLICY_UNLIMITED:
+            return []
+        if self.mode == POLICY_EXCLUSIVE:
+            return running[:-1]
+        if self.mode == POLICY_MAX:
+            return running[:max(0, len(running) - self.max_running)]
+        
+        # 同组互斥：从最近开始的往前看，同组中已经出现过的需要暂停
+        seen = set()
+        excess = []
+        for timer in reversed(running):
+            if not timer.group:
+                continue
+            if timer.group in seen:
+                excess.append(timer)
+            else:
+                seen.add(timer.group)
+        excess.reverse()
+        return excess
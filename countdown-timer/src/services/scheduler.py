@@ -0,0 +1,338 @@
+"""
+调度器 - 决定每次滴答时哪些倒计时需要更新、哪些已经结束
+
+    ListScheduler         每次滴答遍历全部运行中的倒计时并逐个减一秒（默认）。
+                          每个倒计时每秒都会发布 tick 事件，适合图形界面。
+    TimingWheelScheduler  分层时间轮（秒 / 分 / 时三层，更远的放入溢出链表）。
+                          运行中的倒计时只记录到期的滴答序号，剩余时间在读取时才计算，
+                          开始、暂停、到期均摊 O(1)，滴答耗时与运行中的倒计时数量无关；
+                          不发布逐秒的 tick 事件，适合运行大量倒计时的无界面部署。
+
+定时倒计时（闹钟）按墙上时钟的时间戳到期，不随滴答计数，由 AlarmQueue 单独
+按到期时间排序；两种调度器都与它配合使用。
+"""
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+from models import Timer
+
+SCHEDULER_LIST = 'list'
+SCHEDULER_WHEEL = 'wheel'
+SCHEDULER_TYPES = (SCHEDULER_LIST, SCHEDULER_WHEEL)
+
+
+class Scheduler:
+    """调度器基类"""
+    
+    # 滴答时是否为每个运行中的倒计时返回更新（发布 tick 事件）
+    publishes_ticks = True
+    
+    def schedule(self, timer: Timer):
+        """开始调度一个运行中的倒计时（已调度的按当前剩余时间重新调度）"""
+        raise NotImplementedError
+    
+    def unschedule(self, timer: Timer):
+        """停止调度（暂停、重置、删除时调用），会先同步剩余时间"""
+        raise NotImplementedError
+    
+    def advance(self) -> Tuple[List[Timer], List[Timer]]:
+        """
+        推进一秒
+        
+        Returns:
+            (更新的倒计时, 结束的倒计时)；结束的倒计时已停止并不再被调度
+        """
+        raise NotImplementedError
+    
+    def advance_many(self, ticks: int) -> Tuple[List[Timer], List[Timer]]:
+        """
+        一次推进 ticks 秒（休眠后补偿、重启后快进）
+        
+        Returns:
+            (仍在运行的倒计时, 结束的倒计时)；结束的倒计时按到期先后排列
+        """
+        updated: Dict[str, Timer] = {}
+        finished = []
+        for _ in range(ticks):
+            step_updated, step_finished = self.advance()
+            for timer in step_updated:
+                updated[timer.id] = timer
+            for timer in step_finished:
+                updated.pop(timer.id, None)
+                finished.append(timer)
+        return list(updated.values()), finished
+    
+    def sync(self, timer: Timer):
+        """把剩余时间同步到 timer.remaining_seconds"""
+    
+    def sync_all(self):
+        """同步所有被调度的倒计时"""
+    
+    def clear(self):
+        """清空调度"""
+        raise NotImplementedError
+
+
+class ListScheduler(Scheduler):
+    """逐个减一秒的列表调度"""
+    
+    def __init__(self):
+        self._timers: Dict[str, Timer] = {}
+    
+    def schedule(self, timer: Timer):
+        self._timers[timer.id] = timer
+    
+    def unschedule(self, timer: Timer):
+        self._timers.pop(timer.id, None)
+    
+    def advance(self) -> Tuple[List[Timer], List[Timer]]:
+        timers = self._timers
+        updated = []
+        finished = []
+        for timer in list(timers.values()):
+            if timer.tick():
+                finished.append(timer)
+                del timers[timer.id]
+            else:
+                updated.append(timer)
+        return updated, finished
+    
+    def advance_many(self, ticks: int) -> Tuple[List[Timer], List[Timer]]:
+        # 只遍历一次，不逐秒推进
+        timers = self._timers
+        updated = []
+        finished = []
+        for timer in list(timers.values()):
+            if timer.remaining_seconds <= ticks:
+                finished.append(timer)
+                del timers[timer.id]
+            else:
+                timer.remaining_seconds -= ticks
+                updated.append(timer)
+        finished.sort(key=lambda t: t.remaining_seconds)
+        for timer in finished:
+            timer.finish()
+        return updated, finished
+    
+    def clear(self):
+        self._timers.clear()
+
+
+class TimingWheelScheduler(Scheduler):
+    """
+    分层时间轮
+    
+    每个倒计时按到期滴答序号 deadline 放入某一层的槽位：
+        第 0 层  60 个槽，每槽 1 秒     距到期不足 1 分钟
+        第 1 层  60 个槽，每槽 1 分钟   不足 1 小时
+        第 2 层  24 个槽，每槽 1 小时   不足 1 天
+        溢出链表                        1 天及以上
+    时钟走到分钟 / 小时 / 天的边界时，把对应槽位中的倒计时重新放入更低的层（级联），
+    每个倒计时一生最多级联三次（加上每天一次溢出检查），因此均摊 O(1)。
+    """
+    
+    publishes_ticks = False
+    
+    # (槽位数, 每槽秒数)
+    LEVELS = ((60, 1), (60, 60), (24, 3600))
+    # 时间轮覆盖的范围，超出的放入溢出链表
+    SPAN = 86400
+    
+    def __init__(self):
+        # 已推进的滴答数
+        self._now = 0
+        self._wheels: List[List[Dict[str, Timer]]] = [
+            [{} for _ in range(slots)] for slots, _ in self.LEVELS
+        ]
+        self._overflow: Dict[str, Timer] = {}
+        # 倒计时 ID -> (到期滴答序号, 所在槽位)
+        self._entries: Dict[str, Tuple[int, Dict[str, Timer]]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def schedule(self, timer: Timer):
+        # 重新调度时以 timer 当前的剩余时间为准（例如修改了时长）
+        entry = self._entries.pop(timer.id, None)
+        if entry is not None:
+            del entry[1][timer.id]
+        # 剩余 0 秒的运行中倒计时在下一次滴答结束
+        self._insert(timer, self._now + max(1, timer.remaining_seconds))
+    
+    def unschedule(self, timer: Timer):
+        entry = self._entries.pop(timer.id, None)
+        if entry is None:
+            return
+        deadline, slot = entry
+        del slot[timer.id]
+        timer.remaining_seconds = deadline - self._now
+    
+    def advance(self) -> Tuple[List[Timer], List[Timer]]:
+        self._now = now = self._now + 1
+        
+        # 由高到低级联，让落入更低层当前槽位的倒计时在本次滴答中处理
+        if now % self.SPAN == 0:
+            self._cascade(self._overflow)
+        if now % 3600 == 0:
+            self._cascade(self._wheels[2][(now // 3600) % 24])
+        if now % 60 == 0:
+            self._cascade(self._wheels[1][(now // 60) % 60])
+        
+        slot = self._wheels[0][now % 60]
+        if not slot:
+            return [], []
+        finished = list(slot.values())
+        slot.clear()
+        entries = self._entries
+        for timer in finished:
+            del entries[timer.id]
+            timer.finish()
+        return [], finished
+    
+    def advance_many(self, ticks: int) -> Tuple[List[Timer], List[Timer]]:
+        if ticks <= max(60, len(self._entries)):
+            return super().advance_many(ticks)
+        # 跨度较大时直接重建时间轮：取出到期的，其余按新的时刻重新放入，O(运行中的倒计时)
+        target = self._now + ticks
+        entries = sorted(((deadline, slot[timer_id])
+                          for timer_id, (deadline, slot) in self._entries.items()),
+                         key=lambda entry: entry[0])
+        self.clear()
+        self._now = target
+        finished = []
+        for deadline, timer in entries:
+            if deadline <= target:
+                timer.finish()
+                finished.append(timer)
+            else:
+                self._insert(timer, deadline)
+        return [], finished
+    
+    def sync(self, timer: Timer):
+        entry = self._entries.get(timer.id)
+        if entry is not None:
+            timer.remaining_seconds = entry[0] - self._now
+    
+    def sync_all(self):
+        now = self._now
+        for timer_id, (deadline, slot) in self._entries.items():
+            slot[timer_id].remaining_seconds = deadline - now
+    
+    def clear(self):
+        for wheel in self._wheels:
+            for slot in wheel:
+                slot.clear()
+        self._overflow.clear()
+        self._entries.clear()
+    
+    def _insert(self, timer: Timer, deadline: int):
+        """按距到期的时间放入对应的层"""
+        delta = deadline - self._now
+        if delta < 60:
+            slot = self._wheels[0][deadline % 60]
+        elif delta < 3600:
+            slot = self._wheels[1][(deadline // 60) % 60]
+        elif delta < self.SPAN:
+            slot = self._wheels[2][(deadline // 3600) % 24]
+        else:
+            slot = self._overflow
+        slot[timer.id] = timer
+        self._entries[timer.id] = (deadline, slot)
+    
+    def _cascade(self, slot: Dict[str, Timer]):
+        """把槽位中的倒计时重新放入更低的层"""
+        if not slot:
+            return
+        timers = list(slot.values())
+        slot.clear()
+        entries = self._entries
+        for timer in timers:
+            self._insert(timer, entries[timer.id][0])
+
+
+class AlarmQueue:
+    """
+    定时倒计时的到期队列 - 按 Timer.due_at（墙上时钟时间戳）排序的最小堆
+
+    滴答时只需查看堆顶是否到期（O(1)），与定时倒计时的数量无关；引擎空闲时
+    可以一直睡到 next_due()。取消调度时只删除索引，堆中的旧条目在弹出时跳过，
+    旧条目过多时重建堆。
+    """
+    
+    def __init__(self):
+        self._heap: List[Tuple[int, str]] = []
+        # 倒计时 ID -> (到期时间戳, 倒计时)
+        self._entries: Dict[str, Tuple[int, Timer]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def schedule(self, timer: Timer):
+        """按 timer.due_at 调度（已调度的按新的到期时间重新调度）"""
+        self._entries[timer.id] = (timer.due_at, timer)
+        heapq.heappush(self._heap, (timer.due_at, timer.id))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(due, timer_id) for timer_id, (due, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+    
+    def unschedule(self, timer: Timer):
+        """停止调度"""
+        self._entries.pop(timer.id, None)
+    
+    def next_due(self) -> Optional[int]:
+        """最早的到期时间戳，没有定时倒计时时为 None"""
+        heap = self._heap
+        entries = self._entries
+        while heap:
+            due, timer_id = heap[0]
+            entry = entries.get(timer_id)
+            if entry is not None and entry[0] == due:
+                return due
+            heapq.heappop(heap)
+        return None
+    
+    def pop_due(self, now: float) -> List[Timer]:
+        """取出到期时间不晚于 now 的倒计时（按到期时间排列）"""
+        due_timers = []
+        heap = self._heap
+        entries = self._entries
+        while heap and heap[0][0] <= now:
+            due, timer_id = heapq.heappop(heap)
+            entry = entries.get(timer_id)
+            if entry is not None and entry[0] == due:
+                del entries[timer_id]
+                due_timers.append(entry[1])
+        return due_timers
+    
+    def sync(self, timer: Timer, now: float):
+        """按墙上时钟计算剩余时间"""
+        entry = self._entries.get(timer.id)
+        if entry is not None:
+            timer.remaining_seconds = max(0, math.ceil(entry[0] - now))
+    
+    def sync_all(self, now: float) -> List[Timer]:
+        """同步所有定时倒计时的剩余时间，返回这些倒计时"""
+        timers = []
+        for due, timer in self._entries.values():
+            timer.remaining_seconds = max(0, math.ceil(due - now))
+            timers.append(timer)
+        return timers
+    
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+
+
+def create_scheduler(name: str) -> Scheduler:
+    """
+    按名称创建调度器
+    
+    Raises:
+        ValueError: 未知的调度器
+    """
+    if name == SCHEDULER_LIST:
+        return ListScheduler()
+    if name == SCHEDULER_WHEEL:
+        return TimingWheelScheduler()
+    raise ValueError(f"未知的调度器: {name}")
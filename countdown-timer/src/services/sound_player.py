@@ -3,19 +3,119 @@
 """
 import os
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
+
+
+class SoundCache:
+    """
+    按内存占用限制大小的 LRU 声音缓存
+    
+    缓存条目按最近使用顺序排列，总占用超过上限时淘汰最久未使用的条目。
+    所有操作都在锁内完成，可以被后台预加载线程并发访问。
+    """
+    
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        初始化缓存
+        
+        Args:
+            max_bytes: 缓存允许占用的最大字节数
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def total_bytes(self) -> int:
+        """当前缓存占用的字节数"""
+        return self._total_bytes
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return path in self._entries
+    
+    def get(self, path: str):
+        """获取缓存的声音，命中时将其移到最近使用位置"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, path: str, sound, size: int):
+        """放入声音并按需淘汰旧条目"""
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            
+            # 单个文件超过上限时不缓存，避免把其他条目全部挤掉
+            if size > self.max_bytes:
+                return
+            
+            self._entries[path] = (sound, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def stats(self) -> dict:
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
 
 
 class SoundPlayer:
     """声音播放器"""
     
-    def __init__(self):
-        """初始化声音播放器"""
+    def __init__(self, cache_max_bytes: int = 32 * 1024 * 1024):
+        """
+        初始化声音播放器
+        
+        Args:
+            cache_max_bytes: 声音缓存的内存上限（字节）
+        """
         self._volume = 0.7
         self._enabled = True
         self._pygame_initialized = False
-        self._sound_cache = {}
+        # pygame 不可用或初始化失败后不再重试（预加载每秒都会调用）
+        self._pygame_failed = False
+        self._sound_cache = SoundCache(cache_max_bytes)
+        
+        # 后台预加载；_preload_lock 同时保护 pygame 的初始化
+        self._preload_lock = threading.Lock()
+        self._preload_pending: 'OrderedDict[str, None]' = OrderedDict()
+        self._preload_thread: Optional[threading.Thread] = None
+        # 无法放入缓存的路径（文件不存在、超过缓存上限、解码失败），不再预加载，
+        # 倒计时的提示音被修改时由 forget_failed 清除
+        self._preload_failed: set = set()
     
     @property
     def volume(self) -> float:
@@ -38,21 +138,127 @@ class SoundPlayer:
         self._enabled = value
     
     def _init_pygame(self):
-        """初始化 pygame mixer"""
-        if self._pygame_initialized:
-            return True
+        """初始化 pygame mixer（预加载线程和播放都会调用，在锁内进行；失败后不再重试）"""
+        with self._preload_lock:
+            if self._pygame_initialized:
+                return True
+            if self._pygame_failed:
+                return False
+            
+            try:
+                import pygame
+                pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+                self._pygame_initialized = True
+                return True
+            except ImportError:
+                print("pygame 未安装，声音功能不可用")
+            except Exception as e:
+                print(f"pygame 初始化失败: {e}")
+            self._pygame_failed = True
+            return False
+    
+    @property
+    def cache(self) -> SoundCache:
+        """声音缓存"""
+        return self._sound_cache
+    
+    def _estimate_sound_size(self, sound, sound_path: str) -> int:
+        """
+        估算解码后声音占用的内存
         
+        pygame 会把音频解码成 PCM 数据，因此按 时长 × 采样率 × 声道 × 采样字节数
+        计算；无法获取时退回到文件大小。
+        """
         try:
             import pygame
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-            self._pygame_initialized = True
-            return True
-        except ImportError:
-            print("pygame 未安装，声音功能不可用")
-            return False
-        except Exception as e:
-            print(f"pygame 初始化失败: {e}")
-            return False
+            mixer_info = pygame.mixer.get_init()
+            if mixer_info:
+                frequency, size, channels = mixer_info
+                return int(sound.get_length() * frequency * channels * (abs(size) // 8))
+        except Exception:
+            pass
+        try:
+            return os.path.getsize(sound_path)
+        except OSError:
+            return 0
+    
+    def _load_sound(self, sound_path: str):
+        """通过缓存加载 pygame 声音对象"""
+        sound = self._sound_cache.get(sound_path)
+        if sound is not None:
+            return sound
+        
+        import pygame
+        sound = pygame.mixer.Sound(sound_path)
+        self._sound_cache.put(sound_path, sound, self._estimate_sound_size(sound, sound_path))
+        return sound
+    
+    def preload(self, sound_paths: Iterable[str]):
+        """
+        在后台线程中预加载声音文件
+        
+        已缓存、已在队列中或上次无法放入缓存的路径会被忽略，因此可以频繁调用。
+        
+        Args:
+            sound_paths: 按优先级排列的声音文件路径，None 或空字符串表示默认提示音
+        """
+        if not self._enabled or self._pygame_failed:
+            return
+        
+        queued = False
+        with self._preload_lock:
+            for sound_path in sound_paths:
+                if not sound_path:
+                    sound_path = self._get_default_sound()
+                if (not sound_path or sound_path in self._preload_pending
+                        or sound_path in self._preload_failed
+                        or sound_path in self._sound_cache):
+                    continue
+                self._preload_pending[sound_path] = None
+                queued = True
+            
+            if queued and (self._preload_thread is None or not self._preload_thread.is_alive()):
+                self._preload_thread = threading.Thread(
+                    target=self._preload_worker, name="sound-preload", daemon=True
+                )
+                self._preload_thread.start()
+    
+    def _preload_worker(self):
+        """预加载线程：依次加载队列中的声音"""
+        if not self._init_pygame():
+            with self._preload_lock:
+                self._preload_pending.clear()
+            return
+        
+        while True:
+            with self._preload_lock:
+                if not self._preload_pending:
+                    self._preload_thread = None
+                    return
+                sound_path, _ = self._preload_pending.popitem(last=False)
+            
+            try:
+                if os.path.exists(sound_path):
+                    self._load_sound(sound_path)
+            except Exception as e:
+                print(f"预加载声音失败: {e}")
+            if sound_path not in self._sound_cache:
+                # 不存在、解码失败或超过缓存上限：之后的滴答不再重复尝试
+                with self._preload_lock:
+                    self._preload_failed.add(sound_path)
+    
+    def forget_failed(self, sound_path: str = None):
+        """
+        清除预加载失败的记录（倒计时的提示音被修改时调用），之后重新尝试预加载
+        
+        Args:
+            sound_path: 只清除该路径（空字符串表示默认提示音），为 None 时全部清除
+        """
+        with self._preload_lock:
+            if sound_path is None:
+                self._preload_failed.clear()
+            else:
+                self._preload_failed.discard(sound_path or self._get_default_sound())
     
     def play_sound(self, sound_path: str = None) -> bool:
         """
@@ -78,13 +284,7 @@ class SoundPlayer:
         # 尝试使用 pygame 播放
         if self._init_pygame():
             try:
-                import pygame
-                if sound_path in self._sound_cache:
-                    sound = self._sound_cache[sound_path]
-                else:
-                    sound = pygame.mixer.Sound(sound_path)
-                    self._sound_cache[sound_path] = sound
-                
+                sound = self._load_sound(sound_path)
                 sound.set_volume(self._volume)
                 sound.play()
                 return True
@@ -142,9 +342,14 @@ class SoundPlayer:
         except Exception:
             return False
     
-    def play_timer_finished(self) -> bool:
-        """播放倒计时结束提示音"""
-        return self.play_sound()
+    def play_timer_finished(self, sound_path: str = None) -> bool:
+        """
+        播放倒计时结束提示音
+        
+        Args:
+            sound_path: 倒计时自定义的提示音，为空时使用默认提示音
+        """
+        return self.play_sound(sound_path or None)
     
     def stop_all(self):
         """停止所有声音"""
@@ -157,6 +362,8 @@ class SoundPlayer:
     
     def cleanup(self):
         """清理资源"""
+        with self._preload_lock:
+            self._preload_pending.clear()
         self._sound_cache.clear()
         if self._pygame_initialized:
             try:
@@ -0,0 +1,190 @@
+"""
+统计面板的数据 - 在内存中增量维护每天的合计、各颜色的合计和连续天数
+
+启动时从运行历史的汇总表读取一次，之后只按 TimerManager 的生命周期事件累加
+（与 HistoryLog 使用同一个 SegmentTracker 把事件转换为增量）。snapshot() 只读取
+最近 DAYS 天和进行中的运行，打开统计面板的耗时与历史长短无关。
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .event_bus import TimerEvent, LIFECYCLE_EVENTS
+from .history import SegmentTracker, split_by_day
+
+# 专注时长达到该秒数的日子计入连续天数
+STREAK_MIN_SECONDS = 60
+
+
+def _next_day(day: str) -> str:
+    """YYYY-MM-DD 的下一天"""
+    return str(datetime.strptime(day, '%Y-%m-%d').date() + timedelta(days=1))
+
+
+@dataclass
+class StatisticsSnapshot:
+    """统计面板显示的数据"""
+    # 今天的专注秒数、开始次数、完成次数
+    today_seconds: float = 0.0
+    today_sessions: int = 0
+    today_finished: int = 0
+    # 累计专注秒数
+    total_seconds: float = 0.0
+    # 最近的每一天 [(YYYY-MM-DD, 专注秒数), ...]，从早到晚
+    days: List[Tuple[str, float]] = field(default_factory=list)
+    # 各颜色的累计专注秒数 [(颜色, 秒数), ...]，按秒数降序
+    colors: List[Tuple[str, float]] = field(default_factory=list)
+    # 截至今天的连续天数（今天还没有专注时算到昨天为止）和最长连续天数
+    current_streak: int = 0
+    longest_streak: int = 0
+
+
+class StatisticsAggregator:
+    """统计面板数据的增量维护"""
+    
+    # snapshot 中每天合计的天数
+    DAYS = 14
+    
+    def __init__(self):
+        # 日期 -> [专注秒数, 开始次数, 完成次数]
+        self._days: Dict[str, list] = {}
+        # 颜色 -> 专注秒数
+        self._colors: Dict[str, float] = {}
+        self._total = 0.0
+        # 最近一段连续天数的最后一天和长度
+        self._streak_last: Optional[str] = None
+        self._streak_length = 0
+        self._longest_streak = 0
+        self._tracker = SegmentTracker()
+        self._subscription = None
+        # 每次累加后递增，界面据此判断是否需要重绘
+        self.version = 0
+    
+    def seed(self, history):
+        """
+        从运行历史的汇总表读取已有的合计（启动时调用一次）
+        
+        Args:
+            history: services.history.HistoryLog
+        """
+        for row in history.totals_by_day():
+            self._days[row['day']] = [row['focused_seconds'], row['sessions'], row['finished']]
+            self._total += row['focused_seconds']
+            if row['focused_seconds'] >= STREAK_MIN_SECONDS:
+                self._mark_active(row['day'])
+        for row in history.totals_by_color():
+            self._colors[row['color']] = row['focused_seconds']
+        self.version += 1
+    
+    def attach(self, timer_manager):
+        """订阅倒计时管理器的事件，已在运行中的倒计时从现在开始计时"""
+        self.detach()
+        self._tracker.open_running(timer_manager.get_running_timers(),
+                                   datetime.now().timestamp())
+        self._subscription = timer_manager.events.subscribe(self._on_event,
+                                                            events=LIFECYCLE_EVENTS)
+    
+    def detach(self):
+        """取消订阅"""
+        if self._subscription is not None:
+            self._subscription.unsubscribe()
+            self._subscription = None
+    
+    def has_running(self) -> bool:
+        """是否有进行中的运行（界面需要逐秒刷新）"""
+        return bool(self._tracker.open_segments())
+    
+    def _on_event(self, event: TimerEvent):
+        """生命周期事件"""
+        timer = event.timer
+        _, increments = self._tracker.apply(event.type, timer.id, timer.color, event.timestamp)
+        self._apply(increments)
+    
+    def _apply(self, increments: list):
+        """累加增量"""
+        for day, _, color, focused, sessions, finished in increments:
+            totals = self._days.get(day)
+            if totals is None:
+                totals = self._days[day] = [0.0, 0, 0]
+            was_active = totals[0] >= STREAK_MIN_SECONDS
+            totals[0] += focused
+            totals[1] += sessions
+            totals[2] += finished
+            if focused:
+                self._colors[color] = self._colors.get(color, 0.0) + focused
+                self._total += focused
+            if not was_active and totals[0] >= STREAK_MIN_SECONDS:
+                self._mark_active(day)
+        if increments:
+            self.version += 1
+    
+    def _mark_active(self, day: str):
+        """
+        某天的专注时长达到了阈值
+        
+        日期按时间顺序到达（种子按日期排序，事件按发生顺序），只需与上一段连续天数的
+        最后一天比较。
+        """
+        if self._streak_last is not None and day <= self._streak_last:
+            return
+        if self._streak_last is not None and day == _next_day(self._streak_last):
+            self._streak_length += 1
+        else:
+            self._streak_length = 1
+        self._streak_last = day
+        self._longest_streak = max(self._longest_streak, self._streak_length)
+    
+    def snapshot(self, now: float = None, days: int = None) -> StatisticsSnapshot:
+        """
+        当前的统计数据，包含进行中的运行到现在为止的时长
+        
+        只读取最近 days 天和进行中的运行，耗时与历史长短无关。
+        """
+        now = datetime.now().timestamp() if now is None else now
+        days = days or self.DAYS
+        today = datetime.fromtimestamp(now).date()
+        keys = [str(today - timedelta(days=offset)) for offset in range(days - 1, -1, -1)]
+        
+        # 进行中的运行尚未计入累加结果，按天拆分后临时加上
+        live_days: Dict[str, float] = {}
+        live_colors: Dict[str, float] = {}
+        live_total = 0.0
+        for _, started, color in self._tracker.open_segments():
+            for day, seconds in split_by_day(started, now):
+                live_days[day] = live_days.get(day, 0.0) + seconds
+                live_colors[color] = live_colors.get(color, 0.0) + seconds
+                live_total += seconds
+        
+        def day_seconds(day: str) -> float:
+            totals = self._days.get(day)
+            return (totals[0] if totals else 0.0) + live_days.get(day, 0.0)
+        
+        today_key = keys[-1]
+        today_totals = self._days.get(today_key, (0.0, 0, 0))
+        colors = dict(self._colors)
+        for color, seconds in live_colors.items():
+            colors[color] = colors.get(color, 0.0) + seconds
+        
+        current, longest = self._streaks(today, day_seconds(today_key) >= STREAK_MIN_SECONDS)
+        return StatisticsSnapshot(
+            today_seconds=day_seconds(today_key),
+            today_sessions=today_totals[1],
+            today_finished=today_totals[2],
+            total_seconds=self._total + live_total,
+            days=[(day, day_seconds(day)) for day in keys],
+            colors=sorted(colors.items(), key=lambda item: item[1], reverse=True),
+            current_streak=current,
+            longest_streak=longest,
+        )
+    
+    def _streaks(self, today: date, today_active: bool) -> Tuple[int, int]:
+        """(截至今天的连续天数, 最长连续天数)"""
+        last, length = self._streak_last, self._streak_length
+        today_key = str(today)
+        yesterday_key = str(today - timedelta(days=1))
+        if today_active and last != today_key:
+            # 今天只有进行中的运行达到了阈值
+            length = length + 1 if last == yesterday_key else 1
+            last = today_key
+        current = length if last in (today_key, yesterday_key) else 0
+        return current, max(self._longest_streak, length)
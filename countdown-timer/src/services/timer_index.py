@@ -0,0 +1,156 @@
+"""
+倒计时的内存索引 - 按名称、颜色和状态筛选
+
+TimerManager 在倒计时增删以及名称、颜色、状态变化时增量维护三种索引，筛选时
+只查索引，不遍历全部倒计时:
+
+    状态  status -> {ID}
+    颜色  颜色（大写）-> {ID}
+    名称  名称（忽略大小写）中每个 1～3 个字的片段 -> {ID}
+
+名称按子串匹配：不超过 3 个字的关键字直接查片段索引，一次字典查找；更长的关键字
+取其中所有三字片段的索引求交集作为候选，再逐个确认包含整个关键字。
+"""
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from models import Timer
+
+# 名称索引的最长片段（字数）
+GRAM_SIZE = 3
+
+_EMPTY = frozenset()
+
+
+def _fold(name: str) -> str:
+    """名称的比较形式（忽略大小写）"""
+    return name.casefold()
+
+
+def _grams(text: str) -> Set[str]:
+    """text 中所有 1～GRAM_SIZE 个字的片段"""
+    grams = set()
+    for size in range(1, GRAM_SIZE + 1):
+        grams.update(text[i:i + size] for i in range(len(text) - size + 1))
+    return grams
+
+
+class TimerIndex:
+    """按名称片段、颜色和状态索引倒计时 ID"""
+    
+    def __init__(self):
+        # ID -> (名称, 颜色, 状态)：上次索引时的值，用于判断变化和从旧的桶中移除
+        self._entries: Dict[str, Tuple[str, str, str]] = {}
+        self._statuses: Dict[str, Set[str]] = {}
+        self._colors: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        # ID -> 名称的比较形式，长关键字确认候选时使用
+        self._names: Dict[str, str] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, timer_id: str) -> bool:
+        return timer_id in self._entries
+    
+    def clear(self):
+        """清空索引"""
+        self._entries.clear()
+        self._statuses.clear()
+        self._colors.clear()
+        self._grams.clear()
+        self._names.clear()
+    
+    def rebuild(self, timers: Iterable[Timer]):
+        """按 timers 重建索引"""
+        self.clear()
+        for timer in timers:
+            self.update(timer)
+    
+    def update(self, timer: Timer):
+        """
+        让索引与 timer 当前的名称、颜色和状态一致（未索引的加入）
+        
+        没有变化时只比较一次，滴答等频繁的更新几乎没有开销。
+        """
+        entry = (timer.name, timer.color, timer.status)
+        old = self._entries.get(timer.id)
+        if old == entry:
+            return
+        timer_id = timer.id
+        self._entries[timer_id] = entry
+        if old is None:
+            old = (None, None, None)
+        if old[0] != entry[0]:
+            folded = _fold(entry[0])
+            old_grams = _grams(self._names[timer_id]) if old[0] is not None else set()
+            new_grams = _grams(folded)
+            _discard_all(self._grams, old_grams - new_grams, timer_id)
+            for gram in new_grams - old_grams:
+                self._grams.setdefault(gram, set()).add(timer_id)
+            self._names[timer_id] = folded
+        if old[1] != entry[1]:
+            if old[1] is not None:
+                _discard_all(self._colors, (old[1].upper(),), timer_id)
+            self._colors.setdefault(entry[1].upper(), set()).add(timer_id)
+        if old[2] != entry[2]:
+            if old[2] is not None:
+                _discard_all(self._statuses, (old[2],), timer_id)
+            self._statuses.setdefault(entry[2], set()).add(timer_id)
+    
+    def discard(self, timer_id: str):
+        """从索引中移除（未索引的忽略）"""
+        entry = self._entries.pop(timer_id, None)
+        if entry is None:
+            return
+        _discard_all(self._grams, _grams(self._names.pop(timer_id)), timer_id)
+        _discard_all(self._colors, (entry[1].upper(),), timer_id)
+        _discard_all(self._statuses, (entry[2],), timer_id)
+    
+    def search(self, text: str = "", color: Optional[str] = None,
+               status: Optional[str] = None) -> Set[str]:
+        """
+        筛选倒计时
+        
+        Args:
+            text: 名称中包含的文字（忽略大小写），空字符串表示不限
+            color: 颜色，None 表示不限
+            status: 状态（stopped / running / paused），None 表示不限
+            
+        Returns:
+            同时满足所有条件的倒计时 ID（新的集合，调用者可以修改）
+        """
+        candidates = []
+        if status is not None:
+            candidates.append(self._statuses.get(status, _EMPTY))
+        if color is not None:
+            candidates.append(self._colors.get(color.upper(), _EMPTY))
+        key = _fold(text)
+        if key and len(key) <= GRAM_SIZE:
+            candidates.append(self._grams.get(key, _EMPTY))
+        elif key:
+            # 候选是包含关键字所有三字片段的倒计时，最后再确认包含整个关键字
+            candidates.extend(self._grams.get(key[i:i + GRAM_SIZE], _EMPTY)
+                              for i in range(len(key) - GRAM_SIZE + 1))
+        if not candidates:
+            return set(self._entries)
+        # 从最小的集合开始求交集
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            if not result:
+                break
+            result &= ids
+        if len(key) > GRAM_SIZE:
+            names = self._names
+            result = {timer_id for timer_id in result if key in names[timer_id]}
+        return result
+
+
+def _discard_all(buckets: Dict[str, Set[str]], keys: Iterable[str], timer_id: str):
+    """从 buckets[key] 中移除 timer_id，清空的桶一并删除"""
+    for key in keys:
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.discard(timer_id)
+            if not bucket:
+                del buckets[key]
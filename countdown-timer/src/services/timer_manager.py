@@ -1,53 +1,164 @@
 """
 倒计时管理器 - 管理所有倒计时的核心逻辑
 """
-from typing import List, Callable, Optional
-from models import Timer
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+from models import Timer, Sequence, parse_schedule
+from utils.profiling import PROFILER
+from .event_bus import (
+    EventBus, EVENT_TICK, EVENT_FINISH, EVENT_CHANGED,
+    EVENT_START, EVENT_PAUSE, EVENT_RESUME, EVENT_RESET,
+)
+from .clock_watch import ClockGap, SLEEP_COUNT, SLEEP_POLICIES
+from .instrumentation import Instrumentation
+from .run_policy import RunPolicy
+from .scheduler import Scheduler, ListScheduler, AlarmQueue
+from .timer_index import TimerIndex
 
 
 class TimerManager:
     """倒计时管理器"""
     
-    def __init__(self):
-        """初始化管理器"""
+    def __init__(self, instrumentation: Instrumentation = None,
+                 run_policy: RunPolicy = None,
+                 scheduler: Scheduler = None):
+        """
+        初始化管理器
+        
+        Args:
+            instrumentation: 运行时测量，为 None 时不测量
+            run_policy: 运行策略，为 None 时同一时间只运行一个倒计时
+            scheduler: 调度器，为 None 时使用逐秒更新的 ListScheduler；
+                       大量倒计时的无界面部署可使用 TimingWheelScheduler（见 services.scheduler）
+        """
         self._timers: List[Timer] = []
-        self._on_timer_update: Optional[Callable[[Timer], None]] = None
-        self._on_timer_finished: Optional[Callable[[Timer], None]] = None
-        self._on_timers_changed: Optional[Callable[[], None]] = None
+        # ID -> 倒计时
+        self._index: Dict[str, Timer] = {}
+        # 按名称片段、颜色和状态的筛选索引（见 find_timers），随增删和事件通知增量更新
+        self._search = TimerIndex()
+        # 运行中的倒计时，按开始时间从早到晚排列
+        self._running: Dict[str, Timer] = {}
+        # 决定每次滴答更新和结束哪些运行中的倒计时
+        self._scheduler = scheduler if scheduler is not None else ListScheduler()
+        # 定时倒计时（闹钟）按墙上时钟的到期时间排序，不计入运行中的倒计时，
+        # 也不受运行策略限制
+        self._alarms = AlarmQueue()
+        # 墙上时钟（时间戳），测试时可替换
+        self.wall_clock = time.time
+        # 序列 ID -> 序列；进行中的序列另按当前步骤的倒计时 ID 索引，滴答时 O(1) 查找
+        self._sequences: Dict[str, Sequence] = {}
+        self._active_steps: Dict[str, Sequence] = {}
+        self._run_policy = run_policy or RunPolicy()
+        # 系统休眠的时间是否计入运行中的倒计时（见 services.clock_watch）
+        self._sleep_policy = SLEEP_COUNT
+        # 倒计时事件：tick（每秒更新）、finish（结束）、changed（列表变化），
+        # 以及运行状态的变化 start / pause / resume / reset
+        self.events = EventBus()
+        self.instrumentation = instrumentation
+        # batch() 的嵌套层数；批量操作期间事件暂存，结束时合并发布
+        self._batch_depth = 0
+        self._batch_updated: Dict[str, Timer] = {}
+        self._batch_changed = False
+        # 加载时把运行中的倒计时回拨到同一时刻，catch_up() 再一次性补上的秒数
+        self._restore_lag = 0
     
     @property
     def timers(self) -> List[Timer]:
-        """获取所有倒计时"""
+        """获取所有倒计时（运行中倒计时的剩余时间已同步；只需要数量时用 get_timer_count）"""
+        self._scheduler.sync_all()
+        if self._alarms:
+            self._alarms.sync_all(self.wall_clock())
         return self._timers
     
-    def set_callbacks(self, on_timer_update: Callable[[Timer], None] = None,
-                      on_timer_finished: Callable[[Timer], None] = None,
-                      on_timers_changed: Callable[[], None] = None):
-        """设置回调函数"""
-        self._on_timer_update = on_timer_update
-        self._on_timer_finished = on_timer_finished
-        self._on_timers_changed = on_timers_changed
+    def timers_with_deadlines(self) -> List[Timer]:
+        """
+        获取所有倒计时，运行中的普通倒计时同时按墙上时钟写入结束时间 due_at
+        
+        保存和导出时使用：重启或导入时据 due_at 恢复剩余时间。
+        """
+        timers = self.timers
+        now = int(self.wall_clock())
+        for timer in self._running.values():
+            timer.due_at = now + timer.remaining_seconds
+        return timers
+    
+    @property
+    def scheduler(self) -> Scheduler:
+        """调度器"""
+        return self._scheduler
+    
+    @property
+    def run_policy(self) -> RunPolicy:
+        """运行策略"""
+        return self._run_policy
+    
+    def set_run_policy(self, policy: RunPolicy) -> List[Timer]:
+        """
+        设置运行策略，超出新限制的倒计时会被暂停
+        
+        Returns:
+            被暂停的倒计时
+        """
+        self._run_policy = policy
+        paused = self._enforce_run_policy()
+        for timer in paused:
+            self._notify_timer_update(timer)
+        return paused
+    
+    @property
+    def sleep_policy(self) -> str:
+        """休眠策略：count（休眠时间计入倒计时）或 pause（不计入）"""
+        return self._sleep_policy
+    
+    def set_sleep_policy(self, policy: str):
+        """
+        设置休眠策略
+        
+        Raises:
+            ValueError: 未知的策略
+        """
+        if policy not in SLEEP_POLICIES:
+            raise ValueError(f"未知的休眠策略: {policy}（支持 {' / '.join(SLEEP_POLICIES)}）")
+        self._sleep_policy = policy
     
-    def add_timer(self, name: str, duration_seconds: int, color: str) -> Timer:
+    def add_timer(self, name: str, duration_seconds: int, color: str,
+                  sound_path: str = "", group: str = "", schedule: str = "") -> Timer:
         """
         添加新的倒计时
         
         Args:
             name: 倒计时名称
-            duration_seconds: 时长（秒）
+            duration_seconds: 时长（秒），定时倒计时忽略此项
             color: 颜色
+            sound_path: 自定义提示音路径，空字符串表示默认提示音
+            group: 分组，空字符串表示未分组
+            schedule: 定时计划（见 models.schedule），非空时添加后立即开启
             
         Returns:
             新创建的倒计时
+            
+        Raises:
+            ValueError: 计划格式错误或计划的时间已过
         """
+        if schedule and parse_schedule(schedule).next_due(self.wall_clock()) is None:
+            raise ValueError(f"计划的时间已过: {schedule}")
         timer = Timer(
             name=name,
             duration_seconds=duration_seconds,
             remaining_seconds=duration_seconds,
             color=color,
-            position=len(self._timers)
+            position=len(self._timers),
+            sound_path=sound_path,
+            group=group,
+            schedule=schedule
         )
         self._timers.append(timer)
+        self._index[timer.id] = timer
+        if schedule:
+            self._arm(timer)
+        self._search.update(timer)
         self._notify_timers_changed()
         return timer
     
@@ -64,6 +175,14 @@ class TimerManager:
         for i, timer in enumerate(self._timers):
             if timer.id == timer_id:
                 self._timers.pop(i)
+                del self._index[timer_id]
+                self._alarms.unschedule(timer)
+                self._remove_from_sequences(timer_id)
+                if self._remove_running(timer):
+                    # 删除运行中的倒计时视为暂停，历史记录据此结束这段运行
+                    self._notify_lifecycle(EVENT_PAUSE, timer)
+                # 在最后一次通知之后移出筛选索引
+                self._search.discard(timer_id)
                 # 更新位置
                 for j, t in enumerate(self._timers):
                     t.position = j
@@ -71,34 +190,261 @@ class TimerManager:
                 return True
         return False
     
+    @contextmanager
+    def batch(self):
+        """
+        批量修改上下文
+        
+        期间每个倒计时的更新事件只保留一次，列表变化事件合并为一个，
+        在最外层的 batch 结束时一并发布。订阅者（界面重建、保存）因此
+        每批只处理一次:
+            with manager.batch():
+                for name, seconds in items:
+                    manager.add_timer(name, seconds, color)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_batch()
+    
+    def add_many(self, items: Iterable[dict]) -> List[Timer]:
+        """
+        批量添加倒计时
+        
+        Args:
+            items: 每项为 add_timer 的参数，如 {'name': ..., 'duration_seconds': ...,
+                   'color': ..., 'sound_path': ..., 'group': ...}
+            
+        Returns:
+            新创建的倒计时
+        """
+        with self.batch():
+            return [self.add_timer(**item) for item in items]
+    
+    def insert_timers(self, timers: Iterable[Timer],
+                      notify_changed: bool = True) -> List[Timer]:
+        """
+        把已有的倒计时实例追加到列表末尾（导入时使用）
+        
+        与现有倒计时 ID 重复的会分配新 ID；运行中的倒计时继续运行，
+        超出运行策略限制时按顺序暂停较早的。
+        
+        Args:
+            timers: 倒计时实例
+            notify_changed: 为 False 时不发布列表变化事件，分批插入的调用者在最后
+                            调用 notify_changed() 发布一次
+        
+        Returns:
+            追加的倒计时
+        """
+        added = []
+        with self.batch():
+            for timer in timers:
+                while timer.id in self._index:
+                    timer.id = Timer().id
+                timer.position = len(self._timers)
+                self._timers.append(timer)
+                self._index[timer.id] = timer
+                if timer.is_running() and timer.is_scheduled():
+                    self._load_alarm(timer)
+                elif timer.is_running():
+                    self._apply_deadline(timer)
+                    self._add_running(timer)
+                    self._notify_lifecycle(EVENT_START, timer)
+                self._search.update(timer)
+                added.append(timer)
+            if added:
+                for paused in self._enforce_run_policy():
+                    self._notify_timer_update(paused)
+                if notify_changed:
+                    self._notify_timers_changed()
+        return added
+    
+    def notify_changed(self):
+        """发布列表变化事件（分批插入结束后由调用者发布，见 insert_timers）"""
+        self._notify_timers_changed()
+    
+    def remove_many(self, timer_ids: Iterable[str]) -> int:
+        """
+        批量删除倒计时，不存在的 ID 被忽略
+        
+        Returns:
+            删除的数量
+        """
+        removing = {timer_id for timer_id in timer_ids if timer_id in self._index}
+        if not removing:
+            return 0
+        with self.batch():
+            for timer_id in removing:
+                timer = self._index.pop(timer_id)
+                self._alarms.unschedule(timer)
+                self._remove_from_sequences(timer_id)
+                if self._remove_running(timer):
+                    self._notify_lifecycle(EVENT_PAUSE, timer)
+                self._search.discard(timer_id)
+                self._batch_updated.pop(timer_id, None)
+            # 只遍历并重新编号一次，逐个 remove_timer 是 O(n²)
+            self._timers = [t for t in self._timers if t.id not in removing]
+            for i, t in enumerate(self._timers):
+                t.position = i
+            self._notify_timers_changed()
+        return len(removing)
+    
+    def merge_timers(self, incoming: Iterable[Timer], removed: Iterable[str] = ()) -> List[Timer]:
+        """
+        合并其他进程保存的修改（见 engine.sync），只处理有变化的倒计时
+        
+        已有的倒计时原地更新为 incoming 中的内容（保持同一个实例，界面卡片不重建），
+        运行状态的变化发布对应的 start / pause / resume / reset 事件；新的倒计时按
+        文件中的位置插入。列表成员或顺序有变化时才发布 changed 事件。
+        
+        Args:
+            incoming: 新增或修改的倒计时
+            removed: 被删除的倒计时 ID
+            
+        Returns:
+            更新或新增的倒计时
+        """
+        merged = []
+        with self.batch():
+            membership_changed = self.remove_many(removed) > 0
+            for source in incoming:
+                timer = self._index.get(source.id)
+                if timer is None:
+                    timer = source
+                    self._timers.append(timer)
+                    self._index[timer.id] = timer
+                    previous = "stopped"
+                    membership_changed = True
+                else:
+                    self._alarms.unschedule(timer)
+                    self._remove_running(timer)
+                    previous = timer.status
+                    if timer.position != source.position:
+                        membership_changed = True
+                    for name in Timer.FIELDS:
+                        setattr(timer, name, getattr(source, name))
+                self._apply_external_status(timer, previous)
+                merged.append(timer)
+            for paused in self._enforce_run_policy():
+                self._notify_timer_update(paused)
+            if membership_changed:
+                # 合并后按文件中的位置排序，本进程新增、尚未保存的保持相对顺序
+                self._timers.sort(key=lambda t: t.position)
+                for i, t in enumerate(self._timers):
+                    t.position = i
+                self._notify_timers_changed()
+        return merged
+    
+    def _apply_external_status(self, timer: Timer, previous: str):
+        """按合并进来的状态重新登记调度，并发布运行状态的变化"""
+        if timer.is_scheduled():
+            if timer.is_running():
+                self._load_alarm(timer)
+            self._notify_timer_update(timer)
+            return
+        if timer.is_running():
+            self._apply_deadline(timer)
+            self._add_running(timer)
+            if previous == "stopped":
+                self._notify_lifecycle(EVENT_START, timer)
+            elif previous == "paused":
+                self._notify_lifecycle(EVENT_RESUME, timer)
+        else:
+            timer.due_at = 0
+            sequence = self._active_steps.get(timer.id)
+            if sequence is not None and not timer.is_paused():
+                # 其他进程停止了序列的当前步骤，序列也随之停止
+                self._deactivate(sequence)
+            if previous == "running":
+                self._notify_lifecycle(
+                    EVENT_PAUSE if timer.is_paused() else EVENT_RESET, timer)
+        self._notify_timer_update(timer)
+    
+    def _apply_deadline(self, timer: Timer):
+        """按保存的结束时间设置运行中倒计时的剩余时间（已过了结束时间的在下一次滴答结束）"""
+        if timer.due_at:
+            timer.remaining_seconds = max(1, math.ceil(timer.due_at - self.wall_clock()))
+            timer.due_at = 0
+    
+    def start_many(self, timer_ids: Iterable[str]) -> int:
+        """
+        批量开始倒计时（按给出的顺序开始，超出运行策略时暂停最早开始的）
+        
+        Returns:
+            开始的数量
+        """
+        with self.batch():
+            return sum(1 for timer_id in timer_ids if self.start_timer(timer_id))
+    
+    def pause_all(self) -> int:
+        """
+        暂停所有运行中的倒计时（已开启的定时倒计时不受影响）
+        
+        Returns:
+            暂停的数量
+        """
+        running = list(self._running.values())
+        with self.batch():
+            for timer in running:
+                self.pause_timer(timer.id)
+        return len(running)
+    
+    def reset_many(self, timer_ids: Iterable[str]) -> int:
+        """
+        批量重置倒计时
+        
+        Returns:
+            重置的数量
+        """
+        with self.batch():
+            return sum(1 for timer_id in timer_ids if self.reset_timer(timer_id))
+    
     def get_timer(self, timer_id: str) -> Optional[Timer]:
         """根据ID获取倒计时"""
-        for timer in self._timers:
-            if timer.id == timer_id:
-                return timer
-        return None
+        timer = self._index.get(timer_id)
+        if timer is not None:
+            self._scheduler.sync(timer)
+            if timer.due_at:
+                self._alarms.sync(timer, self.wall_clock())
+        return timer
     
     def get_running_timer(self) -> Optional[Timer]:
-        """获取当前正在运行的倒计时"""
-        for timer in self._timers:
-            if timer.is_running():
-                return timer
-        return None
+        """获取最近开始的运行中倒计时"""
+        if not self._running:
+            return None
+        return next(reversed(self._running.values()))
+    
+    def get_running_timers(self) -> List[Timer]:
+        """获取所有运行中的倒计时（按开始时间排列）"""
+        return list(self._running.values())
     
     def start_timer(self, timer_id: str) -> bool:
         """
         开始倒计时
-        注意：同一时间只能有一个倒计时运行，会自动暂停其他正在运行的倒计时
+        注意：超出运行策略的限制时，会自动暂停最早开始的倒计时
         """
         timer = self.get_timer(timer_id)
+        if timer and timer.is_scheduled():
+            if not timer.is_running():
+                self._arm(timer)
+            self._notify_timer_update(timer)
+            return True
         if timer:
-            # 先暂停其他正在运行的倒计时
-            running_timer = self.get_running_timer()
-            if running_timer and running_timer.id != timer_id:
-                running_timer.pause()
-                self._notify_timer_update(running_timer)
-            
+            previous = timer.status
             timer.start()
+            if timer.is_running():
+                # 重新开始的倒计时也移到最后，视为最近开始
+                self._add_running(timer)
+                if previous == "stopped":
+                    self._notify_lifecycle(EVENT_START, timer)
+                elif previous == "paused":
+                    self._notify_lifecycle(EVENT_RESUME, timer)
+                for paused in self._enforce_run_policy():
+                    self._notify_timer_update(paused)
             self._notify_timer_update(timer)
             return True
         return False
@@ -106,8 +452,17 @@ class TimerManager:
     def pause_timer(self, timer_id: str) -> bool:
         """暂停倒计时"""
         timer = self.get_timer(timer_id)
+        if timer and timer.is_scheduled():
+            if timer.is_running():
+                self._disarm(timer)
+                timer.pause()
+            self._notify_timer_update(timer)
+            return True
         if timer:
-            timer.pause()
+            self._remove_running(timer)
+            if timer.is_running():
+                timer.pause()
+                self._notify_lifecycle(EVENT_PAUSE, timer)
             self._notify_timer_update(timer)
             return True
         return False
@@ -115,8 +470,19 @@ class TimerManager:
     def resume_timer(self, timer_id: str) -> bool:
         """继续倒计时"""
         timer = self.get_timer(timer_id)
+        if timer and timer.is_scheduled():
+            # 定时倒计时继续时从现在起计算下一次触发
+            if timer.is_paused():
+                self._arm(timer)
+            self._notify_timer_update(timer)
+            return True
         if timer:
             timer.resume()
+            if timer.is_running() and timer_id not in self._running:
+                self._add_running(timer)
+                self._notify_lifecycle(EVENT_RESUME, timer)
+                for paused in self._enforce_run_policy():
+                    self._notify_timer_update(paused)
             self._notify_timer_update(timer)
             return True
         return False
@@ -124,61 +490,541 @@ class TimerManager:
     def reset_timer(self, timer_id: str) -> bool:
         """重置倒计时"""
         timer = self.get_timer(timer_id)
+        if timer and timer.is_scheduled():
+            self._disarm(timer)
+            timer.reset()
+            self._notify_timer_update(timer)
+            return True
         if timer:
+            self._remove_running(timer)
+            # 手动重置序列的当前步骤视为停止该序列
+            sequence = self._active_steps.pop(timer_id, None)
+            if sequence is not None:
+                sequence.active = False
+            previous = timer.status
             timer.reset()
+            if previous != "stopped":
+                self._notify_lifecycle(EVENT_RESET, timer)
             self._notify_timer_update(timer)
             return True
         return False
     
+    @property
+    def sequences(self) -> List[Sequence]:
+        """所有序列"""
+        return list(self._sequences.values())
+    
+    def get_sequence(self, sequence_id: str) -> Optional[Sequence]:
+        """根据ID获取序列"""
+        return self._sequences.get(sequence_id)
+    
+    def add_sequence(self, name: str, steps: Iterable[str], loops: int = 1) -> Sequence:
+        """
+        添加序列
+        
+        Args:
+            name: 名称
+            steps: 依次运行的倒计时 ID（可以重复）
+            loops: 循环次数，0 表示无限循环
+            
+        Returns:
+            新创建的序列
+            
+        Raises:
+            ValueError: 没有步骤、倒计时不存在或是定时倒计时
+        """
+        steps = list(steps)
+        if not steps:
+            raise ValueError("序列至少需要一个步骤")
+        for timer_id in steps:
+            timer = self._index.get(timer_id)
+            if timer is None:
+                raise ValueError(f"倒计时不存在: {timer_id}")
+            if timer.is_scheduled():
+                raise ValueError(f"定时倒计时不能加入序列: {timer.name}")
+        sequence = Sequence(name=name, steps=steps, loops=loops)
+        self._sequences[sequence.id] = sequence
+        self._notify_timers_changed()
+        return sequence
+    
+    def remove_sequence(self, sequence_id: str) -> bool:
+        """删除序列（倒计时本身不受影响）"""
+        sequence = self._sequences.pop(sequence_id, None)
+        if sequence is None:
+            return False
+        self._deactivate(sequence)
+        self._notify_timers_changed()
+        return True
+    
+    def start_sequence(self, sequence_id: str) -> bool:
+        """从第一步开始运行序列，第一步的倒计时会被重置"""
+        sequence = self._sequences.get(sequence_id)
+        if sequence is None:
+            return False
+        self._deactivate(sequence)
+        timer_id = sequence.begin()
+        if timer_id is not None:
+            self._activate(sequence)
+            self._start_step(self._index[timer_id])
+        return True
+    
+    def stop_sequence(self, sequence_id: str) -> bool:
+        """停止序列，当前步骤的倒计时继续运行，结束后不再开始下一步"""
+        sequence = self._sequences.get(sequence_id)
+        if sequence is None:
+            return False
+        self._deactivate(sequence)
+        return True
+    
+    def load_sequences(self, sequences: Iterable[dict]):
+        """加载序列（在 load_timers 之后调用），不存在的倒计时从步骤中移除"""
+        self._sequences = {}
+        self._active_steps = {}
+        for data in sequences:
+            try:
+                sequence = Sequence.from_dict(data)
+            except (TypeError, ValueError) as e:
+                print(f"加载序列失败: {e}")
+                continue
+            for timer_id in set(sequence.steps) - self._index.keys():
+                sequence.remove_step(timer_id)
+            self._sequences[sequence.id] = sequence
+            if sequence.current_id() is not None:
+                self._activate(sequence)
+    
+    def _activate(self, sequence: Sequence):
+        """按当前步骤登记进行中的序列（同一倒计时同时只属于一个进行中的序列）"""
+        timer_id = sequence.current_id()
+        other = self._active_steps.get(timer_id)
+        if other is not None and other is not sequence:
+            other.active = False
+        self._active_steps[timer_id] = sequence
+    
+    def _deactivate(self, sequence: Sequence):
+        """停止序列"""
+        timer_id = sequence.current_id()
+        if timer_id is not None and self._active_steps.get(timer_id) is sequence:
+            del self._active_steps[timer_id]
+        sequence.active = False
+    
+    def _remove_from_sequences(self, timer_id: str):
+        """删除倒计时时从所有序列的步骤中移除"""
+        if not self._sequences:
+            return
+        self._active_steps.pop(timer_id, None)
+        for sequence in self._sequences.values():
+            sequence.remove_step(timer_id)
+    
+    def _start_step(self, timer: Timer):
+        """重置并开始序列的一步"""
+        previous = timer.status
+        self._remove_running(timer)
+        if previous != "stopped":
+            self._notify_lifecycle(EVENT_RESET, timer)
+        timer.reset()
+        timer.start()
+        self._add_running(timer)
+        self._notify_lifecycle(EVENT_START, timer)
+        for paused in self._enforce_run_policy():
+            self._notify_timer_update(paused)
+        self._notify_timer_update(timer)
+    
+    def _advance_sequences(self, finished: List[Timer]):
+        """
+        结束的倒计时是进行中序列的当前步骤时，在同一次滴答中开始下一步
+        
+        下一步与结束的一步在同一次滴答中开始调度，从上一步的到期时刻起计时，
+        步骤之间没有间隔，也不需要界面参与。
+        """
+        # 先取出全部再开始下一步，避免刚开始的一步被同一批结束的倒计时误判为结束
+        advancing = [self._active_steps.pop(timer.id) for timer in finished
+                     if timer.id in self._active_steps]
+        for sequence in advancing:
+            timer_id = sequence.advance()
+            if timer_id is not None:
+                self._activate(sequence)
+                self._start_step(self._index[timer_id])
+    
+    def _enforce_run_policy(self) -> List[Timer]:
+        """暂停超出运行策略限制的倒计时，返回被暂停的倒计时"""
+        # 大量倒计时同时运行时避免每次开始都复制整个运行列表
+        if self._run_policy.allows(len(self._running)):
+            return []
+        excess = self._run_policy.excess(list(self._running.values()))
+        for timer in excess:
+            self._remove_running(timer)
+            timer.pause()
+            self._notify_lifecycle(EVENT_PAUSE, timer)
+        return excess
+    
+    def _add_running(self, timer: Timer):
+        """登记为运行中并开始调度（已登记的移到最近开始的位置）"""
+        self._running.pop(timer.id, None)
+        self._running[timer.id] = timer
+        self._scheduler.schedule(timer)
+    
+    def _arm(self, timer: Timer, due_at: int = None) -> bool:
+        """
+        开启定时倒计时：计算下一次触发时间并加入到期队列
+        
+        时长记为从现在到触发的秒数，用于显示进度。
+        
+        Returns:
+            是否开启（计划不再触发时为 False）
+        """
+        now = self.wall_clock()
+        if due_at is None:
+            due_at = parse_schedule(timer.schedule).next_due(now)
+        if due_at is None:
+            return False
+        timer.due_at = due_at
+        timer.duration_seconds = timer.remaining_seconds = max(1, math.ceil(due_at - now))
+        timer.start()
+        self._alarms.schedule(timer)
+        return True
+    
+    def _disarm(self, timer: Timer):
+        """关闭定时倒计时"""
+        self._alarms.unschedule(timer)
+        timer.due_at = 0
+    
+    def _load_alarm(self, timer: Timer):
+        """
+        加载时恢复已开启的定时倒计时
+        
+        保存的触发时间已过（程序未运行、系统休眠）时保留原时间，下一次滴答补发一次。
+        """
+        try:
+            parse_schedule(timer.schedule)
+        except ValueError as e:
+            print(f"加载定时计划失败: {e}")
+            timer.schedule = ""
+            timer.due_at = 0
+            timer.stop()
+            return
+        if timer.due_at > 0:
+            self._alarms.schedule(timer)
+        elif not self._arm(timer):
+            timer.stop()
+    
+    def _fire_alarms(self, now: float) -> List[Timer]:
+        """
+        触发到期的定时倒计时：重复的计划重新开启，其余的停止
+        
+        休眠或时钟向前跳变错过的多次触发只补发一次，下一次从现在算起。
+        """
+        fired = self._alarms.pop_due(now)
+        for timer in fired:
+            timer.due_at = 0
+            if not (parse_schedule(timer.schedule).recurring and self._arm(timer)):
+                timer.finish()
+            self._search.update(timer)
+        return fired
+    
+    def next_alarm_due(self) -> Optional[int]:
+        """下一个定时倒计时的触发时间戳，没有已开启的定时倒计时时为 None"""
+        return self._alarms.next_due()
+    
+    def check_alarms(self) -> List[Timer]:
+        """
+        触发已到期的定时倒计时并发布 finish 事件
+        
+        tick() 已包含此检查，引擎空闲（没有运行中的倒计时、不滴答）时调用。
+        """
+        fired = self._fire_alarms(self.wall_clock())
+        if fired:
+            self.events.publish_many(EVENT_FINISH, fired)
+        return fired
+    
+    def _remove_running(self, timer: Timer) -> bool:
+        """取消运行登记，调度器会把剩余时间同步到 timer；返回之前是否在运行"""
+        if self._running.pop(timer.id, None) is not None:
+            self._scheduler.unschedule(timer)
+            timer.due_at = 0
+            return True
+        return False
+    
     def update_timer(self, timer_id: str, name: str = None, 
-                     duration_seconds: int = None, color: str = None) -> bool:
+                     duration_seconds: int = None, color: str = None,
+                     sound_path: str = None, group: str = None,
+                     schedule: str = None) -> bool:
         """
         更新倒计时设置
         
         Args:
             timer_id: 倒计时ID
             name: 新名称
-            duration_seconds: 新时长
+            duration_seconds: 新时长（定时倒计时忽略此项；已开始的保留已经过的时间）
             color: 新颜色
+            sound_path: 新提示音路径
+            group: 新分组
+            schedule: 新的定时计划；设置计划后立即开启，清空后变为停止的普通倒计时
             
         Returns:
             是否更新成功
+            
+        Raises:
+            ValueError: 计划格式错误
         """
         timer = self.get_timer(timer_id)
         if timer:
+            if schedule:
+                parse_schedule(schedule)
             if name is not None:
                 timer.name = name
-            if duration_seconds is not None:
-                timer.duration_seconds = duration_seconds
-                timer.remaining_seconds = duration_seconds
+            if schedule is not None and schedule != timer.schedule:
+                self._change_schedule(timer, schedule)
+            if (duration_seconds is not None and duration_seconds != timer.duration_seconds
+                    and not timer.is_scheduled()):
+                # 只在时长改变时调整剩余时间，已开始的保留已经过的时间
+                timer.set_duration(duration_seconds)
+                if timer.is_running():
+                    self._scheduler.schedule(timer)
             if color is not None:
                 timer.color = color
+            if sound_path is not None:
+                timer.sound_path = sound_path
+            if group is not None and group != timer.group:
+                timer.group = group
+                if timer.is_running():
+                    # 加入的分组中可能已有运行中的倒计时，保留刚修改的这个
+                    self._add_running(timer)
+                    for paused in self._enforce_run_policy():
+                        self._notify_timer_update(paused)
             self._notify_timer_update(timer)
             self._notify_timers_changed()
             return True
         return False
     
+    def _change_schedule(self, timer: Timer, schedule: str):
+        """修改定时计划"""
+        if timer.is_scheduled():
+            self._disarm(timer)
+        elif self._remove_running(timer):
+            self._notify_lifecycle(EVENT_PAUSE, timer)
+        timer.schedule = schedule
+        if not (schedule and self._arm(timer)):
+            timer.reset()
+    
     def tick(self):
         """
         时钟滴答 - 每秒调用一次
         检查所有运行中的倒计时并更新
+        
+        先更新全部倒计时，再批量发布 tick 和 finish 事件。
         """
-        for timer in self._timers:
-            if timer.is_running():
-                finished = timer.tick()
+        instrumentation = self.instrumentation
+        if instrumentation is not None and instrumentation.enabled:
+            started = time.perf_counter()
+        else:
+            instrumentation = None
+        
+        if self._restore_lag:
+            self.catch_up()
+        running = self._running
+        with PROFILER.span('tick', timers=len(running)):
+            updated, finished = self._scheduler.advance()
+            for timer in finished:
+                del running[timer.id]
+                timer.due_at = 0
+                self._search.update(timer)
+            if self._alarms:
+                # 只查看堆顶，与定时倒计时的数量无关；按墙上时钟比较，时钟跳变或休眠后
+                # 到期的在醒来后的第一次滴答触发
+                now = self.wall_clock()
+                fired = self._fire_alarms(now)
+                if fired:
+                    finished = finished + fired
+                if self._scheduler.publishes_ticks:
+                    updated = updated + self._alarms.sync_all(now)
+            
+            if instrumentation is None and not PROFILER.active:
+                self.events.publish_many(EVENT_TICK, updated)
                 if finished:
-                    self._notify_timer_finished(timer)
-                else:
+                    self.events.publish_many(EVENT_FINISH, finished)
+            else:
+                self._invoke('tick.publish.tick', self.events.publish_many, EVENT_TICK, updated)
+                if finished:
+                    self._invoke('tick.publish.finish', self.events.publish_many,
+                                 EVENT_FINISH, finished)
+            
+            if finished and self._active_steps:
+                self._advance_sequences(finished)
+        
+        if instrumentation is not None:
+            instrumentation.record('tick', time.perf_counter() - started)
+    
+    def fast_forward(self, seconds: int) -> List[Timer]:
+        """
+        把运行中的倒计时一次性推进 seconds 秒（补上错过的滴答或休眠的时间）
+        
+        调度器只遍历一次运行中的倒计时，期间结束的倒计时与一次滴答中结束的一样
+        合并为一次 finish 事件发布。有进行中的序列时按步骤分段推进，下一步仍从
+        上一步的到期时刻开始计时。
+        
+        Returns:
+            结束的倒计时
+        """
+        finished = []
+        left = seconds
+        running = self._running
+        with self.batch():
+            while left > 0 and running:
+                step = left
+                if self._active_steps:
+                    step = self._next_step_remaining(step)
+                updated, step_finished = self._scheduler.advance_many(step)
+                left -= step
+                for timer in updated:
                     self._notify_timer_update(timer)
+                if not step_finished:
+                    continue
+                for timer in step_finished:
+                    del running[timer.id]
+                    timer.due_at = 0
+                    self._search.update(timer)
+                self.events.publish_many(EVENT_FINISH, step_finished)
+                finished.extend(step_finished)
+                if self._active_steps:
+                    self._advance_sequences(step_finished)
+        return finished
+    
+    def _next_step_remaining(self, limit: int) -> int:
+        """进行中序列的当前步骤最早在几秒后结束（不超过 limit）"""
+        for timer_id in self._active_steps:
+            timer = self._running.get(timer_id)
+            if timer is not None:
+                self._scheduler.sync(timer)
+                limit = min(limit, max(1, timer.remaining_seconds))
+        return limit
+    
+    def reconcile(self, gap: ClockGap) -> List[Timer]:
+        """
+        系统休眠或墙上时钟调整后一次性校正所有倒计时
+        
+        休眠策略为 count 时把休眠的时间补到运行中的倒计时上（见 fast_forward），
+        为 pause 时倒计时从休眠前的位置继续。定时倒计时总是按墙上时钟：醒来后补发
+        已到期的，时钟被调整后其余的按新的时间重新计算下一次触发。
+        
+        Returns:
+            结束的倒计时
+        """
+        finished = []
+        if gap.suspended and self._sleep_policy == SLEEP_COUNT:
+            finished = self.fast_forward(round(gap.suspended))
+        finished += self.check_alarms()
+        if gap.wall_jump and self._alarms:
+            with self.batch():
+                for timer in self._alarms.sync_all(self.wall_clock()):
+                    self._arm(timer)
+                    self._notify_timer_update(timer)
+        return finished
     
     def load_timers(self, timers: List[Timer]):
-        """加载倒计时列表"""
+        """
+        加载倒计时列表，超出运行策略限制的倒计时会被暂停
+        
+        运行中的倒计时按保存的结束时间恢复：程序未运行期间已经结束的不在这里直接
+        停止，而是由 catch_up() 一次性补上（加载序列之后调用，序列因此能按步骤接续）。
+        """
         self._timers = timers
+        self._index = {timer.id: timer for timer in timers}
+        self._running = {}
+        self._scheduler.clear()
+        self._alarms.clear()
+        self._restore_lag = 0
+        for timer in timers:
+            if timer.is_running() and timer.is_scheduled():
+                self._load_alarm(timer)
+            elif timer.is_running():
+                self._add_running(timer)
+        self._enforce_run_policy()
+        self._search.rebuild(timers)
+        self._restore_deadlines()
         self._notify_timers_changed()
     
+    def _restore_deadlines(self):
+        """
+        按保存的结束时间设置运行中倒计时的剩余时间（一次遍历）
+        
+        都还没到结束时间时直接设为距结束的秒数。有已经过了结束时间的，把所有运行中的
+        倒计时回拨到最早的结束时间之前一秒，回拨的秒数记为 _restore_lag，由 catch_up()
+        按时间顺序推进回来。没有结束时间的（旧版本保存的状态）保持原来的剩余时间。
+        """
+        running = list(self._running.values())
+        deadlines = [timer.due_at for timer in running if timer.due_at]
+        if not deadlines:
+            return
+        now = int(self.wall_clock())
+        base = min(now, min(deadlines) - 1)
+        for timer in running:
+            if timer.due_at:
+                timer.remaining_seconds = timer.due_at - base
+                timer.due_at = 0
+            else:
+                timer.remaining_seconds += now - base
+            self._scheduler.schedule(timer)
+        self._restore_lag = now - base
+    
+    def catch_up(self) -> List[Timer]:
+        """
+        补上程序未运行期间的时间（在 load_timers 和 load_sequences 之后调用）
+        
+        期间结束的倒计时合并为一次 finish 事件发布，进行中的序列按步骤接续。
+        没有调用时在下一次滴答中自动补上。
+        
+        Returns:
+            结束的倒计时
+        """
+        lag, self._restore_lag = self._restore_lag, 0
+        return self.fast_forward(lag) if lag > 0 else []
+    
+    def get_upcoming_timers(self, within_seconds: int) -> List[Timer]:
+        """
+        获取即将结束的运行中倒计时（包括即将触发的定时倒计时）
+        
+        Args:
+            within_seconds: 剩余时间不超过该值的倒计时视为即将结束
+            
+        Returns:
+            按剩余时间升序排列的倒计时列表
+        """
+        self._scheduler.sync_all()
+        upcoming = [t for t in self._running.values()
+                    if t.remaining_seconds <= within_seconds]
+        next_due = self._alarms.next_due()
+        if next_due is not None:
+            now = self.wall_clock()
+            if next_due - now <= within_seconds:
+                upcoming.extend(t for t in self._alarms.sync_all(now)
+                                if t.remaining_seconds <= within_seconds)
+        upcoming.sort(key=lambda t: t.remaining_seconds)
+        return upcoming
+    
+    def find_timers(self, text: str = "", color: str = None, status: str = None) -> List[Timer]:
+        """
+        按名称、颜色和状态筛选倒计时（查索引，不遍历全部倒计时）
+        
+        Args:
+            text: 名称中包含的文字（忽略大小写），空字符串表示不限
+            color: 颜色，None 表示不限
+            status: 状态（stopped / running / paused），None 表示不限
+            
+        Returns:
+            按 position 排列的倒计时
+        """
+        index = self._index
+        found = [index[timer_id] for timer_id in self._search.search(text, color, status)]
+        found.sort(key=lambda t: t.position)
+        return found
+    
+    def get_timer_count(self) -> int:
+        """倒计时总数（不同步剩余时间）"""
+        return len(self._timers)
+    
     def get_running_count(self) -> int:
         """获取运行中的倒计时数量"""
-        return sum(1 for t in self._timers if t.is_running())
+        return len(self._running)
     
     def reorder_timers(self, old_index: int, new_index: int) -> bool:
         """
@@ -221,17 +1067,45 @@ class TimerManager:
         self._notify_timers_changed()
         return True
     
+    def _invoke(self, name: str, func, *args):
+        """调用函数；开启剖析时记录 span，开启测量时把耗时记录为 name"""
+        started = time.perf_counter()
+        with PROFILER.span(name):
+            func(*args)
+        if self.instrumentation is not None:
+            self.instrumentation.record(name, time.perf_counter() - started)
+    
     def _notify_timer_update(self, timer: Timer):
-        """通知倒计时更新"""
-        if self._on_timer_update:
-            self._on_timer_update(timer)
+        """通知倒计时更新（名称、颜色或状态变化时同步筛选索引）"""
+        self._search.update(timer)
+        if self._batch_depth:
+            self._batch_updated[timer.id] = timer
+            return
+        self._invoke('publish.tick', self.events.publish, EVENT_TICK, timer)
     
-    def _notify_timer_finished(self, timer: Timer):
-        """通知倒计时结束"""
-        if self._on_timer_finished:
-            self._on_timer_finished(timer)
+    def _notify_lifecycle(self, event_type: str, timer: Timer):
+        """
+        通知运行状态变化
+        
+        不受 batch() 影响立即发布，保证同一倒计时的 start / pause 等事件按发生顺序送达。
+        """
+        self._search.update(timer)
+        self.events.publish(event_type, timer)
     
     def _notify_timers_changed(self):
         """通知倒计时列表变化"""
-        if self._on_timers_changed:
-            self._on_timers_changed()
+        if self._batch_depth:
+            self._batch_changed = True
+            return
+        self._invoke('publish.changed', self.events.publish, EVENT_CHANGED)
+    
+    def _flush_batch(self):
+        """发布批量修改期间暂存的事件"""
+        updated = [timer for timer in self._batch_updated.values() if timer.id in self._index]
+        changed = self._batch_changed
+        self._batch_updated = {}
+        self._batch_changed = False
+        if updated:
+            self._invoke('publish.tick', self.events.publish_many, EVENT_TICK, updated)
+        if changed:
+            self._notify_timers_changed()
@@ -0,0 +1,151 @@
+"""
+多倒计时管理器 - 命令行控制工具
+
+通过本地控制接口操作正在运行的应用或无界面引擎，例如:
+    python src/timerctl.py list
+    python src/timerctl.py add 番茄钟 1500 --start
+    python src/timerctl.py add 站会 --schedule "weekdays 09:30"
+    python src/timerctl.py sequence add 番茄钟 ab12cd34 ef56ab78 --loops 4 --start
+    python src/timerctl.py pause ab12cd34
+    python src/timerctl.py pause-all
+    python src/timerctl.py import timers.csv
+    python src/timerctl.py watch --events finish
+    python src/timerctl.py profile start --sink chrome --path trace.json
+"""
+import argparse
+import json
+import sys
+import os
+
+# 添加 src 目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data import resolve_data_dir
+from ipc import CommandError, ControlClient, default_socket_path
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="多倒计时管理器控制工具")
+    parser.add_argument("--data-dir", default=None, help="自定义数据目录")
+    parser.add_argument("--socket", default=None, help="控制套接字路径")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    
+    sub.add_parser("ping", help="检查服务是否在运行")
+    sub.add_parser("list", help="列出所有倒计时")
+    sub.add_parser("stats", help="导出时钟延迟与处理耗时统计")
+    
+    add = sub.add_parser("add", help="添加倒计时")
+    add.add_argument("name")
+    add.add_argument("duration_seconds", type=int, nargs="?", default=None,
+                     help="时长（秒），使用 --schedule 时可省略")
+    add.add_argument("--color", default=None)
+    add.add_argument("--group", default=None, help="分组（用于同组互斥策略）")
+    add.add_argument("--start", action="store_true", help="添加后立即开始")
+    add.add_argument("--schedule", default=None,
+                     help="定时计划，如 \"at 14:30\"、\"daily 07:00\"、\"weekdays 09:00\"、"
+                          "\"cron 0 9 * * 1-5\"")
+    
+    for name, help_text in (("get", "查看倒计时"), ("start", "开始倒计时"),
+                            ("pause", "暂停倒计时"), ("resume", "继续倒计时"),
+                            ("reset", "重置倒计时"), ("remove", "删除倒计时")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("id")
+    
+    for name, help_text in (("start-many", "批量开始倒计时"), ("reset-many", "批量重置倒计时"),
+                            ("remove-many", "批量删除倒计时")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("ids", nargs="+")
+    sub.add_parser("pause-all", help="暂停所有运行中的倒计时")
+    
+    for name, help_text in (("import", "从 CSV / JSONL 文件导入倒计时"),
+                            ("export", "把倒计时导出为 CSV / JSONL 文件")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("path")
+        cmd.add_argument("--format", choices=("csv", "jsonl"), default=None,
+                         help="文件格式，省略时按后缀判断")
+    
+    history = sub.add_parser("history", help="查询运行历史")
+    history.add_argument("--by", choices=("day", "timer", "color", "events"), default="day",
+                         help="按天 / 倒计时 / 颜色汇总，或列出原始事件")
+    history.add_argument("--from", dest="start", default=None, help="起始日期 YYYY-MM-DD")
+    history.add_argument("--to", dest="end", default=None, help="结束日期 YYYY-MM-DD")
+    history.add_argument("--id", dest="timer_id", default=None, help="只列出该倒计时的事件")
+    history.add_argument("--limit", type=int, default=None, help="列出事件的最大条数")
+    
+    policy = sub.add_parser("policy", help="查看/设置运行策略")
+    policy.add_argument("policy", nargs="?", default=None,
+                        help="exclusive / unlimited / group / max:N，省略时只查看")
+    policy.add_argument("--sleep", choices=("count", "pause"), default=None,
+                        help="系统休眠的时间是否计入运行中的倒计时")
+    
+    sequence = sub.add_parser("sequence", help="查看/创建/开始/停止倒计时序列")
+    sequence.add_argument("action", choices=("list", "add", "start", "stop", "remove"))
+    sequence.add_argument("values", nargs="*",
+                          help="add: 名称 倒计时ID...；start / stop / remove: 序列ID")
+    sequence.add_argument("--loops", type=int, default=None, help="循环次数，0 表示无限循环（默认 1）")
+    sequence.add_argument("--start", action="store_true", help="创建后立即开始")
+    
+    workspace = sub.add_parser("workspace", help="查看/新建/切换/删除工作区")
+    workspace.add_argument("action", nargs="?", default="list",
+                           choices=("list", "create", "switch", "remove"))
+    workspace.add_argument("name", nargs="?", default=None, help="工作区名称")
+    
+    profile = sub.add_parser("profile", help="开启/关闭性能剖析")
+    profile.add_argument("action", choices=("start", "stop", "dump", "status"))
+    profile.add_argument("--sink", default=None, help="ring / chrome / cprofile（默认 ring）")
+    profile.add_argument("--seconds", type=float, default=None, help="cprofile 持续秒数")
+    profile.add_argument("--path", default=None, help="输出文件")
+    profile.add_argument("--limit", type=int, default=None, help="dump 返回的最大条数")
+    
+    watch = sub.add_parser("watch", help="持续输出倒计时事件")
+    watch.add_argument("--events", nargs="*", default=None, help="tick / finish")
+    watch.add_argument("--ids", nargs="*", default=None, help="只关注这些倒计时")
+    return parser
+
+
+def main() -> int:
+    """主函数"""
+    args = build_parser().parse_args()
+    socket_path = args.socket or default_socket_path(resolve_data_dir(args.data_dir))
+    
+    try:
+        with ControlClient(socket_path) as client:
+            if args.cmd == "watch":
+                for event in client.subscribe(args.events, args.ids):
+                    print(json.dumps(event, ensure_ascii=False), flush=True)
+                return 0
+            
+            if args.cmd in ("import", "export"):
+                # 文件由服务进程读写，需要绝对路径
+                args.path = os.path.abspath(args.path)
+            params = {k: v for k, v in vars(args).items()
+                      if k not in ("cmd", "data_dir", "socket") and v is not None}
+            if args.cmd == "sequence":
+                # 位置参数按操作拆分为名称和步骤，或序列 ID
+                values = params.pop("values")
+                if args.action == "add":
+                    if len(values) < 2:
+                        print("错误: 需要名称和至少一个倒计时ID", file=sys.stderr)
+                        return 1
+                    params.update(name=values[0], steps=values[1:])
+                elif args.action != "list":
+                    if not values:
+                        print("错误: 需要序列ID", file=sys.stderr)
+                        return 1
+                    params["id"] = values[0]
+            result = client.call(args.cmd.replace("-", "_"), **params)
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+            return 0
+    except CommandError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    except (ConnectionError, FileNotFoundError, OSError) as e:
+        print(f"无法连接到控制接口 {socket_path}: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
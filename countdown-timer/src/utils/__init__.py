@@ -1 +1,4 @@
 # Utils module
+from .profiling import PROFILER, Profiler, handle_profile_command
+
+__all__ = ['PROFILER', 'Profiler', 'handle_profile_command']
@@ -0,0 +1,321 @@
+"""
+性能剖析钩子 - 在滴答、通知、保存、加载等位置埋点，运行时按需开启
+
+没有任何 sink 时 span() 返回共享的空上下文，埋点几乎没有开销；
+可随时添加/移除 sink，无需重启即可在现场采集数据:
+    RingBufferSink     内存环形缓冲区，保留最近 N 个 span
+    CProfileSink       在调用线程上运行 cProfile N 秒，结束后写出 .pstats 文件
+    ChromeTraceSink    写出 Chrome trace-event JSON，可用 chrome://tracing 或 Perfetto 查看
+"""
+import cProfile
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class _NullSpan:
+    """未开启剖析时使用的空上下文"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """记录一次 span 的上下文"""
+    
+    __slots__ = ('_profiler', '_name', '_args', '_start')
+    
+    def __init__(self, profiler: 'Profiler', name: str, args: dict):
+        self._profiler = profiler
+        self._name = name
+        self._args = args
+        self._start = 0.0
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler._emit(self._name, self._start,
+                             time.perf_counter() - self._start, self._args)
+        return False
+
+
+class Sink:
+    """span 接收端基类"""
+    
+    # 为 True 时 Profiler 会在下一次 span 后自动移除并关闭该 sink
+    finished = False
+    
+    def on_span(self, name: str, start: float, duration: float, thread_id: int, args: dict):
+        """接收一个 span（start 为 time.perf_counter 时间，单位秒）"""
+        raise NotImplementedError
+    
+    def expires_in(self) -> Optional[float]:
+        """距自动结束的秒数，不会自动结束的为 None（见 Profiler.poll）"""
+        return None
+    
+    def close(self) -> dict:
+        """关闭 sink 并返回摘要"""
+        return {}
+    
+    def describe(self) -> dict:
+        """描述当前状态"""
+        return {'type': type(self).__name__}
+
+
+class RingBufferSink(Sink):
+    """内存环形缓冲区，保留最近的 span"""
+    
+    def __init__(self, capacity: int = 10000):
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+    
+    def on_span(self, name, start, duration, thread_id, args):
+        with self._lock:
+            self._events.append((name, start, duration, thread_id, args))
+    
+    def events(self, limit: int = None) -> List[dict]:
+        """获取缓冲区中的 span（最新的在后）"""
+        with self._lock:
+            events = list(self._events)
+        if limit is not None:
+            events = events[-limit:]
+        return [
+            {'name': name, 'start': start, 'duration_ms': duration * 1000,
+             'thread': thread_id, 'args': args}
+            for name, start, duration, thread_id, args in events
+        ]
+    
+    def close(self) -> dict:
+        return {'events': len(self._events)}
+    
+    def describe(self) -> dict:
+        return {'type': 'ring', 'events': len(self._events), 'capacity': self._events.maxlen}
+
+
+class ChromeTraceSink(Sink):
+    """收集 span 并在关闭时写出 Chrome trace-event JSON"""
+    
+    def __init__(self, path: Path, max_events: int = 1000000):
+        self.path = Path(path)
+        self._max_events = max_events
+        self._events: list = []
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+    
+    def on_span(self, name, start, duration, thread_id, args):
+        with self._lock:
+            if len(self._events) >= self._max_events:
+                self._dropped += 1
+                return
+            self._events.append({
+                'name': name, 'ph': 'X', 'pid': self._pid, 'tid': thread_id,
+                'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6,
+                'args': args,
+            })
+    
+    def close(self) -> dict:
+        with self._lock:
+            events, self._events = self._events, []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return {'path': str(self.path), 'events': len(events), 'dropped': self._dropped}
+    
+    def describe(self) -> dict:
+        return {'type': 'chrome', 'path': str(self.path), 'events': len(self._events)}
+
+
+class CProfileSink(Sink):
+    """
+    在创建它的线程上运行 cProfile，持续 seconds 秒后写出 .pstats 文件
+    
+    cProfile 只剖析开启它的线程，因此应在 TimerManager 所在线程创建；也只能在该线程
+    停止，到期由该线程的滴答调用 Profiler.poll 结束，不依赖之后是否还有 span。
+    """
+    
+    def __init__(self, path: Path, seconds: float = 30.0):
+        self.path = Path(path)
+        self.seconds = seconds
+        self._deadline = time.perf_counter() + seconds
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        self._closed = False
+    
+    def on_span(self, name, start, duration, thread_id, args):
+        if time.perf_counter() >= self._deadline:
+            self.finished = True
+    
+    def expires_in(self) -> Optional[float]:
+        return self._deadline - time.perf_counter()
+    
+    def close(self) -> dict:
+        if not self._closed:
+            self._closed = True
+            self._profile.disable()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._profile.dump_stats(str(self.path))
+        return {'path': str(self.path)}
+    
+    def describe(self) -> dict:
+        remaining = max(0.0, self._deadline - time.perf_counter())
+        return {'type': 'cprofile', 'path': str(self.path), 'remaining_seconds': remaining}
+
+
+class Profiler:
+    """剖析钩子的分发中心"""
+    
+    def __init__(self):
+        self._sinks: Dict[str, Sink] = {}
+        self._lock = threading.Lock()
+        # 热路径只读这个属性判断是否需要埋点
+        self.active = False
+    
+    def span(self, name: str, **args):
+        """
+        创建一个 span 上下文
+        
+        用法:
+            with PROFILER.span('store.save', timers=len(timers)):
+                ...
+        """
+        if not self.active:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+    
+    def add_sink(self, name: str, sink: Sink) -> Optional[dict]:
+        """
+        添加 sink，同名的旧 sink 会被关闭
+        
+        Returns:
+            旧 sink 的摘要（如果有）
+        """
+        with self._lock:
+            old = self._sinks.get(name)
+            self._sinks = dict(self._sinks, **{name: sink})
+            self.active = True
+        return old.close() if old is not None else None
+    
+    def remove_sink(self, name: str) -> Optional[dict]:
+        """移除并关闭 sink，返回其摘要"""
+        with self._lock:
+            if name not in self._sinks:
+                return None
+            sinks = dict(self._sinks)
+            sink = sinks.pop(name)
+            self._sinks = sinks
+            self.active = bool(sinks)
+        return sink.close()
+    
+    def get_sink(self, name: str) -> Optional[Sink]:
+        """获取 sink"""
+        return self._sinks.get(name)
+    
+    def poll(self) -> Optional[float]:
+        """
+        关闭已到期的 sink（在 TimerManager 所在线程的滴答和空闲等待中调用）
+        
+        Returns:
+            距下一个 sink 到期的秒数，没有会自动结束的 sink 时为 None
+        """
+        if not self.active:
+            return None
+        expired = []
+        next_due = None
+        for sink_name, sink in self._sinks.items():
+            remaining = sink.expires_in()
+            if remaining is None:
+                continue
+            if remaining <= 0:
+                expired.append(sink_name)
+            elif next_due is None or remaining < next_due:
+                next_due = remaining
+        for sink_name in expired:
+            self.remove_sink(sink_name)
+        return next_due
+    
+    def status(self) -> dict:
+        """各 sink 的状态"""
+        return {name: sink.describe() for name, sink in self._sinks.items()}
+    
+    def _emit(self, name: str, start: float, duration: float, args: dict):
+        """把 span 分发给所有 sink"""
+        thread_id = threading.get_ident()
+        finished = []
+        for sink_name, sink in self._sinks.items():
+            sink.on_span(name, start, duration, thread_id, args)
+            if sink.finished:
+                finished.append(sink_name)
+        for sink_name in finished:
+            self.remove_sink(sink_name)
+
+
+# 进程内共享的剖析器
+PROFILER = Profiler()
+
+
+def _default_output(prefix: str, suffix: str) -> Path:
+    """默认输出文件路径"""
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return Path(tempfile.gettempdir()) / f"countdown-{prefix}-{stamp}{suffix}"
+
+
+def handle_profile_command(args: dict, profiler: Profiler = PROFILER) -> dict:
+    """
+    处理控制接口的 profile 命令
+    
+    Args:
+        args: {'action': 'start' | 'stop' | 'dump' | 'status',
+               'sink': 'ring' | 'cprofile' | 'chrome',
+               'seconds': cProfile 持续秒数, 'capacity': 环形缓冲区大小,
+               'path': 输出文件, 'limit': dump 返回的最大条数}
+    """
+    action = args.get('action', 'status')
+    sink_name = args.get('sink', 'ring')
+    
+    if action == 'status':
+        return profiler.status()
+    
+    if action == 'start':
+        if sink_name == 'ring':
+            sink = RingBufferSink(int(args.get('capacity', 10000)))
+        elif sink_name == 'chrome':
+            sink = ChromeTraceSink(args.get('path') or _default_output('trace', '.json'))
+        elif sink_name == 'cprofile':
+            sink = CProfileSink(args.get('path') or _default_output('profile', '.pstats'),
+                                float(args.get('seconds', 30)))
+        else:
+            raise ValueError(f"未知的 sink: {sink_name}")
+        profiler.add_sink(sink_name, sink)
+        return sink.describe()
+    
+    if action == 'stop':
+        summary = profiler.remove_sink(sink_name)
+        if summary is None:
+            raise ValueError(f"sink 未开启: {sink_name}")
+        return summary
+    
+    if action == 'dump':
+        sink = profiler.get_sink(sink_name)
+        if not isinstance(sink, RingBufferSink):
+            raise ValueError("只有 ring sink 支持 dump")
+        limit = args.get('limit')
+        return sink.events(int(limit) if limit is not None else None)
+    
+    raise ValueError(f"未知的操作: {action}")
@@ -1,5 +1,27 @@
-from .main_window import MainWindow
-from .timer_card import TimerCard
-from .add_dialog import AddTimerDialog
+"""
+界面组件模块
+
+对话框在首次打开时才导入，主窗口可以更早显示。
+"""
+import importlib
+
+_LAZY_ATTRS = {
+    'MainWindow': '.main_window',
+    'TimerCard': '.timer_card',
+    'AddTimerDialog': '.add_dialog',
+}
 
 __all__ = ['MainWindow', 'TimerCard', 'AddTimerDialog']
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,15 +1,18 @@
 """
 添加/编辑倒计时对话框
 """
+import os
+import time
+
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
     QLineEdit, QSpinBox, QPushButton, QWidget,
-    QColorDialog, QTimeEdit, QComboBox, QFormLayout
+    QColorDialog, QTimeEdit, QComboBox, QFormLayout, QFileDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt, QTime, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 
-from models import Timer, TIMER_COLORS
+from models import Timer, TIMER_COLORS, parse_schedule
 
 
 class ColorButton(QPushButton):
@@ -126,6 +129,62 @@ class PresetColorSelector(QWidget):
         return self._current_color
 
 
+class SoundSelector(QWidget):
+    """提示音选择器"""
+    
+    def __init__(self, sound_path: str = "", parent=None):
+        super().__init__(parent)
+        self._sound_path = sound_path
+        self._setup_ui()
+        self._update_label()
+    
+    def _setup_ui(self):
+        """设置UI"""
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+        
+        self._label = QLabel()
+        self._label.setMinimumWidth(140)
+        layout.addWidget(self._label, 1)
+        
+        choose_btn = QPushButton("选择...")
+        choose_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        choose_btn.clicked.connect(self._choose_sound)
+        layout.addWidget(choose_btn)
+        
+        default_btn = QPushButton("默认")
+        default_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        default_btn.clicked.connect(lambda: self.set_sound_path(""))
+        layout.addWidget(default_btn)
+    
+    def _update_label(self):
+        """更新显示的文件名"""
+        if self._sound_path:
+            self._label.setText(os.path.basename(self._sound_path))
+            self._label.setToolTip(self._sound_path)
+        else:
+            self._label.setText("默认提示音")
+            self._label.setToolTip("")
+    
+    def _choose_sound(self):
+        """打开文件选择器"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "选择提示音", "", "音频文件 (*.wav *.mp3 *.ogg);;所有文件 (*)"
+        )
+        if path:
+            self.set_sound_path(path)
+    
+    def set_sound_path(self, sound_path: str):
+        """设置提示音路径"""
+        self._sound_path = sound_path
+        self._update_label()
+    
+    @property
+    def sound_path(self) -> str:
+        return self._sound_path
+
+
 class AddTimerDialog(QDialog):
     """添加/编辑倒计时对话框"""
     
@@ -150,7 +209,7 @@ class AddTimerDialog(QDialog):
     def _setup_ui(self):
         """设置UI"""
         self.setWindowTitle("编辑倒计时" if self._is_edit_mode else "添加倒计时")
-        self.setFixedSize(400, 320)
+        self.setFixedSize(400, 440)
         self.setModal(True)
         
         layout = QVBoxLayout(self)
@@ -206,6 +265,27 @@ class AddTimerDialog(QDialog):
         self.color_selector = PresetColorSelector()
         form_layout.addRow("颜色:", self.color_selector)
         
+        # 提示音选择
+        self.sound_selector = SoundSelector()
+        form_layout.addRow("提示音:", self.sound_selector)
+        
+        # 分组
+        self.group_input = QLineEdit()
+        self.group_input.setPlaceholderText("可选，“同组互斥”策略下同组只运行一个")
+        self.group_input.setMaxLength(30)
+        form_layout.addRow("分组:", self.group_input)
+        
+        # 定时计划
+        self.schedule_input = QLineEdit()
+        self.schedule_input.setPlaceholderText("可选，如 at 14:30 / daily 07:00 / weekdays 09:00")
+        self.schedule_input.setToolTip("按本地时间触发，填写后不使用上面的时长:\n"
+                                       "at 14:30 或 at 2026-10-20 14:30  只触发一次\n"
+                                       "daily 07:00  每天\n"
+                                       "weekdays 09:00  周一到周五\n"
+                                       "cron 0 9 * * 1-5  cron 表达式（分 时 日 月 周）")
+        self.schedule_input.setMaxLength(60)
+        form_layout.addRow("定时:", self.schedule_input)
+        
         layout.addLayout(form_layout)
         
         # 预设模板
@@ -328,6 +408,9 @@ class AddTimerDialog(QDialog):
         self.second_spin.setValue(seconds)
         
         self.color_selector._select_color(self._timer.color)
+        self.sound_selector.set_sound_path(self._timer.sound_path)
+        self.group_input.setText(self._timer.group)
+        self.schedule_input.setText(self._timer.schedule)
     
     def _set_duration(self, hours: int, minutes: int, seconds: int):
         """设置时长"""
@@ -342,6 +425,23 @@ class AddTimerDialog(QDialog):
             self.name_input.setFocus()
             return
         
+        # 定时倒计时的时长由计划决定，只验证计划
+        schedule = self.schedule_input.text().strip()
+        if schedule:
+            if schedule != (self._timer.schedule if self._timer else ""):
+                error = None
+                try:
+                    if parse_schedule(schedule).next_due(time.time()) is None:
+                        error = "计划的时间已过"
+                except ValueError as e:
+                    error = str(e)
+                if error:
+                    QMessageBox.warning(self, "定时计划", error)
+                    self.schedule_input.setFocus()
+                    return
+            self.accept()
+            return
+        
         # 验证时长
         total_seconds = self.get_duration_seconds()
         if total_seconds <= 0:
@@ -355,12 +455,15 @@ class AddTimerDialog(QDialog):
         获取表单数据
         
         Returns:
-            包含名称、时长和颜色的字典
+            包含名称、时长、颜色、提示音、分组和定时计划的字典
         """
         return {
             'name': self.name_input.text().strip() or "新倒计时",
             'duration_seconds': self.get_duration_seconds(),
-            'color': self.color_selector.current_color
+            'color': self.color_selector.current_color,
+            'sound_path': self.sound_selector.sound_path,
+            'group': self.group_input.text().strip(),
+            'schedule': self.schedule_input.text().strip()
         }
     
     def get_duration_seconds(self) -> int:
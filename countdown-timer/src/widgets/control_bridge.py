@@ -0,0 +1,37 @@
+"""
+控制接口与 Qt 主线程之间的桥接
+"""
+from concurrent.futures import Future
+from typing import Callable
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+
+class QtExecutor(QObject):
+    """
+    把函数投递到 Qt 主线程执行
+    
+    供在后台线程运行的 ControlServer 使用：submit 可以在任意线程调用，
+    函数通过排队连接在主线程执行，结果写入返回的 Future。
+    """
+    
+    _submitted = pyqtSignal(object, object)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._submitted.connect(self._run, Qt.ConnectionType.QueuedConnection)
+    
+    def submit(self, fn: Callable[[], object]) -> Future:
+        """投递函数，返回其结果的 Future"""
+        future = Future()
+        self._submitted.emit(fn, future)
+        return future
+    
+    def _run(self, fn, future: Future):
+        """在主线程执行函数"""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
@@ -2,37 +2,113 @@
 主窗口组件 - 增强版拖拽支持
 """
 import sys
+import time
 from typing import Dict, Optional, List
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QScrollArea, QFrame,
-    QSystemTrayIcon, QMenu, QMessageBox, QApplication
+    QSystemTrayIcon, QMenu, QMessageBox, QApplication, QComboBox, QInputDialog, QLineEdit,
+    QProgressDialog
+)
+from PyQt6.QtCore import (
+    Qt, QTimer, QPropertyAnimation, QEasingCurve, QRect, QPoint, QEvent, QFileSystemWatcher
 )
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QRect, QPoint, QEvent
 from PyQt6.QtGui import QFont, QIcon, QAction, QPixmap, QPainter, QColor
 
-from models import Timer
-from services import TimerManager, NotificationService, SoundPlayer
+from models import Timer, TIMER_COLORS
+from services.timer_manager import TimerManager
+from services.event_bus import TimerEvent, EVENT_TICK, EVENT_FINISH, EVENT_CHANGED
+from services.run_policy import (
+    RunPolicy, POLICY_EXCLUSIVE, POLICY_GROUP, POLICY_UNLIMITED, POLICY_MAX
+)
+from services.instrumentation import Instrumentation, TickClock
+from services.clock_watch import ClockWatcher, SLEEP_COUNT, SLEEP_PAUSE
+from utils.profiling import PROFILER, handle_profile_command
 from data import DataStore
+from engine.sync import apply_state
+from engine.workspaces import Workspaces, DEFAULT_WORKSPACE, workspace_command
 from .timer_card import TimerCard, PlaceholderCard
-from .add_dialog import AddTimerDialog
 
 
 class MainWindow(QMainWindow):
     """主窗口"""
     
-    def __init__(self):
-        """初始化主窗口"""
+    # 剩余时间少于该值的倒计时会提前在后台加载提示音
+    SOUND_PRELOAD_SECONDS = 30
+    # 托盘菜单中 cProfile 剖析的持续时间（秒）
+    CPROFILE_SECONDS = 30
+    # 托盘菜单新建的番茄钟循环：(工作分钟, 休息分钟, 循环次数)
+    POMODORO = (25, 5, 4)
+    # 工作区下拉框中新建、删除项的数据
+    _WORKSPACE_NEW = "__new__"
+    _WORKSPACE_REMOVE = "__remove__"
+    # 状态文件变化通知的合并延迟，以及无法监视数据目录时的轮询间隔（毫秒）
+    STATE_WATCH_DELAY_MS = 200
+    STATE_POLL_INTERVAL_MS = 2000
+    # 筛选时最多创建的卡片数，其余的匹配只显示数量（继续输入缩小范围）
+    FILTER_CARD_LIMIT = 100
+    # 筛选条件变化时每轮事件循环最多新建的卡片数，其余的在之后几轮中补上，输入不卡顿
+    FILTER_CARDS_PER_FRAME = 8
+    # 导入时检查后台线程是否校验好下一批的间隔（毫秒），每次最多插入一批
+    IMPORT_POLL_MS = 10
+    # 筛选栏的状态选项：(显示文字, 状态)
+    _FILTER_STATUSES = (("全部状态", None), ("运行中", "running"),
+                        ("已暂停", "paused"), ("已停止", "stopped"))
+    
+    def __init__(self, data_store: DataStore = None, control: bool = True):
+        """
+        初始化主窗口
+        
+        Args:
+            data_store: 数据存储，为 None 时使用默认数据目录
+            control: 是否开启本地控制接口
+        """
         super().__init__()
         
-        # 初始化服务
-        self._timer_manager = TimerManager()
-        self._notification_service = NotificationService()
-        self._sound_player = SoundPlayer()
-        self._data_store = DataStore()
+        # 初始化服务（声音与通知服务在首次绘制后创建，见 finish_startup）
+        self._instrumentation = Instrumentation()
+        self._timer_manager = TimerManager(instrumentation=self._instrumentation)
+        self._notification_service = None
+        self._sound_player = None
+        # 运行历史和统计面板的数据（在 finish_startup 中打开）
+        self._history = None
+        self._statistics = None
+        # 加载状态时结束的倒计时（程序未运行期间到时的），运行历史打开后补记
+        self._offline_runs = []
+        # finish_startup 之前结束的倒计时（多为程序未运行期间到时的），声音和通知服务
+        # 创建后合并提醒一次
+        self._pending_alerts: List[Timer] = []
+        self._stats_dialog = None
+        # 进行中的导入（data.transfer.ImportJob）、它的进度对话框和插入批次的定时器
+        self._import_job = None
+        self._import_progress = None
+        self._import_timer = None
+        self._volume = 0.7
+        self._startup_finished = False
+        self._startup_scheduled = False
+        self.tray_icon: Optional[QSystemTrayIcon] = None
+        self._data_store = data_store or DataStore()
+        # 当前工作区（workspaces.sync 负责与其他进程共用状态文件时的合并与加锁保存）
+        # 和仍有倒计时在运行、但不创建卡片的后台工作区
+        self._workspaces = Workspaces(self._data_store, self._timer_manager)
+        
+        # 本地控制接口（在 finish_startup 中启动）
+        self._control_enabled = control
+        self._control_server = None
+        self._control_thread = None
         
         # 卡片缓存
         self._timer_cards: Dict[str, TimerCard] = {}
+        # 滚动区域中可见的卡片，None 表示需要重新计算；
+        # 不可见卡片的更新只记录下来，滚动到可见时再刷新
+        self._visible_card_ids: Optional[set] = None
+        self._stale_card_ids: set = set()
+        # 筛选时只为匹配的倒计时创建卡片，不匹配的没有卡片，也不参与滴答刷新
+        self._filtering = False
+        # 筛选后尚未创建的卡片：(卡片索引, 倒计时)，按索引排列
+        self._pending_cards: List[tuple] = []
+        # 多个倒计时同时结束时合并为一次保存
+        self._save_scheduled = False
         
         # 拖拽相关
         self._placeholder: Optional[PlaceholderCard] = None
@@ -44,15 +120,13 @@ class MainWindow(QMainWindow):
         self._placeholder_target_index: Optional[int] = None  # 占位符当前目标索引
         
         # 设置回调
-        self._timer_manager.set_callbacks(
-            on_timer_update=self._on_timer_update,
-            on_timer_finished=self._on_timer_finished,
-            on_timers_changed=self._on_timers_changed
-        )
+        events = self._timer_manager.events
+        events.subscribe(self._on_timer_update, events=(EVENT_TICK,))
+        events.subscribe(self._on_timer_finished, events=(EVENT_FINISH,))
+        events.subscribe(self._on_timers_changed, events=(EVENT_CHANGED,))
         
         # 初始化UI
         self._setup_ui()
-        self._setup_tray_icon()
         self._setup_timer()
         self._apply_styles()
         
@@ -78,8 +152,12 @@ class MainWindow(QMainWindow):
         header = self._create_header()
         main_layout.addWidget(header)
         
+        # 搜索筛选栏
+        main_layout.addWidget(self._create_filter_bar())
+        
         # 滚动区域
         scroll_area = QScrollArea()
+        self._scroll_area = scroll_area
         scroll_area.setWidgetResizable(True)
         scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
@@ -95,6 +173,8 @@ class MainWindow(QMainWindow):
         self.timers_layout.addStretch()
         
         scroll_area.setWidget(self.timers_container)
+        scroll_area.verticalScrollBar().valueChanged.connect(self._on_viewport_changed)
+        scroll_area.viewport().installEventFilter(self)
         main_layout.addWidget(scroll_area)
         
         # 底部添加按钮
@@ -117,6 +197,32 @@ class MainWindow(QMainWindow):
         
         layout.addStretch()
         
+        # 工作区
+        self.workspace_combo = QComboBox()
+        self.workspace_combo.setFont(QFont("Microsoft YaHei", 9))
+        self.workspace_combo.setToolTip("按项目分开保存的倒计时")
+        self.workspace_combo.activated.connect(self._on_workspace_selected)
+        layout.addWidget(self.workspace_combo)
+        
+        # 运行策略
+        self.policy_combo = QComboBox()
+        self.policy_combo.setFont(QFont("Microsoft YaHei", 9))
+        self.policy_combo.setToolTip("同时运行多个倒计时的规则")
+        for policy in (RunPolicy(POLICY_EXCLUSIVE), RunPolicy(POLICY_GROUP),
+                       RunPolicy(POLICY_MAX, 3), RunPolicy(POLICY_UNLIMITED)):
+            self.policy_combo.addItem(policy.describe(), policy.mode)
+        self.policy_combo.activated.connect(self._on_policy_selected)
+        layout.addWidget(self.policy_combo)
+        
+        # 统计
+        stats_btn = QPushButton("统计")
+        stats_btn.setFont(QFont("Microsoft YaHei", 9))
+        stats_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        stats_btn.setToolTip("每日专注时长、颜色占比和连续天数")
+        stats_btn.clicked.connect(self._show_statistics)
+        stats_btn.setObjectName("statsBtn")
+        layout.addWidget(stats_btn)
+        
         # 运行计数
         self.running_count_label = QLabel("运行中: 0")
         self.running_count_label.setFont(QFont("Microsoft YaHei", 10))
@@ -124,6 +230,49 @@ class MainWindow(QMainWindow):
         
         return header
     
+    def _create_filter_bar(self) -> QWidget:
+        """创建搜索筛选栏（名称、颜色、状态）"""
+        bar = QFrame()
+        bar.setObjectName("filterBar")
+        
+        layout = QHBoxLayout(bar)
+        layout.setContentsMargins(20, 8, 20, 8)
+        layout.setSpacing(8)
+        
+        # 名称
+        self.search_edit = QLineEdit()
+        self.search_edit.setFont(QFont("Microsoft YaHei", 9))
+        self.search_edit.setPlaceholderText("搜索名称")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._apply_filter)
+        layout.addWidget(self.search_edit, 1)
+        
+        # 颜色
+        self.color_filter_combo = QComboBox()
+        self.color_filter_combo.setFont(QFont("Microsoft YaHei", 9))
+        self.color_filter_combo.addItem("全部颜色", None)
+        for color in TIMER_COLORS:
+            pixmap = QPixmap(12, 12)
+            pixmap.fill(QColor(color))
+            self.color_filter_combo.addItem(QIcon(pixmap), color, color)
+        self.color_filter_combo.currentIndexChanged.connect(self._apply_filter)
+        layout.addWidget(self.color_filter_combo)
+        
+        # 状态
+        self.status_filter_combo = QComboBox()
+        self.status_filter_combo.setFont(QFont("Microsoft YaHei", 9))
+        for text, status in self._FILTER_STATUSES:
+            self.status_filter_combo.addItem(text, status)
+        self.status_filter_combo.currentIndexChanged.connect(self._apply_filter)
+        layout.addWidget(self.status_filter_combo)
+        
+        # 匹配数量
+        self.filter_count_label = QLabel()
+        self.filter_count_label.setFont(QFont("Microsoft YaHei", 9))
+        layout.addWidget(self.filter_count_label)
+        
+        return bar
+    
     def _create_footer(self) -> QWidget:
         """创建底部栏"""
         footer = QFrame()
@@ -146,6 +295,152 @@ class MainWindow(QMainWindow):
         
         return footer
     
+    def paintEvent(self, event):
+        """首次绘制后安排延迟初始化"""
+        super().paintEvent(event)
+        if not self._startup_scheduled:
+            self._startup_scheduled = True
+            QTimer.singleShot(0, self.finish_startup)
+    
+    def finish_startup(self):
+        """
+        完成延迟初始化
+        
+        声音、通知和托盘菜单都不影响首屏内容，放到窗口显示之后再创建，
+        让带有已保存倒计时的窗口尽快出现。重复调用是安全的。
+        """
+        if self._startup_finished:
+            return
+        self._startup_finished = True
+        self._ensure_alert_services()
+        self._alert_pending()
+        self._setup_tray_icon()
+        self._open_history()
+        if self._control_enabled:
+            self._start_control_server()
+    
+    def _start_control_server(self):
+        """在后台线程启动本地控制接口，命令通过 QtExecutor 在主线程执行"""
+        from ipc import ControlServer, ControlServerThread, default_socket_path
+        from .control_bridge import QtExecutor
+        
+        self._control_executor = QtExecutor(self)
+        server = ControlServer(
+            self._timer_manager,
+            default_socket_path(self._data_store.data_dir),
+            executor=self._control_executor.submit,
+            on_mutated=self._on_control_mutated
+        )
+        server.register_command('show', lambda args: self.show_and_activate())
+        server.register_command('stats', lambda args: self._instrumentation.snapshot())
+        if self._history is not None:
+            server.register_command('history', lambda args: self._history.query(**args))
+        server.register_command(
+            'workspace',
+            lambda args: workspace_command(self._workspaces, self._load_workspace, args),
+            mutating=True)
+        thread = ControlServerThread(server)
+        if thread.start():
+            self._control_server = server
+            self._control_thread = thread
+    
+    def _on_control_mutated(self):
+        """控制接口修改了倒计时、运行策略或工作区"""
+        self._update_policy_combo()
+        self._update_workspace_combo()
+        self._update_running_count()
+        self._save_state()
+    
+    def _open_history(self):
+        """打开运行历史并开始记录，统计面板的数据从历史汇总开始增量维护"""
+        from services.history import HistoryLog
+        from services.statistics import StatisticsAggregator
+        
+        self._statistics = StatisticsAggregator()
+        offline, self._offline_runs = self._offline_runs, []
+        try:
+            self._history = HistoryLog(self._data_store.data_dir)
+            self._history.attach(self._timer_manager)
+            self._history.record_offline(offline)
+            self._statistics.seed(self._history)
+        except Exception as e:
+            print(f"打开运行历史失败: {e}")
+        self._statistics.attach(self._timer_manager)
+    
+    def _show_statistics(self):
+        """显示统计面板"""
+        self.finish_startup()
+        if self._stats_dialog is None:
+            from .stats_dialog import StatisticsDialog
+            self._stats_dialog = StatisticsDialog(self._statistics, self)
+        self._stats_dialog.show()
+        self._stats_dialog.raise_()
+        self._stats_dialog.activateWindow()
+    
+    def _rebuild_sequence_menu(self):
+        """托盘的序列菜单：每个序列一项（开始 / 停止），以及新建番茄钟循环"""
+        menu = self._sequence_menu
+        menu.clear()
+        sequences = self._timer_manager.sequences
+        for sequence in sequences:
+            prefix = "停止: " if sequence.active else "开始: "
+            action = menu.addAction(prefix + sequence.describe())
+            action.triggered.connect(
+                lambda checked, sequence_id=sequence.id: self._toggle_sequence(sequence_id))
+        if sequences:
+            menu.addSeparator()
+        pomodoro_action = menu.addAction("新建番茄钟循环")
+        pomodoro_action.triggered.connect(self._add_pomodoro_sequence)
+    
+    def _toggle_sequence(self, sequence_id: str):
+        """开始或停止序列"""
+        sequence = self._timer_manager.get_sequence(sequence_id)
+        if sequence is None:
+            return
+        if sequence.active:
+            self._timer_manager.stop_sequence(sequence_id)
+        else:
+            self._timer_manager.start_sequence(sequence_id)
+        self._update_running_count()
+        self._save_state()
+    
+    def _add_pomodoro_sequence(self):
+        """添加“工作 → 短休息”循环的番茄钟序列并开始"""
+        work_minutes, break_minutes, loops = self.POMODORO
+        with self._timer_manager.batch():
+            work = self._timer_manager.add_timer("番茄钟", work_minutes * 60, TIMER_COLORS[0])
+            rest = self._timer_manager.add_timer("短休息", break_minutes * 60, TIMER_COLORS[3])
+            sequence = self._timer_manager.add_sequence("番茄钟循环", [work.id, rest.id], loops)
+        self._timer_manager.start_sequence(sequence.id)
+        self._update_running_count()
+        self._save_state()
+    
+    def _ensure_alert_services(self):
+        """按需创建声音与通知服务"""
+        if self._sound_player is None:
+            from services.sound_player import SoundPlayer
+            self._sound_player = SoundPlayer()
+            self._sound_player.volume = self._volume
+        if self._notification_service is None:
+            from services.notification import NotificationService
+            self._notification_service = NotificationService()
+    
+    def _alert_pending(self):
+        """提醒 finish_startup 之前结束的倒计时：只响一次提示音，通知合并为一条"""
+        timers, self._pending_alerts = self._pending_alerts, []
+        if not timers:
+            return
+        self._sound_player.play_timer_finished(timers[0].sound_path)
+        if len(timers) == 1:
+            self._notification_service.notify_timer_finished(timers[0].name)
+            return
+        names = "、".join(f"'{timer.name}'" for timer in timers[:3])
+        more = f" 等 {len(timers)} 个倒计时" if len(timers) > 3 else ""
+        self._notification_service.show_notification(
+            title="⏰ 倒计时结束",
+            message=f"{names}{more}的时间到了！"
+        )
+    
     def _setup_tray_icon(self):
         """设置系统托盘图标"""
         # 创建托盘图标
@@ -178,6 +473,46 @@ class MainWindow(QMainWindow):
         add_action.triggered.connect(self._show_add_dialog)
         tray_menu.addAction(add_action)
         
+        statistics_action = QAction("统计...", self)
+        statistics_action.triggered.connect(self._show_statistics)
+        tray_menu.addAction(statistics_action)
+        
+        self._sequence_menu = tray_menu.addMenu("序列")
+        self._sequence_menu.aboutToShow.connect(self._rebuild_sequence_menu)
+        
+        pause_all_action = QAction("全部暂停", self)
+        pause_all_action.triggered.connect(self._pause_all)
+        tray_menu.addAction(pause_all_action)
+        
+        self._sleep_action = QAction("休眠时间计入倒计时", self)
+        self._sleep_action.setCheckable(True)
+        self._sleep_action.triggered.connect(self._on_sleep_policy_toggled)
+        tray_menu.addAction(self._sleep_action)
+        # 休眠策略也可能通过控制接口修改，显示菜单时同步
+        tray_menu.aboutToShow.connect(self._update_sleep_action)
+        self._update_sleep_action()
+        
+        import_action = QAction("导入倒计时...", self)
+        import_action.triggered.connect(self._import_timers)
+        tray_menu.addAction(import_action)
+        
+        export_action = QAction("导出倒计时...", self)
+        export_action.triggered.connect(self._export_timers)
+        tray_menu.addAction(export_action)
+        
+        stats_action = QAction("导出性能统计...", self)
+        stats_action.triggered.connect(self._export_instrumentation)
+        tray_menu.addAction(stats_action)
+        
+        profile_menu = tray_menu.addMenu("性能分析")
+        self._trace_action = QAction("记录 Chrome trace", self)
+        self._trace_action.setCheckable(True)
+        self._trace_action.toggled.connect(self._toggle_trace)
+        profile_menu.addAction(self._trace_action)
+        cprofile_action = QAction(f"cProfile 剖析 {self.CPROFILE_SECONDS} 秒", self)
+        cprofile_action.triggered.connect(self._start_cprofile)
+        profile_menu.addAction(cprofile_action)
+        
         tray_menu.addSeparator()
         
         quit_action = QAction("退出", self)
@@ -191,8 +526,40 @@ class MainWindow(QMainWindow):
     def _setup_timer(self):
         """设置时钟定时器"""
         self._clock_timer = QTimer(self)
+        # 默认的粗粒度定时器允许约 5% 的误差，1 秒周期下可能晚到几十毫秒
+        self._clock_timer.setTimerType(Qt.TimerType.PreciseTimer)
         self._clock_timer.timeout.connect(self._on_tick)
         self._clock_timer.start(1000)  # 每秒触发
+        
+        # 用于测量唤醒延迟和结束到提醒的延迟
+        self._tick_clock = TickClock(1.0)
+        self._tick_clock.start()
+        self._tick_scheduled_at: Optional[float] = None
+        
+        # 系统休眠期间 QTimer 不触发，醒来后按检测到的休眠时间校正
+        self._clock_watch = ClockWatcher()
+        
+        # 其他进程修改状态文件时合并修改。状态文件总是整体替换，监视数据目录；
+        # 无法监视（例如部分网络文件系统）时改为定期检查文件签名
+        self._state_sync_timer = QTimer(self)
+        self._state_sync_timer.setSingleShot(True)
+        self._state_sync_timer.timeout.connect(self._sync_external_changes)
+        self._state_watcher = QFileSystemWatcher(self)
+        self._state_watcher.directoryChanged.connect(
+            lambda path: self._state_sync_timer.start(self.STATE_WATCH_DELAY_MS))
+        self._watch_state_dir()
+    
+    def _watch_state_dir(self):
+        """监视当前工作区的数据目录，无法监视时改为定期检查"""
+        directories = self._state_watcher.directories()
+        if directories:
+            self._state_watcher.removePaths(directories)
+        if self._state_watcher.addPath(str(self._workspaces.sync.data_store.data_dir)):
+            self._state_sync_timer.stop()
+            self._state_sync_timer.setSingleShot(True)
+        else:
+            self._state_sync_timer.setSingleShot(False)
+            self._state_sync_timer.start(self.STATE_POLL_INTERVAL_MS)
     
     def _apply_styles(self):
         """应用样式"""
@@ -210,6 +577,15 @@ class MainWindow(QMainWindow):
                 color: #2C3E50;
             }
             
+            #filterBar {
+                background-color: #FFFFFF;
+                border-bottom: 1px solid #E1E4E8;
+            }
+            
+            #filterBar QLabel {
+                color: #6B7280;
+            }
+            
             #footer {
                 background-color: #FFFFFF;
                 border-top: 1px solid #E1E4E8;
@@ -235,41 +611,172 @@ class MainWindow(QMainWindow):
             QPushButton#addBtn:pressed {
                 background-color: #2D6CB5;
             }
+            
+            QPushButton#statsBtn {
+                color: #4A90D9;
+                background-color: transparent;
+                border: 1px solid #4A90D9;
+                border-radius: 6px;
+                padding: 4px 10px;
+            }
+            
+            QPushButton#statsBtn:hover {
+                background-color: #EAF2FB;
+            }
         """)
     
     def _load_state(self):
-        """加载保存的状态"""
-        state = self._data_store.load_state()
+        """加载当前工作区保存的状态，并接着运行后台工作区"""
+        state = self._workspaces.sync.load()
+        
+        # 恢复音量（声音服务创建时再应用）；先于加载倒计时恢复，之后创建的声音服务
+        # 总是使用保存的音量
+        self._volume = state.get('settings', {}).get('volume', 0.7)
         
-        # 恢复倒计时
-        timers = state.get('timers', [])
-        self._timer_manager.load_timers(timers)
+        # 恢复策略、倒计时和序列；上次退出后已经结束的倒计时一次性结束，界面显示后
+        # 提醒（见 _alert_pending），运行历史打开后补记
+        apply_state(self._timer_manager, state, self._offline_runs)
+        self._update_policy_combo()
+        self._workspaces.load_background(self._offline_runs)
+        self._update_workspace_combo()
         
         # 恢复窗口位置
         geometry = state.get('settings', {}).get('window_geometry')
         if geometry:
             self.restoreGeometry(bytes(geometry) if isinstance(geometry, list) else geometry)
         
-        # 恢复音量
-        volume = state.get('settings', {}).get('volume', 0.7)
-        self._sound_player.volume = volume
-        
         # 刷新UI
         self._refresh_timer_cards()
     
     def _save_state(self):
         """保存当前状态"""
-        # 保存倒计时
-        timers = self._timer_manager.timers
-        
         # 保存窗口位置
-        geometry = list(self.saveGeometry().data())
+        geometry = bytes(self.saveGeometry().data())
         
-        self._data_store.save_state(
-            timers=timers,
+        started = time.perf_counter()
+        # 先合并其他进程的修改再写入
+        self._workspaces.sync.save(
             window_geometry=geometry,
-            volume=self._sound_player.volume
+            volume=self._sound_player.volume if self._sound_player else self._volume
         )
+        self._workspaces.save_background()
+        self._instrumentation.record('persistence.save', time.perf_counter() - started)
+    
+    def _sync_external_changes(self):
+        """
+        合并其他进程对状态文件的修改
+        
+        只有变化的倒计时更新卡片；合并进来的修改已在文件中，不需要再保存。
+        """
+        try:
+            merged = self._workspaces.sync.poll()
+            self._workspaces.poll()
+        except TimeoutError as e:
+            print(f"合并状态失败: {e}")
+            return
+        if merged:
+            self._update_policy_combo()
+            self._update_running_count()
+    
+    def _update_workspace_combo(self):
+        """让工作区下拉框与工作区列表一致"""
+        combo = self.workspace_combo
+        combo.blockSignals(True)
+        combo.clear()
+        background = set(self._workspaces.background)
+        for name in self._workspaces.names():
+            # 有倒计时在后台运行的工作区加上标记
+            combo.addItem(f"{name} ▶" if name in background else name, name)
+        combo.insertSeparator(combo.count())
+        combo.addItem("新建工作区…", self._WORKSPACE_NEW)
+        combo.addItem("删除工作区…", self._WORKSPACE_REMOVE)
+        combo.setCurrentIndex(combo.findData(self._workspaces.active))
+        combo.blockSignals(False)
+    
+    def _on_workspace_selected(self, index: int):
+        """选择工作区，或新建、删除工作区"""
+        data = self.workspace_combo.itemData(index)
+        if data == self._WORKSPACE_NEW:
+            name, ok = QInputDialog.getText(self, "新建工作区", "工作区名称:")
+            if ok:
+                try:
+                    name = self._workspaces.create(name)
+                except ValueError as e:
+                    QMessageBox.warning(self, "新建工作区", str(e))
+                else:
+                    self.switch_workspace(name)
+        elif data == self._WORKSPACE_REMOVE:
+            self._remove_workspace()
+        elif data:
+            self.switch_workspace(data)
+        self._update_workspace_combo()
+    
+    def switch_workspace(self, name: str) -> bool:
+        """
+        切换工作区：只为目标工作区创建卡片，当前工作区仍有运行中的倒计时时转到后台
+        
+        Returns:
+            是否切换
+        """
+        try:
+            return self._load_workspace(name)
+        except ValueError as e:
+            QMessageBox.warning(self, "切换工作区", str(e))
+            return False
+    
+    def _load_workspace(self, name: str) -> bool:
+        """
+        切换并加载工作区（控制接口也使用）
+        
+        Raises:
+            ValueError: 工作区不存在
+        """
+        state = self._workspaces.switch(
+            name,
+            window_geometry=bytes(self.saveGeometry().data()),
+            volume=self._sound_player.volume if self._sound_player else self._volume
+        )
+        if state is None:
+            return False
+        # load_timers 发布 changed 事件，卡片随之重建
+        apply_state(self._timer_manager, state)
+        self._update_policy_combo()
+        self._update_workspace_combo()
+        self._update_running_count()
+        self._watch_state_dir()
+        return True
+    
+    def _remove_workspace(self):
+        """选择并删除一个工作区（默认工作区和当前工作区不能删除）"""
+        names = [name for name in self._workspaces.names()
+                 if name not in (DEFAULT_WORKSPACE, self._workspaces.active)]
+        if not names:
+            QMessageBox.information(self, "删除工作区", "没有可以删除的工作区（默认工作区和当前工作区不能删除）")
+            return
+        name, ok = QInputDialog.getItem(self, "删除工作区", "要删除的工作区:", names, 0, False)
+        if not ok:
+            return
+        reply = QMessageBox.question(
+            self,
+            "确认删除",
+            f"确定要删除工作区 '{name}' 及其中的所有倒计时吗？",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self._workspaces.remove(name)
+            self._update_running_count()
+    
+    def _schedule_save(self):
+        """在本轮事件处理结束后保存状态，期间的多次请求只保存一次"""
+        if not self._save_scheduled:
+            self._save_scheduled = True
+            QTimer.singleShot(0, self._flush_scheduled_save)
+    
+    def _flush_scheduled_save(self):
+        """执行合并后的保存"""
+        self._save_scheduled = False
+        self._save_state()
     
     def _refresh_timer_cards(self):
         """刷新所有倒计时卡片"""
@@ -277,6 +784,9 @@ class MainWindow(QMainWindow):
         for card in self._timer_cards.values():
             card.deleteLater()
         self._timer_cards.clear()
+        self._visible_card_ids = None
+        self._stale_card_ids.clear()
+        self._pending_cards = []
         
         # 移除stretch
         while self.timers_layout.count() > 0:
@@ -284,24 +794,110 @@ class MainWindow(QMainWindow):
             if item.widget():
                 item.widget().deleteLater()
         
-        # 添加新卡片
-        timers = sorted(self._timer_manager.timers, key=lambda t: t.position)
+        # 添加新卡片（筛选时只为匹配的倒计时创建）
+        timers, more = self._filtered_timers()
+        for idx, timer in enumerate(timers):
+            self._add_timer_card(timer, index=idx)
+        self._add_list_hint(len(timers), more)
         
-        if not timers:
-            # 显示空状态提示
-            empty_label = QLabel("还没有倒计时\n点击下方按钮添加")
-            empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            empty_label.setStyleSheet("color: #9CA3AF; font-size: 14px; padding: 40px;")
-            self.timers_layout.addWidget(empty_label)
+        self.timers_layout.addStretch()
+        self._update_running_count()
+    
+    def _filtered_timers(self) -> tuple:
+        """
+        按筛选栏的条件需要显示的倒计时
+        
+        Returns:
+            (按 position 排列的倒计时, 超出 FILTER_CARD_LIMIT 未显示的匹配数)
+        """
+        text = self.search_edit.text().strip()
+        color = self.color_filter_combo.currentData()
+        status = self.status_filter_combo.currentData()
+        self._filtering = bool(text or color or status)
+        if not self._filtering:
+            self.filter_count_label.clear()
+            return sorted(self._timer_manager.timers, key=lambda t: t.position), 0
+        # 查管理器的筛选索引，与倒计时总数无关
+        found = self._timer_manager.find_timers(text, color, status)
+        self.filter_count_label.setText(f"{len(found)} / {self._timer_manager.get_timer_count()}")
+        limit = self.FILTER_CARD_LIMIT
+        return found[:limit], max(0, len(found) - limit)
+    
+    def _add_list_hint(self, shown: int, more: int):
+        """列表为空、没有匹配或匹配过多时在卡片后显示提示"""
+        if shown and not more:
+            return
+        if more:
+            text = f"还有 {more} 个匹配的倒计时\n输入更多文字缩小范围"
+        elif self._filtering:
+            text = "没有匹配的倒计时"
         else:
-            for idx, timer in enumerate(timers):
-                self._add_timer_card(timer, index=idx)
+            text = "还没有倒计时\n点击下方按钮添加"
+        hint = QLabel(text)
+        hint.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        hint.setStyleSheet("color: #9CA3AF; font-size: 14px; padding: 40px;")
+        self.timers_layout.addWidget(hint)
+    
+    def _apply_filter(self, *args):
+        """
+        筛选条件变化：复用仍然匹配的卡片，只为新匹配的倒计时创建卡片
         
+        边输入边筛选时结果通常越来越少，只需移除卡片；需要新建的卡片每轮事件循环
+        只建 FILTER_CARDS_PER_FRAME 个（见 _create_pending_cards）。不匹配的倒计时
+        没有卡片。筛选时不能拖拽排序（排序按完整列表的位置）。
+        """
+        timers, more = self._filtered_timers()
+        showing = {timer.id: timer for timer in timers}
+        reused = {}
+        while self.timers_layout.count() > 0:
+            widget = self.timers_layout.takeAt(0).widget()
+            if widget is None:
+                continue
+            card = widget if isinstance(widget, TimerCard) else None
+            if card is not None and showing.get(card.timer.id) is card.timer:
+                reused[card.timer.id] = card
+            else:
+                widget.deleteLater()
+        self._timer_cards = reused
+        self._stale_card_ids &= reused.keys()
+        self._visible_card_ids = None
+        
+        pending = []
+        for idx, timer in enumerate(timers):
+            card = reused.get(timer.id)
+            if card is None:
+                pending.append((idx, timer))
+            else:
+                card.index = idx
+                card.draggable = not self._filtering
+                self.timers_layout.addWidget(card)
+        self._add_list_hint(len(timers), more)
         self.timers_layout.addStretch()
-        self._update_running_count()
+        self._pending_cards = pending
+        self._create_pending_cards()
     
-    def _add_timer_card(self, timer: Timer, index: int = None):
-        """添加倒计时卡片"""
+    def _create_pending_cards(self):
+        """新建一批筛选后缺少的卡片（从列表顶部开始），还有剩余时在下一轮事件循环继续"""
+        if not self._pending_cards:
+            return
+        chunk = self._pending_cards[:self.FILTER_CARDS_PER_FRAME]
+        del self._pending_cards[:self.FILTER_CARDS_PER_FRAME]
+        for idx, timer in chunk:
+            # 索引更小的卡片都已在布局中，新卡片的布局位置就是它的索引
+            self._add_timer_card(timer, index=idx, layout_index=idx)
+        self._visible_card_ids = None
+        if self._pending_cards:
+            QTimer.singleShot(0, self._create_pending_cards)
+    
+    def _add_timer_card(self, timer: Timer, index: int = None, layout_index: int = None):
+        """
+        添加倒计时卡片
+        
+        Args:
+            timer: 倒计时
+            index: 卡片索引，为 None 时按 position 排序后的位置
+            layout_index: 在布局中的位置，为 None 时添加到末尾的 stretch 之前
+        """
         if index is None:
             # 查找timer在排序列表中的位置
             timers = sorted(self._timer_manager.timers, key=lambda t: t.position)
@@ -313,6 +909,7 @@ class MainWindow(QMainWindow):
                 index = 0
         
         card = TimerCard(timer, index=index)
+        card.draggable = not self._filtering
         
         # 连接信号
         card.start_clicked.connect(self._on_start_clicked)
@@ -329,11 +926,12 @@ class MainWindow(QMainWindow):
         card.setAcceptDrops(True)
         
         # 仅在最后一项是stretch/spacer时，插入到其之前
-        layout_index = self.timers_layout.count()
-        if self.timers_layout.count() > 0:
-            last_item = self.timers_layout.itemAt(self.timers_layout.count() - 1)
-            if last_item and last_item.spacerItem() is not None:
-                layout_index = self.timers_layout.count() - 1
+        if layout_index is None:
+            layout_index = self.timers_layout.count()
+            if self.timers_layout.count() > 0:
+                last_item = self.timers_layout.itemAt(self.timers_layout.count() - 1)
+                if last_item and last_item.spacerItem() is not None:
+                    layout_index = self.timers_layout.count() - 1
         self.timers_layout.insertWidget(layout_index, card)
         
         self._timer_cards[timer.id] = card
@@ -406,7 +1004,11 @@ class MainWindow(QMainWindow):
         self._move_placeholder_to_target(target_index)
 
     def eventFilter(self, watched, event):
-        """处理容器空白区域的拖拽（如拖到底部空白区）"""
+        """处理容器空白区域的拖拽（如拖到底部空白区），并跟踪可见区域的变化"""
+        if watched is self.timers_container or watched is self._scroll_area.viewport():
+            if event.type() in (QEvent.Type.Resize, QEvent.Type.LayoutRequest):
+                self._on_viewport_changed()
+        
         if watched is self.timers_container and self._is_dragging:
             event_type = event.type()
 
@@ -615,6 +1217,7 @@ class MainWindow(QMainWindow):
     
     def _show_add_dialog(self):
         """显示添加对话框"""
+        from .add_dialog import AddTimerDialog
         dialog = AddTimerDialog(parent=self)
         
         if dialog.exec():
@@ -622,29 +1225,84 @@ class MainWindow(QMainWindow):
             self._timer_manager.add_timer(
                 name=data['name'],
                 duration_seconds=data['duration_seconds'],
-                color=data['color']
+                color=data['color'],
+                sound_path=data['sound_path'],
+                group=data['group'],
+                schedule=data['schedule']
             )
+            self._forget_sound_failure(data['sound_path'])
             self._save_state()
     
     def _on_start_clicked(self, timer_id: str):
         """开始按钮点击"""
         self._timer_manager.start_timer(timer_id)
+        self._update_running_count()
         self._save_state()
     
     def _on_pause_clicked(self, timer_id: str):
         """暂停按钮点击"""
         self._timer_manager.pause_timer(timer_id)
+        self._update_running_count()
         self._save_state()
     
+    def _pause_all(self):
+        """暂停所有运行中的倒计时（批量操作，只保存一次）"""
+        if self._timer_manager.pause_all():
+            self._update_running_count()
+            self._save_state()
+    
     def _on_reset_clicked(self, timer_id: str):
         """重置按钮点击"""
         self._timer_manager.reset_timer(timer_id)
+        self._update_running_count()
         self._save_state()
     
+    def _on_policy_selected(self, index: int):
+        """选择运行策略"""
+        mode = self.policy_combo.itemData(index)
+        current = self._timer_manager.run_policy
+        if mode == POLICY_MAX:
+            count, ok = QInputDialog.getInt(
+                self, "运行策略", "最多同时运行的倒计时数量:",
+                current.max_running if current.mode == POLICY_MAX else 3, 1, 100000
+            )
+            if not ok:
+                self._update_policy_combo()
+                return
+            policy = RunPolicy(POLICY_MAX, count)
+        else:
+            policy = RunPolicy(mode)
+        self.set_run_policy(policy)
+    
+    def set_run_policy(self, policy: RunPolicy):
+        """设置运行策略并保存（超出限制的倒计时会被暂停）"""
+        self._timer_manager.set_run_policy(policy)
+        self._update_policy_combo()
+        self._update_running_count()
+        self._save_state()
+    
+    def _update_policy_combo(self):
+        """让策略下拉框与当前策略一致"""
+        policy = self._timer_manager.run_policy
+        index = self.policy_combo.findData(policy.mode)
+        if policy.mode == POLICY_MAX:
+            self.policy_combo.setItemText(index, policy.describe())
+        self.policy_combo.setCurrentIndex(index)
+    
+    def _on_sleep_policy_toggled(self, checked: bool):
+        """切换休眠时间是否计入倒计时"""
+        self._timer_manager.set_sleep_policy(SLEEP_COUNT if checked else SLEEP_PAUSE)
+        self._save_state()
+    
+    def _update_sleep_action(self):
+        """让托盘菜单的休眠选项与当前策略一致"""
+        self._sleep_action.setChecked(self._timer_manager.sleep_policy == SLEEP_COUNT)
+    
     def _on_edit_clicked(self, timer_id: str):
         """编辑按钮点击"""
         timer = self._timer_manager.get_timer(timer_id)
         if timer:
+            from .add_dialog import AddTimerDialog
             dialog = AddTimerDialog(timer=timer, parent=self)
             if dialog.exec():
                 data = dialog.get_timer_data()
@@ -652,8 +1310,13 @@ class MainWindow(QMainWindow):
                     timer_id=timer_id,
                     name=data['name'],
                     duration_seconds=data['duration_seconds'],
-                    color=data['color']
+                    color=data['color'],
+                    sound_path=data['sound_path'],
+                    group=data['group'],
+                    schedule=data['schedule']
                 )
+                self._forget_sound_failure(data['sound_path'])
+                self._update_running_count()
                 self._save_state()
     
     def _on_delete_clicked(self, timer_id: str):
@@ -674,40 +1337,132 @@ class MainWindow(QMainWindow):
     
     def _on_tick(self):
         """时钟滴答"""
+        now = time.perf_counter()
+        self._tick_scheduled_at = self._tick_clock.tick(now)
+        self._instrumentation.record_wakeup(self._tick_scheduled_at, now)
+        gap = self._clock_watch.check()
+        if gap is not None:
+            self._timer_manager.reconcile(gap)
+            self._workspaces.reconcile(gap)
+            self._update_running_count()
+            self._schedule_save()
         self._timer_manager.tick()
+        # 后台工作区没有卡片，只推进倒计时；结束时的提醒经转发的事件处理
+        background = self._workspaces.background
+        if background:
+            self._workspaces.advance()
+            if self._workspaces.background != background:
+                self._update_workspace_combo()
+                self._update_running_count()
+        self._tick_scheduled_at = None
+        self._preload_upcoming_sounds()
+        # cProfile 剖析到期时在主线程结束并写出结果
+        PROFILER.poll()
     
-    def _on_timer_update(self, timer: Timer):
-        """倒计时更新回调"""
-        if timer.id in self._timer_cards:
-            self._timer_cards[timer.id].refresh(timer)
+    def _forget_sound_failure(self, sound_path: str):
+        """倒计时选择了提示音：之前预加载失败的（例如文件当时不存在）重新尝试"""
+        if self._sound_player is not None:
+            self._sound_player.forget_failed(sound_path)
+    
+    def _preload_upcoming_sounds(self):
+        """提前加载即将结束的倒计时的提示音，保证响铃时声音已在缓存中"""
+        if self._sound_player is None:
+            return
+        upcoming = self._timer_manager.get_upcoming_timers(self.SOUND_PRELOAD_SECONDS)
+        if upcoming:
+            self._sound_player.preload(t.sound_path for t in upcoming)
     
-    def _on_timer_finished(self, timer: Timer):
-        """倒计时结束回调"""
+    def _on_timer_update(self, event: TimerEvent):
+        """倒计时更新事件 - 只刷新可见的卡片，其余的滚动到可见时再刷新"""
+        timer = event.timer
+        if timer.id in self._get_visible_card_ids():
+            card = self._timer_cards.get(timer.id)
+            if card is not None:
+                card.refresh(timer)
+        else:
+            self._stale_card_ids.add(timer.id)
+    
+    def _get_visible_card_ids(self) -> set:
+        """获取滚动区域中可见的卡片（结果会缓存到滚动或尺寸变化为止）"""
+        if self._visible_card_ids is None:
+            if not self.isVisible() or self.isMinimized():
+                # 窗口在托盘中或最小化时不刷新任何卡片，显示时再补上
+                self._visible_card_ids = set()
+            else:
+                top = self._scroll_area.verticalScrollBar().value()
+                bottom = top + self._scroll_area.viewport().height()
+                self._visible_card_ids = {
+                    timer_id for timer_id, card in self._timer_cards.items()
+                    if card.y() < bottom and card.y() + card.height() > top
+                }
+        return self._visible_card_ids
+    
+    def _on_viewport_changed(self, *args):
+        """可见区域变化：重新计算可见卡片，并刷新此前跳过更新的卡片"""
+        self._visible_card_ids = None
+        if not self._stale_card_ids:
+            return
+        visible = self._get_visible_card_ids()
+        for timer_id in self._stale_card_ids & visible:
+            card = self._timer_cards.get(timer_id)
+            if card is not None:
+                card.refresh()
+        self._stale_card_ids -= visible
+    
+    def showEvent(self, event):
+        """从托盘恢复时刷新跳过更新的卡片"""
+        super().showEvent(event)
+        self._on_viewport_changed()
+    
+    def changeEvent(self, event):
+        """最小化/还原时重新计算可见卡片"""
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._on_viewport_changed()
+    
+    def _on_timer_finished(self, event: TimerEvent):
+        """倒计时结束事件"""
+        timer = event.timer
         # 更新卡片显示
         if timer.id in self._timer_cards:
             self._timer_cards[timer.id].refresh(timer)
         
+        if not self._startup_finished:
+            # 首屏之前（例如加载状态时补上程序未运行期间的时间）不创建声音和通知服务
+            self._pending_alerts.append(timer)
+            self._update_running_count()
+            self._schedule_save()
+            return
+        
         # 播放提示音
-        self._sound_player.play_timer_finished()
+        self._ensure_alert_services()
+        self._sound_player.play_timer_finished(timer.sound_path)
         
         # 显示系统通知
         self._notification_service.notify_timer_finished(timer.name)
+        if self._tick_scheduled_at is not None:
+            self._instrumentation.record('finish_to_alert',
+                                         time.perf_counter() - self._tick_scheduled_at)
         
         # 更新运行计数
         self._update_running_count()
         
-        # 保存状态
-        self._save_state()
+        # 保存状态（同一次滴答中结束的多个倒计时只保存一次）
+        self._schedule_save()
     
-    def _on_timers_changed(self):
-        """倒计时列表变化回调"""
+    def _on_timers_changed(self, event: TimerEvent):
+        """倒计时列表变化事件"""
         self._refresh_timer_cards()
         self._update_running_count()
     
     def _update_running_count(self):
         """更新运行计数"""
         count = self._timer_manager.get_running_count()
-        self.running_count_label.setText(f"运行中: {count}")
+        background = self._workspaces.running_count()
+        if background:
+            self.running_count_label.setText(f"运行中: {count}（后台 {background}）")
+        else:
+            self.running_count_label.setText(f"运行中: {count}")
     
     def _on_reorder_requested(self, old_index: int, new_index: int):
         """处理重新排序请求 - 从dropEvent触发"""
@@ -738,11 +1493,159 @@ class MainWindow(QMainWindow):
         # 完整的动画实现需要更复杂的坐标计算
         self._refresh_timer_cards()
     
+    def _import_timers(self):
+        """
+        从 CSV / JSONL 文件导入倒计时
+        
+        文件在后台线程读取和校验，每 IMPORT_POLL_MS 最多插入一批，导入期间界面和
+        滴答照常响应；卡片在导入结束后重建一次。
+        """
+        from PyQt6.QtWidgets import QFileDialog
+        from data.transfer import ImportJob
+        if self._import_job is not None:
+            self._import_progress.show()
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入倒计时", "", "倒计时文件 (*.csv *.jsonl);;所有文件 (*)"
+        )
+        if not path:
+            return
+        try:
+            job = ImportJob(path, on_progress=self._on_import_progress)
+        except ValueError as e:
+            QMessageBox.warning(self, "导入倒计时", f"导入失败: {e}")
+            return
+        
+        progress = QProgressDialog("正在读取...", "停止", 0, 0, self)
+        progress.setWindowTitle("导入倒计时")
+        # 小文件在对话框出现之前就已导入完
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(job.cancel)
+        self._import_job = job
+        self._import_progress = progress
+        job.start()
+        self._import_timer = QTimer(self)
+        self._import_timer.timeout.connect(self._continue_import)
+        self._import_timer.start(self.IMPORT_POLL_MS)
+    
+    def _continue_import(self):
+        """插入后台线程已校验好的一批，读完、停止或出错时结束导入"""
+        job = self._import_job
+        try:
+            batch = job.next_batch(timeout=0)
+            if batch:
+                job.insert(self._timer_manager, batch)
+            if batch is not None:
+                return
+            error = None
+        except Exception as e:
+            # 包括读取线程的意外错误：总要结束导入并关闭进度对话框
+            error = e
+        self._finish_import(error)
+    
+    def _on_import_progress(self, imported: int):
+        """每批插入后更新进度"""
+        self._import_progress.setLabelText(f"已导入 {imported} 个倒计时...")
+    
+    def _finish_import(self, error: Exception = None):
+        """结束导入：重建卡片、保存并显示结果"""
+        self._import_timer.stop()
+        self._import_timer.deleteLater()
+        self._import_progress.close()
+        self._import_progress.deleteLater()
+        report = self._import_job.finish(self._timer_manager)
+        self._import_job = None
+        self._import_progress = None
+        self._import_timer = None
+        if report.imported:
+            self._save_state()
+        if error is not None:
+            QMessageBox.warning(self, "导入倒计时",
+                                f"导入失败: {error}\n已导入的 {report.imported} 个倒计时保留")
+        else:
+            QMessageBox.information(self, "导入倒计时", report.summary())
+    
+    def _export_timers(self):
+        """把倒计时导出为 CSV / JSONL 文件"""
+        from PyQt6.QtWidgets import QFileDialog
+        from data.transfer import export_timers
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出倒计时", "timers.csv", "CSV 文件 (*.csv);;JSON Lines 文件 (*.jsonl)"
+        )
+        if not path:
+            return
+        timers = sorted(self._timer_manager.timers_with_deadlines(), key=lambda t: t.position)
+        try:
+            export_timers(timers, path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "导出倒计时", f"导出失败: {e}")
+    
+    def _export_instrumentation(self):
+        """把性能统计导出为 JSON 文件"""
+        from PyQt6.QtWidgets import QFileDialog
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出性能统计", "countdown-stats.json", "JSON 文件 (*.json)"
+        )
+        if path:
+            self._instrumentation.export_json(path)
+    
+    def _profile_output(self, prefix: str, suffix: str) -> str:
+        """剖析结果文件路径（数据目录下的 traces 目录）"""
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        return str(self._data_store.data_dir / "traces" / f"{prefix}-{stamp}{suffix}")
+    
+    def _toggle_trace(self, checked: bool):
+        """开始/结束记录 Chrome trace"""
+        try:
+            if checked:
+                handle_profile_command({'action': 'start', 'sink': 'chrome',
+                                        'path': self._profile_output('trace', '.json')})
+                return
+            summary = handle_profile_command({'action': 'stop', 'sink': 'chrome'})
+            self.tray_icon.showMessage(
+                "性能分析", f"trace 已保存到 {summary['path']}",
+                QSystemTrayIcon.MessageIcon.Information, 5000
+            )
+        except Exception as e:
+            print(f"性能分析失败: {e}")
+    
+    def _start_cprofile(self):
+        """在主线程上运行 cProfile"""
+        try:
+            info = handle_profile_command({'action': 'start', 'sink': 'cprofile',
+                                           'seconds': self.CPROFILE_SECONDS,
+                                           'path': self._profile_output('profile', '.pstats')})
+            self.tray_icon.showMessage(
+                "性能分析", f"{self.CPROFILE_SECONDS} 秒后结果将保存到 {info['path']}",
+                QSystemTrayIcon.MessageIcon.Information, 5000
+            )
+        except Exception as e:
+            print(f"性能分析失败: {e}")
+    
     def _on_tray_activated(self, reason):
         """托盘图标激活"""
         if reason == QSystemTrayIcon.ActivationReason.DoubleClick:
             self.show_and_activate()
     
+    def add_timer(self, name: str, duration_seconds: int, color: str = None,
+                  start: bool = False) -> Timer:
+        """
+        添加倒计时并保存（供命令行参数使用）
+        
+        Args:
+            name: 倒计时名称
+            duration_seconds: 时长（秒）
+            color: 颜色，为 None 时使用第一个预设颜色
+            start: 是否立即开始
+        """
+        timer = self._timer_manager.add_timer(name, duration_seconds, color or TIMER_COLORS[0])
+        if start:
+            self._timer_manager.start_timer(timer.id)
+        self._save_state()
+        return timer
+    
     def show_and_activate(self):
         """显示并激活窗口"""
         self.show()
@@ -753,6 +1656,7 @@ class MainWindow(QMainWindow):
         """关闭事件"""
         # 最小化到托盘而不是关闭
         event.ignore()
+        self.finish_startup()  # 确保托盘图标已创建，否则窗口隐藏后无法恢复
         self.hide()
         self.tray_icon.showMessage(
             "多倒计时管理器",
@@ -763,7 +1667,16 @@ class MainWindow(QMainWindow):
     
     def _quit_app(self):
         """退出应用"""
+        if self._import_job is not None:
+            # 停止读取，已导入的随状态一起保存
+            self._import_job.cancel()
         self._save_state()
-        self._sound_player.cleanup()
-        self.tray_icon.hide()
+        if self._history:
+            self._history.close()
+        if self._sound_player:
+            self._sound_player.cleanup()
+        if self._control_thread:
+            self._control_thread.stop()
+        if self.tray_icon:
+            self.tray_icon.hide()
         QApplication.quit()
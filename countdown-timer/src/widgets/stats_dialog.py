@@ -0,0 +1,248 @@
+"""
+统计面板 - 每天的专注时长、各颜色占比和连续天数
+
+数据来自 StatisticsAggregator 增量维护的合计，打开面板不查询历史数据库。
+图表在数据或尺寸变化时绘制到缓存的 QPixmap 上，其余的重绘直接复制缓存。
+"""
+from typing import List, Optional, Tuple
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QGridLayout, QLabel, QWidget, QFrame
+)
+from PyQt6.QtCore import Qt, QTimer, QRectF
+from PyQt6.QtGui import QFont, QColor, QPainter, QPixmap
+
+from services.statistics import StatisticsAggregator, StatisticsSnapshot
+
+
+def format_duration(seconds: float) -> str:
+    """专注时长显示为“X 小时 Y 分”"""
+    minutes = int(seconds) // 60
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours} 小时 {minutes} 分"
+    return f"{minutes} 分"
+
+
+class CachedChart(QWidget):
+    """数据或尺寸变化时才重新绘制的图表"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = None
+        self._cache: Optional[QPixmap] = None
+        # 缓存对应的逻辑尺寸和缩放比例（缓存本身按设备像素分配，不能直接与 size() 比较）
+        self._cache_key = None
+    
+    def set_data(self, data):
+        """设置数据，与当前数据相同时不重绘"""
+        if data == self._data:
+            return
+        self._data = data
+        self._cache = None
+        self.update()
+    
+    def resizeEvent(self, event):
+        self._cache = None
+        super().resizeEvent(event)
+    
+    def paintEvent(self, event):
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio)
+        if self._cache is None or self._cache_key != key:
+            self._cache_key = key
+            self._cache = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+            self._cache.setDevicePixelRatio(ratio)
+            self._cache.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(self._cache)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            if self._data:
+                self.render_chart(painter, self._data)
+            painter.end()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._cache)
+        painter.end()
+    
+    def render_chart(self, painter: QPainter, data):
+        """在缓存上绘制图表"""
+        raise NotImplementedError
+
+
+class DailyBarChart(CachedChart):
+    """最近每天专注时长的柱状图"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(160)
+    
+    def render_chart(self, painter: QPainter, days: List[Tuple[str, float]]):
+        label_height = 18
+        width = self.width()
+        height = self.height() - label_height
+        peak = max((seconds for _, seconds in days), default=0.0) or 1.0
+        slot = width / len(days)
+        bar_width = max(4.0, slot * 0.6)
+        painter.setFont(QFont("Microsoft YaHei", 7))
+        for i, (day, seconds) in enumerate(days):
+            x = i * slot + (slot - bar_width) / 2
+            bar_height = max(2.0, (height - 14) * seconds / peak) if seconds else 2.0
+            color = QColor("#4A90D9") if i == len(days) - 1 else QColor("#A8C8EC")
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(color)
+            painter.drawRoundedRect(QRectF(x, height - bar_height, bar_width, bar_height), 3, 3)
+            painter.setPen(QColor("#888888"))
+            painter.drawText(QRectF(i * slot, height, slot, label_height),
+                             Qt.AlignmentFlag.AlignCenter, day[8:])
+
+
+class ColorBreakdown(CachedChart):
+    """各颜色专注时长的占比条和图例"""
+    
+    # 图例最多显示的颜色数
+    MAX_LEGEND = 6
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(24 + 20 * self.MAX_LEGEND // 2)
+    
+    def render_chart(self, painter: QPainter, colors: List[Tuple[str, float]]):
+        total = sum(seconds for _, seconds in colors) or 1.0
+        width = self.width()
+        x = 0.0
+        painter.setPen(Qt.PenStyle.NoPen)
+        for color, seconds in colors:
+            span = width * seconds / total
+            painter.setBrush(QColor(color))
+            painter.drawRect(QRectF(x, 0, span, 14))
+            x += span
+        
+        painter.setFont(QFont("Microsoft YaHei", 8))
+        column_width = width / 2
+        for i, (color, seconds) in enumerate(colors[:self.MAX_LEGEND]):
+            left = (i % 2) * column_width
+            top = 24 + (i // 2) * 20
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(color))
+            painter.drawRoundedRect(QRectF(left, top + 3, 10, 10), 2, 2)
+            painter.setPen(QColor("#2C3E50"))
+            painter.drawText(QRectF(left + 16, top, column_width - 16, 16),
+                             Qt.AlignmentFlag.AlignVCenter,
+                             f"{format_duration(seconds)}  {seconds * 100 / total:.0f}%")
+
+
+class StatisticsDialog(QDialog):
+    """统计面板"""
+    
+    def __init__(self, statistics: StatisticsAggregator, parent=None):
+        super().__init__(parent)
+        self._statistics = statistics
+        self._version = None
+        # 有进行中的运行时逐秒刷新
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self._setup_ui()
+        self._apply_styles()
+    
+    def _setup_ui(self):
+        """设置UI"""
+        self.setWindowTitle("统计")
+        self.resize(440, 460)
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(24, 24, 24, 24)
+        layout.setSpacing(12)
+        
+        title = QLabel("专注统计")
+        title.setFont(QFont("Microsoft YaHei", 14, QFont.Weight.Bold))
+        layout.addWidget(title)
+        
+        # 数字摘要
+        summary = QGridLayout()
+        summary.setSpacing(8)
+        self._value_labels = {}
+        for i, (key, caption) in enumerate((
+                ('today', "今日专注"), ('finished', "今日完成"),
+                ('streak', "连续天数"), ('longest', "最长连续"),
+                ('total', "累计专注"))):
+            box = QFrame()
+            box.setObjectName("statBox")
+            box_layout = QVBoxLayout(box)
+            box_layout.setContentsMargins(12, 8, 12, 8)
+            value = QLabel("-")
+            value.setFont(QFont("Microsoft YaHei", 13, QFont.Weight.Bold))
+            caption_label = QLabel(caption)
+            caption_label.setObjectName("caption")
+            box_layout.addWidget(value)
+            box_layout.addWidget(caption_label)
+            self._value_labels[key] = value
+            summary.addWidget(box, i // 3, i % 3)
+        layout.addLayout(summary)
+        
+        layout.addWidget(self._section_label(f"最近 {StatisticsAggregator.DAYS} 天"))
+        self._daily_chart = DailyBarChart()
+        layout.addWidget(self._daily_chart)
+        
+        layout.addWidget(self._section_label("按颜色"))
+        self._color_chart = ColorBreakdown()
+        layout.addWidget(self._color_chart)
+        
+        layout.addStretch()
+    
+    def _section_label(self, text: str) -> QLabel:
+        """分区标题"""
+        label = QLabel(text)
+        label.setFont(QFont("Microsoft YaHei", 10, QFont.Weight.Bold))
+        return label
+    
+    def _apply_styles(self):
+        """应用样式"""
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #FFFFFF;
+            }
+            
+            QLabel {
+                color: #2C3E50;
+            }
+            
+            QLabel#caption {
+                color: #888888;
+                font-size: 11px;
+            }
+            
+            QFrame#statBox {
+                background-color: #F8F9FA;
+                border-radius: 8px;
+            }
+        """)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._version = None
+        self.refresh()
+        self._refresh_timer.start(1000)
+    
+    def hideEvent(self, event):
+        self._refresh_timer.stop()
+        super().hideEvent(event)
+    
+    def refresh(self):
+        """从缓存的合计更新显示；没有新数据且没有进行中的运行时跳过"""
+        statistics = self._statistics
+        if statistics.version == self._version and not statistics.has_running():
+            return
+        self._version = statistics.version
+        self._show_snapshot(statistics.snapshot())
+    
+    def _show_snapshot(self, snapshot: StatisticsSnapshot):
+        """显示统计数据"""
+        labels = self._value_labels
+        labels['today'].setText(format_duration(snapshot.today_seconds))
+        labels['finished'].setText(f"{snapshot.today_finished} 次")
+        labels['streak'].setText(f"{snapshot.current_streak} 天")
+        labels['longest'].setText(f"{snapshot.longest_streak} 天")
+        labels['total'].setText(format_duration(snapshot.total_seconds))
+        # 图表按分钟取整，运行中逐秒刷新时不必每秒重绘
+        self._daily_chart.set_data([(day, seconds // 60 * 60) for day, seconds in snapshot.days])
+        self._color_chart.set_data([(color, seconds // 60 * 60)
+                                    for color, seconds in snapshot.colors if seconds >= 60])
@@ -11,7 +11,7 @@ from PyQt6.QtCore import (
 )
 from PyQt6.QtGui import QFont, QPainter, QColor, QPen, QBrush, QDrag, QPixmap, QPainterPath
 
-from models import Timer
+from models import Timer, parse_schedule
 
 
 class PlaceholderCard(QFrame):
@@ -85,6 +85,7 @@ class TimerCard(QFrame):
         self._is_dragging = False
         self._is_dragging_active = False  # 是否正在被拖拽（浮起状态）
         self._drag_in_progress = False  # 是否正在执行拖拽操作（防止重复emit）
+        self.draggable = True  # 是否允许拖拽排序（列表被筛选时关闭）
         
         # 动画相关
         self._shadow_effect = None
@@ -130,7 +131,7 @@ class TimerCard(QFrame):
         info_layout.setSpacing(4)
         
         # 名称
-        self.name_label = QLabel(self._timer.name)
+        self.name_label = QLabel(self._display_name())
         self.name_label.setFont(QFont("Microsoft YaHei", 11, QFont.Weight.Bold))
         info_layout.addWidget(self.name_label)
         
@@ -255,9 +256,21 @@ class TimerCard(QFrame):
         if self._is_dragging_active:
             painter.fillRect(rect, QColor(255, 255, 255, 150))
     
+    def _display_name(self) -> str:
+        """卡片上显示的名称（带分组和定时计划）"""
+        name = self._timer.name
+        if self._timer.group:
+            name = f"{name} · {self._timer.group}"
+        if self._timer.schedule:
+            try:
+                name = f"{name} · ⏰ {parse_schedule(self._timer.schedule).describe()}"
+            except ValueError:
+                pass
+        return name
+    
     def _update_display(self):
         """更新显示"""
-        self.name_label.setText(self._timer.name)
+        self.name_label.setText(self._display_name())
         self.time_label.setText(self._timer.get_formatted_time())
         
         # 获取文字颜色
@@ -389,7 +402,7 @@ class TimerCard(QFrame):
     
     def mouseMoveEvent(self, event):
         """鼠标移动事件 - 处理拖拽"""
-        if not self._drag_start_pos:
+        if not self._drag_start_pos or not self.draggable:
             super().mouseMoveEvent(event)
             return
         